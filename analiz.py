@@ -0,0 +1,89 @@
+"""Yıllık raporların analiz sayfaları.
+
+Faturalar ve Kalemler parçaları rapor yazılırken ``YillikOzet``'e verilir;
+her parça pandas ile gruplanıp yalnızca grup toplamları biriktirilir. Böylece
+aylık, satıcı, alıcı, para birimi ve KDV oranı kırılımları satırlar ikinci kez
+okunmadan ve yılın tamamı belleğe alınmadan hesaplanır.
+"""
+import pandas as pd
+
+# Sayfa adı -> (grup anahtarları, toplanan sütunlar)
+OZET_SAYFALARI = {
+    'Aylık': (('Ay',), ('Fatura Sayısı', 'TRY Toplam')),
+    'Satıcılar': (('Satıcı',), ('Fatura Sayısı', 'TRY Toplam')),
+    'Alıcılar': (('Alıcı',), ('Fatura Sayısı', 'TRY Toplam')),
+    'Para Birimleri': (('Para Birimi',), ('Fatura Sayısı', 'Toplam', 'TRY Toplam')),
+    # Kalem tutarları kalemin kendi para biriminde olduğundan oranla birlikte gruplanır
+    'KDV Oranları': (('KDV Oranı', 'Para Birimi'), ('Kalem Sayısı', 'Matrah', 'KDV Tutarı')),
+}
+
+# Bu sayfalar TRY toplamına göre büyükten küçüğe, diğerleri anahtara göre sıralanır
+_TUTARA_GORE = ('Satıcılar', 'Alıcılar')
+
+
+class YillikOzet:
+    """Bir yılın parçalarından özet tablolarını biriktirir.
+
+    Kategori sütunları sözlük kodlarıyla gruplanır ve adlar en sonda bir kez
+    çözülür; birikenler parça sayısından bağımsız olarak grup sayısı kadar
+    yer kaplar.
+    """
+
+    def __init__(self):
+        self._toplamlar = {}  # sayfa adı -> grup anahtarına göre toplamlar
+        self._kategoriler = {}  # sütun adı -> sözlük değerleri
+
+    def _biriktir(self, sayfa_adi, cerceve, anahtarlar):
+        toplamlar = cerceve.groupby(anahtarlar, sort=False, dropna=False).sum()
+        onceki = self._toplamlar.get(sayfa_adi)
+        self._toplamlar[sayfa_adi] = toplamlar if onceki is None else onceki.add(toplamlar, fill_value=0)
+
+    def _anahtar(self, parca, sutun):
+        degerler = parca[sutun]
+        if isinstance(degerler.dtype, pd.CategoricalDtype):
+            self._kategoriler[sutun] = degerler.cat.categories
+            return degerler.cat.codes.rename(sutun)
+        return degerler
+
+    def fatura_parcasi_ekle(self, parca):
+        if not len(parca):
+            return
+        cerceve = pd.DataFrame({
+            'Fatura Sayısı': 1,
+            'Toplam': parca['Toplam'],
+            'TRY Toplam': parca['TRY Karşılığı'],
+        })
+        self._biriktir('Aylık', cerceve[['Fatura Sayısı', 'TRY Toplam']], [parca['Tarih'].str[:7].rename('Ay')])
+        for sayfa_adi in ('Satıcılar', 'Alıcılar', 'Para Birimleri'):
+            (sutun,), toplanan = OZET_SAYFALARI[sayfa_adi]
+            self._biriktir(sayfa_adi, cerceve[list(toplanan)], [self._anahtar(parca, sutun)])
+
+    def kalem_parcasi_ekle(self, parca):
+        if not len(parca):
+            return
+        cerceve = pd.DataFrame({
+            'Kalem Sayısı': 1,
+            'Matrah': parca['Toplam Tutar'],
+            'KDV Tutarı': parca['KDV Tutarı'],
+        })
+        self._biriktir('KDV Oranları', cerceve, [parca['KDV Oranı'], self._anahtar(parca, 'Para Birimi')])
+
+    def tablolar(self):
+        """``(sayfa_adi, DataFrame)`` çiftleri; hiç satırı olmayan sayfalar atlanır."""
+        for sayfa_adi, (anahtarlar, toplanan) in OZET_SAYFALARI.items():
+            toplamlar = self._toplamlar.get(sayfa_adi)
+            if toplamlar is None:
+                continue
+            df = toplamlar.reset_index()
+            for sutun in anahtarlar:
+                if sutun in self._kategoriler:
+                    df[sutun] = pd.Categorical.from_codes(
+                        df[sutun], categories=self._kategoriler[sutun]
+                    ).astype(object)
+            sayilar = [sutun for sutun in toplanan if sutun.endswith('Sayısı')]
+            df = df.astype({sutun: 'int64' for sutun in sayilar}).round(2)
+            if sayfa_adi in _TUTARA_GORE:
+                df = df.sort_values(['TRY Toplam', *anahtarlar], ascending=[False, True], kind='stable')
+            else:
+                df = df.sort_values(list(anahtarlar), kind='stable')
+            yield sayfa_adi, df[[*anahtarlar, *toplanan]].reset_index(drop=True)
@@ -0,0 +1 @@
+"""Fatura İşleyici için performans ölçüm betikleri."""
@@ -0,0 +1,3 @@
+from benchmark.calistir import main
+
+main()
@@ -0,0 +1,239 @@
+"""Aşama aşama performans ölçümü.
+
+Sentetik arşivler üretir, her aşamayı (zip açma, xml_oku, toplama,
+excel_olustur) ve uçtan uca tum_yillari_isle'yi ayrı ayrı ölçer; ayrıca
+arayüzün açılışını belirleyen modüllerin içe aktarma ve işleyicinin
+kurulma sürelerini ``python -X importtime`` ile ölçüp bütçeyle
+karşılaştırır. Sonucu ``benchmark/sonuclar.jsonl`` dosyasına (ya da
+``--sonuc-dosyasi``'na) bir satır olarak ekler. Sürümler arası gerilemeler
+bu dosyadaki satırlar karşılaştırılarak görülür; dosya yerel ölçümleri
+tuttuğu için git'e eklenmez.
+
+Kullanım: ``python -m benchmark [--fatura 2000] [--kalem 5] [--isci 4] ...``
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PAKET_KOKU = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PAKET_KOKU))
+
+from benchmark.uretec import arsiv_uret  # noqa: E402
+from depo import KolonDeposu  # noqa: E402
+from gunluk import KOK_GUNLUKCU  # noqa: E402
+from fatura_isleyici import FaturaIsleyici, fatura_yili, xml_ayristir, zip_xmlleri  # noqa: E402
+
+VARSAYILAN_SONUC_DOSYASI = Path(__file__).resolve().parent / "sonuclar.jsonl"
+
+# Açılışta içe aktarılan modüller ve içe aktarma bütçeleri (ms). pandas,
+# openpyxl gibi ağır kütüphaneler bu modüllerle birlikte yüklenmemeli;
+# raporlar yazılırken yüklenirler
+ICE_AKTARMA_BUTCELERI = {'fatura_isleyici': 300, 'main': 400, 'ui': 600}
+# İçe aktarmadan sonra çalıştırılıp bütçeye dahil edilen açılış adımları.
+# İşleyici kur tablosu kapalıyken kurulur; tablo okunurken pandas yüklenmesi
+# beklenen bir maliyettir
+ACILIS_ADIMLARI = {
+    'fatura_isleyici': "fatura_isleyici.FaturaIsleyici(d, d, onbellek_kullan=False, kur_tablosu=False)",
+}
+AGIR_MODULLER = ('pandas', 'numpy', 'openpyxl', 'pyarrow')
+
+
+def surum():
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'], cwd=PAKET_KOKU,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'bilinmiyor'
+
+
+def ice_aktarma_olc(modul):
+    """Modülü yeni bir yorumlayıcıda içe aktarır; süreyi (ms) ve yüklenen ağır modülleri döndürür.
+
+    Modülün ``ACILIS_ADIMLARI``'ndaki adımı da çalıştırılır; süresi
+    ``acilis_ms`` olarak ayrıca verilir ve toplama eklenir, ağır modüller bu
+    adımdan sonra sayılır. Modül içe aktarılamıyorsa (ör. PyQt6 kurulu
+    değilse) None döndürür.
+    """
+    adim = ACILIS_ADIMLARI.get(modul, "pass")
+    betik = (
+        f"import sys, tempfile, time, {modul}\n"
+        "baslangic = time.perf_counter()\n"
+        f"with tempfile.TemporaryDirectory() as d: {adim}\n"
+        "print(round((time.perf_counter() - baslangic) * 1000, 1))\n"
+        f"print(','.join(m for m in {AGIR_MODULLER!r} if m in sys.modules))"
+    )
+    sonuc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', betik], cwd=PAKET_KOKU, capture_output=True, text=True
+    )
+    if sonuc.returncode:
+        return None
+    # Satırlar 'import time: kendi | toplam | ad' biçimindedir; üst düzey modül
+    # adı tek boşlukla başlar
+    for satir in sonuc.stderr.splitlines():
+        alanlar = satir.split('|')
+        if len(alanlar) == 3 and alanlar[2].rstrip() == f" {modul}":
+            acilis_ms, agir_moduller = sonuc.stdout.splitlines()[-2:]
+            return {
+                'ms': round(int(alanlar[1]) / 1000 + float(acilis_ms), 1),
+                'acilis_ms': float(acilis_ms),
+                'agir_moduller': [ad for ad in agir_moduller.split(',') if ad],
+                'butce_ms': ICE_AKTARMA_BUTCELERI.get(modul)
+            }
+    return None
+
+
+class Kronometre:
+    def __init__(self):
+        self.sureler = {}
+
+    def olc(self, asama):
+        kronometre = self
+
+        class _Olcum:
+            def __enter__(self):
+                self.baslangic = time.perf_counter()
+
+            def __exit__(self, *_):
+                kronometre.sureler[asama] = round(time.perf_counter() - self.baslangic, 4)
+
+        return _Olcum()
+
+
+def asamalari_olc(arsivler, cikti_dizin, isci_sayisi):
+    kronometre = Kronometre()
+    sayaclar = {}
+
+    # zip_ac: dış ve iç zip'lerin bellekte açılması
+    with kronometre.olc('zip_ac'):
+        xml_listesi = [xml for arsiv in arsivler for xml in zip_xmlleri(arsiv)]
+    sayaclar['xml_sayisi'] = len(xml_listesi)
+    sayaclar['xml_bayt'] = sum(len(xml) for _, xml in xml_listesi)
+
+    # xml_oku: tek çekirdekte ayrıştırma
+    with kronometre.olc('xml_oku'):
+        faturalar = [sonuc for ad, xml in xml_listesi if (sonuc := xml_ayristir(xml, ad))]
+    sayaclar['fatura_sayisi'] = len(faturalar)
+    sayaclar['kalem_sayisi'] = sum(len(kalemler) for _, kalemler in faturalar)
+    del xml_listesi
+
+    # toplama: yıllara dağıtıp sütunlu depoya ekleme
+    depo = KolonDeposu(Path(cikti_dizin) / "depo")
+    with kronometre.olc('toplama'):
+        for veri, kalemler in faturalar:
+            depo.fatura_ekle(fatura_yili(veri), veri, kalemler)
+    del faturalar
+
+    # excel_olustur: tüm yılların raporları. Rapor kütüphaneleri ilk raporda
+    # yüklenir; bu süre ölçüme girmesin, açılış maliyeti ayrıca ölçülür
+    import openpyxl  # noqa: F401
+    import pandas  # noqa: F401
+    isleyici = FaturaIsleyici(cikti_dizin, cikti_dizin, onbellek_kullan=False)
+    with kronometre.olc('excel_olustur'):
+        for yil in depo.yillar():
+            isleyici.excel_olustur(depo, yil, Path(cikti_dizin) / f"{yil}_rapor.xlsx")
+    depo.temizle()
+
+    # uçtan uca: işçi havuzuyla tum_yillari_isle
+    uctan_uca_dizin = Path(cikti_dizin) / "uctan_uca"
+    isleyici = FaturaIsleyici(
+        Path(arsivler[0]).parent, uctan_uca_dizin, isci_sayisi=isci_sayisi, onbellek_kullan=False
+    )
+    with kronometre.olc('tum_yillari_isle'):
+        asyncio.run(isleyici.tum_yillari_isle())
+
+    return kronometre.sureler, sayaclar
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fatura İşleyici performans ölçümü")
+    parser.add_argument('--fatura', type=int, default=2000, help="Üretilecek fatura sayısı")
+    parser.add_argument('--kalem', type=int, default=5, help="Fatura başına kalem sayısı")
+    parser.add_argument('--arsiv-basina', type=int, default=100, help="Dış zip başına fatura sayısı")
+    parser.add_argument('--derinlik', type=int, default=1, help="İç içe zip derinliği")
+    parser.add_argument('--para-birimleri', nargs='+', default=['TRY', 'USD', 'EUR'])
+    parser.add_argument('--ek-boyutu', type=int, default=20_000, help="Gömülü ekin bayt boyutu")
+    parser.add_argument('--isci', type=int, default=None, help="Uçtan uca ölçümde işçi sayısı")
+    parser.add_argument('--tohum', type=int, default=42)
+    parser.add_argument('--etiket', default='', help="Sonuç satırına eklenecek serbest açıklama")
+    parser.add_argument('--sonuc-dosyasi', type=Path, default=VARSAYILAN_SONUC_DOSYASI)
+    args = parser.parse_args(argv)
+
+    parametreler = {
+        'fatura': args.fatura,
+        'kalem': args.kalem,
+        'arsiv_basina': args.arsiv_basina,
+        'derinlik': args.derinlik,
+        'para_birimleri': args.para_birimleri,
+        'ek_boyutu': args.ek_boyutu,
+        'isci': args.isci or os.cpu_count(),
+        'tohum': args.tohum
+    }
+
+    with tempfile.TemporaryDirectory() as gecici:
+        baslangic = time.perf_counter()
+        arsivler = arsiv_uret(
+            Path(gecici) / "arsivler", args.fatura, args.kalem, tuple(args.para_birimleri),
+            args.derinlik, args.arsiv_basina, args.ek_boyutu, args.tohum
+        )
+        uretim_suresi = time.perf_counter() - baslangic
+
+        # İşleyicinin günlük mesajları ölçüm özetini boğmasın; yalnızca hatalar yazılır
+        kok = logging.getLogger(KOK_GUNLUKCU)
+        onceki_seviye = kok.level
+        kok.setLevel(logging.ERROR)
+        try:
+            sureler, sayaclar = asamalari_olc(arsivler, Path(gecici) / "cikti", args.isci)
+        finally:
+            kok.setLevel(onceki_seviye)
+
+    ice_aktarma = {modul: ice_aktarma_olc(modul) for modul in ICE_AKTARMA_BUTCELERI}
+
+    sonuc = {
+        'zaman': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'surum': surum(),
+        'etiket': args.etiket,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cekirdek': os.cpu_count(),
+        'parametreler': parametreler,
+        'uretim_suresi': round(uretim_suresi, 4),
+        'sureler': sureler,
+        'sayaclar': sayaclar,
+        'fatura_per_saniye': {
+            asama: round(sayaclar['fatura_sayisi'] / sure, 1)
+            for asama, sure in sureler.items() if sure
+        },
+        'ice_aktarma': ice_aktarma
+    }
+    args.sonuc_dosyasi.parent.mkdir(exist_ok=True, parents=True)
+    with open(args.sonuc_dosyasi, 'a', encoding='utf-8') as dosya:
+        dosya.write(json.dumps(sonuc, ensure_ascii=False) + "\n")
+
+    print(f"Sürüm {sonuc['surum']} - {sayaclar['fatura_sayisi']} fatura, {sayaclar['kalem_sayisi']} kalem")
+    for asama, sure in sureler.items():
+        print(f"  {asama:<18} {sure:9.3f} s  {sonuc['fatura_per_saniye'].get(asama, 0):>10} fatura/s")
+    for modul, olcum in ice_aktarma.items():
+        if olcum is None:
+            print(f"  import {modul:<16} içe aktarılamadı")
+            continue
+        uyarilar = []
+        if olcum['ms'] > olcum['butce_ms']:
+            uyarilar.append(f"bütçe ({olcum['butce_ms']} ms) aşıldı")
+        if olcum['agir_moduller']:
+            uyarilar.append("yüklendi: " + ", ".join(olcum['agir_moduller']))
+        print(f"  import {modul:<16} {olcum['ms']:9.1f} ms  {'; '.join(uyarilar)}")
+    print(f"Sonuç eklendi: {args.sonuc_dosyasi}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""excel_olustur ölçeklenme ölçümü: Sipariş No bağlantılarının doğrusal kaldığını gösterir.
+
+Kullanım: ``python -m benchmark.excel_kopru [--boyutlar 10000 50000 100000] [--kalem N]``
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from depo import KolonDeposu  # noqa: E402
+from fatura_isleyici import FaturaIsleyici  # noqa: E402
+from kayit import Fatura, Kalem  # noqa: E402
+
+
+def ornek_depo(dizin, fatura_sayisi, kalem_sayisi):
+    depo = KolonDeposu(dizin)
+    for no in range(fatura_sayisi):
+        siparis_no = f"SIP{no:09d}"
+        veri = Fatura(
+            '2024-01-01', siparis_no, f"ABC2024{no:09d}", '2024-01-02',
+            f"Satıcı {no % 50}", f"Alıcı {no % 500}", 120.0, 'TRY', 120.0
+        )
+        kalemler = []
+        for kalem_no in range(1, kalem_sayisi + 1):
+            kalemler.append(Kalem(siparis_no, str(kalem_no), f"Ürün {kalem_no}", 1.0, 50.0, 20.0, 10.0, 50.0, 'TRY'))
+        depo.fatura_ekle(2024, veri, kalemler)
+    return depo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="excel_olustur ölçeklenme ölçümü")
+    parser.add_argument('--boyutlar', type=int, nargs='+', default=[10_000, 50_000, 100_000])
+    parser.add_argument('--kalem', type=int, default=2, help="Fatura başına kalem sayısı")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as gecici:
+        isleyici = FaturaIsleyici(gecici, gecici, onbellek_kullan=False)
+        print(f"{'Fatura':>10} {'Bağlantılı (s)':>15} {'Bağlantısız (s)':>16} {'µs/fatura':>10}")
+        for fatura_sayisi in args.boyutlar:
+            depo = ornek_depo(Path(gecici) / f"depo_{fatura_sayisi}", fatura_sayisi, args.kalem)
+            sureler = []
+            for kopru_ekle in (True, False):
+                isleyici.kopru_ekle = kopru_ekle
+                baslangic = time.perf_counter()
+                isleyici.excel_olustur(depo, 2024, Path(gecici) / "olcum.xlsx")
+                sureler.append(time.perf_counter() - baslangic)
+            print(f"{fatura_sayisi:>10} {sureler[0]:>15.2f} {sureler[1]:>16.2f} "
+                  f"{sureler[0] / fatura_sayisi * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Sentetik UBL-TR e-fatura üreteci.
+
+xml_oku'nun beklediği yapıda (namespace'ler, LegalMonetaryTotal, InvoiceLine,
+döviz kuru blokları, gömülü ekler) faturalar üretir ve bunları Paraşüt dışa
+aktarımındaki gibi iç içe zip'lere paketler: dış zip'in içinde her fatura
+kendi zip'inde tek bir XML olarak durur.
+"""
+import base64
+import io
+import random
+import zipfile
+from datetime import date, timedelta
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+FATURA_SABLONU = '''<?xml version="1.0" encoding="UTF-8"?>
+<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2" xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2" xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2" xmlns:ext="urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2">
+<ext:UBLExtensions><ext:UBLExtension><ext:ExtensionContent/></ext:UBLExtension></ext:UBLExtensions>
+<cbc:UBLVersionID>2.1</cbc:UBLVersionID>
+<cbc:CustomizationID>TR1.2</cbc:CustomizationID>
+<cbc:ProfileID>TICARIFATURA</cbc:ProfileID>
+<cbc:ID>{fatura_no}</cbc:ID>
+<cbc:CopyIndicator>false</cbc:CopyIndicator>
+<cbc:UUID>{uuid}</cbc:UUID>
+<cbc:IssueDate>{tarih}</cbc:IssueDate>
+<cbc:InvoiceTypeCode>SATIS</cbc:InvoiceTypeCode>
+<cbc:DocumentCurrencyCode>{para_birimi}</cbc:DocumentCurrencyCode>
+<cbc:LineCountNumeric>{kalem_sayisi}</cbc:LineCountNumeric>
+<cac:OrderReference><cbc:ID>{siparis_no}</cbc:ID><cbc:IssueDate>{siparis_tarihi}</cbc:IssueDate></cac:OrderReference>
+<cac:AdditionalDocumentReference><cbc:ID>{uuid}</cbc:ID><cbc:IssueDate>{tarih}</cbc:IssueDate><cac:Attachment><cbc:EmbeddedDocumentBinaryObject characterSetCode="UTF-8" encodingCode="Base64" filename="fatura.xslt" mimeCode="application/xml">{ek}</cbc:EmbeddedDocumentBinaryObject></cac:Attachment></cac:AdditionalDocumentReference>
+<cac:AccountingSupplierParty><cac:Party><cac:PartyIdentification><cbc:ID schemeID="VKN">{satici_vkn}</cbc:ID></cac:PartyIdentification><cac:PartyName><cbc:Name>{satici}</cbc:Name></cac:PartyName></cac:Party></cac:AccountingSupplierParty>
+<cac:AccountingCustomerParty><cac:Party><cac:PartyIdentification><cbc:ID schemeID="VKN">{alici_vkn}</cbc:ID></cac:PartyIdentification><cac:PartyName><cbc:Name>{alici}</cbc:Name></cac:PartyName></cac:Party></cac:AccountingCustomerParty>
+{kur_blogu}<cac:TaxTotal><cbc:TaxAmount currencyID="{para_birimi}">{kdv_toplam:.2f}</cbc:TaxAmount></cac:TaxTotal>
+<cac:LegalMonetaryTotal><cbc:LineExtensionAmount currencyID="{para_birimi}">{ara_toplam:.2f}</cbc:LineExtensionAmount><cbc:TaxExclusiveAmount currencyID="{para_birimi}">{ara_toplam:.2f}</cbc:TaxExclusiveAmount><cbc:TaxInclusiveAmount currencyID="{para_birimi}">{genel_toplam:.2f}</cbc:TaxInclusiveAmount><cbc:PayableAmount currencyID="{para_birimi}">{genel_toplam:.2f}</cbc:PayableAmount></cac:LegalMonetaryTotal>
+{kalemler}
+</Invoice>'''
+
+KUR_SABLONU = '''<cac:{etiket}><cbc:SourceCurrencyCode>{para_birimi}</cbc:SourceCurrencyCode><cbc:TargetCurrencyCode>TRY</cbc:TargetCurrencyCode><cbc:CalculationRate>{kur:.4f}</cbc:CalculationRate><cbc:Date>{tarih}</cbc:Date></cac:{etiket}>
+'''
+
+KALEM_SABLONU = '''<cac:InvoiceLine><cbc:ID>{no}</cbc:ID><cbc:InvoicedQuantity unitCode="C62">{miktar}</cbc:InvoicedQuantity><cbc:LineExtensionAmount currencyID="{para_birimi}">{tutar:.2f}</cbc:LineExtensionAmount><cac:TaxTotal><cbc:TaxAmount currencyID="{para_birimi}">{kdv:.2f}</cbc:TaxAmount><cac:TaxSubtotal><cbc:TaxableAmount currencyID="{para_birimi}">{tutar:.2f}</cbc:TaxableAmount><cbc:TaxAmount currencyID="{para_birimi}">{kdv:.2f}</cbc:TaxAmount><cbc:Percent>{oran}</cbc:Percent><cac:TaxCategory><cac:TaxScheme><cbc:Name>KDV</cbc:Name><cbc:TaxTypeCode>0015</cbc:TaxTypeCode></cac:TaxScheme></cac:TaxCategory></cac:TaxSubtotal></cac:TaxTotal><cac:Item><cbc:Name>{urun}</cbc:Name></cac:Item><cac:Price><cbc:PriceAmount currencyID="{para_birimi}">{birim_fiyat:.2f}</cbc:PriceAmount></cac:Price></cac:InvoiceLine>'''
+
+SIRKETLER = ('Anadolu', 'Marmara', 'Ege', 'Karadeniz', 'Akdeniz', 'Toros', 'Uludağ', 'Kapadokya', 'Boğaziçi', 'Fırat')
+SIRKET_TURLERI = ('Ticaret A.Ş.', 'Gıda Ltd. Şti.', 'Lojistik A.Ş.', 'Yazılım Ltd. Şti.', 'Tekstil San. ve Tic. A.Ş.')
+URUNLER = ('Danışmanlık Hizmeti', 'Yazılım Lisansı', 'Kargo Bedeli', 'Ofis Malzemesi', 'Bakım Onarım', 'Kira Bedeli', 'Reklam Hizmeti')
+KDV_ORANLARI = (1, 10, 20)
+KURLAR = {'USD': 32.0, 'EUR': 35.0, 'GBP': 40.0}
+
+
+def firma_adi(rastgele):
+    return f"{rastgele.choice(SIRKETLER)} {rastgele.choice(SIRKETLER)} {rastgele.choice(SIRKET_TURLERI)}"
+
+
+def fatura_xml(no, rastgele, kalem_sayisi=5, para_birimleri=('TRY',), ek_boyutu=20_000,
+               baslangic_tarihi=date(2020, 1, 1), gun_araligi=5 * 365):
+    """Tek bir UBL-TR faturası üretir ve UTF-8 bayt olarak döndürür."""
+    tarih = baslangic_tarihi + timedelta(days=rastgele.randrange(gun_araligi))
+    para_birimi = rastgele.choice(para_birimleri)
+
+    kalemler = []
+    ara_toplam = kdv_toplam = 0.0
+    for kalem_no in range(1, kalem_sayisi + 1):
+        miktar = rastgele.randint(1, 20)
+        birim_fiyat = round(rastgele.uniform(5, 5000), 2)
+        tutar = miktar * birim_fiyat
+        oran = rastgele.choice(KDV_ORANLARI)
+        kdv = tutar * oran / 100
+        ara_toplam += tutar
+        kdv_toplam += kdv
+        kalemler.append(KALEM_SABLONU.format(
+            no=kalem_no, miktar=miktar, para_birimi=para_birimi, tutar=tutar, kdv=kdv,
+            oran=oran, urun=escape(rastgele.choice(URUNLER)), birim_fiyat=birim_fiyat
+        ))
+
+    # Dövizli faturaların bir kısmı PricingExchangeRate, bir kısmı
+    # PaymentAlternativeExchangeRate taşır, bir kısmında hiç kur yoktur
+    kur_blogu = ''
+    if para_birimi != 'TRY':
+        secim = rastgele.random()
+        if secim < 0.8:
+            etiket = 'PricingExchangeRate' if secim < 0.6 else 'PaymentAlternativeExchangeRate'
+            kur = KURLAR.get(para_birimi, 30.0) * rastgele.uniform(0.9, 1.1)
+            kur_blogu = KUR_SABLONU.format(etiket=etiket, para_birimi=para_birimi, kur=kur, tarih=tarih)
+
+    ek = base64.b64encode(rastgele.randbytes(ek_boyutu)).decode('ascii') if ek_boyutu else ''
+    return FATURA_SABLONU.format(
+        fatura_no=f"PRS{tarih.year}{no:09d}",
+        uuid=f"{rastgele.getrandbits(128):032x}",
+        tarih=tarih.isoformat(),
+        para_birimi=para_birimi,
+        kalem_sayisi=kalem_sayisi,
+        siparis_no=f"SIP-{no:08d}",
+        siparis_tarihi=(tarih - timedelta(days=rastgele.randrange(10))).isoformat(),
+        ek=ek,
+        satici_vkn=f"{rastgele.randrange(10 ** 10):010d}",
+        satici=escape(firma_adi(rastgele)),
+        alici_vkn=f"{rastgele.randrange(10 ** 10):010d}",
+        alici=escape(firma_adi(rastgele)),
+        kur_blogu=kur_blogu,
+        kdv_toplam=kdv_toplam,
+        ara_toplam=ara_toplam,
+        genel_toplam=ara_toplam + kdv_toplam,
+        kalemler=''.join(kalemler)
+    ).encode('utf-8')
+
+
+def zip_baytlari(uyeler):
+    """``[(isim, bayt), ...]`` listesinden bellekte bir zip arşivi oluşturur."""
+    tampon = io.BytesIO()
+    with zipfile.ZipFile(tampon, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
+        for isim, veri in uyeler:
+            zip_ref.writestr(isim, veri)
+    return tampon.getvalue()
+
+
+def paketle(isim, xml_baytlari, derinlik):
+    """Bir XML'i ``derinlik`` kat iç zip içine sarar; ``(uye_adi, bayt)`` döndürür."""
+    for _ in range(derinlik):
+        xml_baytlari = zip_baytlari([(isim, xml_baytlari)])
+        isim = f"{Path(isim).stem}.zip"
+    return isim, xml_baytlari
+
+
+def arsiv_uret(hedef_dizin, fatura_sayisi=1000, kalem_sayisi=5, para_birimleri=('TRY', 'USD', 'EUR'),
+               ic_ice_derinlik=1, arsiv_basina_fatura=100, ek_boyutu=20_000, tohum=42):
+    """Sentetik Paraşüt dışa aktarım arşivleri üretir.
+
+    ``ic_ice_derinlik`` her XML'in dış zip içinde kaç kat zip'e sarıldığını
+    belirler (0: XML doğrudan dış zip'te, 1: Paraşüt düzeni). Aynı ``tohum``
+    aynı arşivleri üretir. Oluşturulan dış zip yollarını döndürür.
+    """
+    hedef_dizin = Path(hedef_dizin)
+    hedef_dizin.mkdir(exist_ok=True, parents=True)
+    rastgele = random.Random(tohum)
+
+    arsivler = []
+    for baslangic in range(0, fatura_sayisi, arsiv_basina_fatura):
+        uyeler = []
+        for no in range(baslangic, min(baslangic + arsiv_basina_fatura, fatura_sayisi)):
+            xml_baytlari = fatura_xml(no, rastgele, kalem_sayisi, para_birimleri, ek_boyutu)
+            uyeler.append(paketle(f"fatura_{no:08d}.xml", xml_baytlari, ic_ice_derinlik))
+        arsiv_yolu = hedef_dizin / f"parasut_{len(arsivler) + 1:05d}.zip"
+        arsiv_yolu.write_bytes(zip_baytlari(uyeler))
+        arsivler.append(arsiv_yolu)
+    return arsivler
@@ -0,0 +1,97 @@
+"""xml_oku mikro ölçümü: tek geçişli ayrıştırıcıyı eski .// aramalı sürümle karşılaştırır.
+
+Kullanım: ``python -m benchmark.xml_oku [--tekrar N] [--kalem N] [--ek-boyutu BAYT]``
+"""
+import argparse
+import io
+import random
+import sys
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fatura_isleyici  # noqa: E402
+from benchmark.uretec import fatura_xml  # noqa: E402
+
+
+def ornek_fatura(kalem_sayisi, ek_boyutu):
+    return fatura_xml(1, random.Random(42), kalem_sayisi, ('USD',), ek_boyutu)
+
+
+def eski_xml_oku(xml_baytlari):
+    """Karşılaştırma için tek geçişli ayrıştırıcıdan önceki .// aramalı sürüm."""
+    root = ET.parse(io.BytesIO(xml_baytlari)).getroot()
+    ns = {
+        'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
+        'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2'
+    }
+    toplam = float(root.find('.//cac:LegalMonetaryTotal/cbc:TaxInclusiveAmount', ns).text)
+    para_birimi = root.find('.//cac:LegalMonetaryTotal/cbc:TaxInclusiveAmount', ns).attrib.get('currencyID', 'TRY')
+    kur_elementi = root.find('.//cac:PricingExchangeRate', ns)
+    if kur_elementi is None:
+        kur_elementi = root.find('.//cac:PaymentAlternativeExchangeRate', ns)
+    if kur_elementi is not None:
+        try_karsiligi = toplam * float(kur_elementi.find('cbc:CalculationRate', ns).text)
+    else:
+        try_karsiligi = toplam if para_birimi == 'TRY' else 0
+    veri = {
+        'Sipariş Tarihi': root.find('.//cac:OrderReference/cbc:IssueDate', ns).text if root.find('.//cac:OrderReference/cbc:IssueDate', ns) is not None else '',
+        'Sipariş No': root.find('.//cac:OrderReference/cbc:ID', ns).text if root.find('.//cac:OrderReference/cbc:ID', ns) is not None else '',
+        'Fatura No': root.find('.//cbc:ID', ns).text,
+        'Tarih': root.find('.//cbc:IssueDate', ns).text,
+        'Satıcı': root.find('.//cac:AccountingSupplierParty//cac:PartyName/cbc:Name', ns).text,
+        'Alıcı': root.find('.//cac:AccountingCustomerParty//cac:PartyName/cbc:Name', ns).text,
+        'Toplam': toplam,
+        'Para Birimi': para_birimi,
+        'TRY Karşılığı': try_karsiligi
+    }
+    kalemler = []
+    for kalem in root.findall('.//cac:InvoiceLine', ns):
+        kalemler.append({
+            'Sipariş No': veri['Sipariş No'],
+            'Kalem No': kalem.find('cbc:ID', ns).text,
+            'Ürün/Hizmet': kalem.find('.//cac:Item/cbc:Name', ns).text,
+            'Miktar': float(kalem.find('cbc:InvoicedQuantity', ns).text),
+            'Birim Fiyat': float(kalem.find('.//cac:Price/cbc:PriceAmount', ns).text),
+            'KDV Oranı': float(kalem.find('.//cac:TaxTotal//cbc:Percent', ns).text if kalem.find('.//cac:TaxTotal//cbc:Percent', ns) is not None else 0),
+            'KDV Tutarı': float(kalem.find('.//cac:TaxTotal/cbc:TaxAmount', ns).text),
+            'Toplam Tutar': float(kalem.find('.//cbc:LineExtensionAmount', ns).text),
+            'Para Birimi': kalem.find('.//cbc:LineExtensionAmount', ns).attrib.get('currencyID', 'TRY')
+        })
+    return veri, kalemler
+
+
+def olc(fonksiyon, xml_baytlari, tekrar):
+    baslangic = time.perf_counter()
+    for _ in range(tekrar):
+        fonksiyon(xml_baytlari)
+    return (time.perf_counter() - baslangic) / tekrar * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="xml_oku mikro ölçümü")
+    parser.add_argument('--tekrar', type=int, default=2000)
+    parser.add_argument('--kalem', type=int, default=5, help="Fatura başına kalem sayısı")
+    parser.add_argument('--ek-boyutu', type=int, default=50_000, help="Gömülü ekin bayt boyutu")
+    args = parser.parse_args()
+
+    xml_baytlari = ornek_fatura(args.kalem, args.ek_boyutu)
+    eski_veri, eski_kalemler = eski_xml_oku(xml_baytlari)
+    yeni_veri, yeni_kalemler = fatura_isleyici.xml_ayristir(xml_baytlari)
+    # Yeni ayrıştırıcı aynı alanları aynı sırada kayıtlar olarak döndürür
+    if (tuple(eski_veri.values()) != yeni_veri[:len(eski_veri)]
+            or [tuple(kalem.values()) for kalem in eski_kalemler] != yeni_kalemler):
+        print("Uyarı: iki ayrıştırıcının çıktısı farklı")
+
+    arka_uc = 'lxml' if fatura_isleyici._lxml_etree is not None else 'xml.etree'
+    eski = olc(eski_xml_oku, xml_baytlari, args.tekrar)
+    yeni = olc(fatura_isleyici.xml_ayristir, xml_baytlari, args.tekrar)
+    print(f"Eski xml_oku : {eski:8.1f} µs/fatura")
+    print(f"Yeni xml_oku : {yeni:8.1f} µs/fatura ({arka_uc})")
+    print(f"Hızlanma     : {eski / yeni:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
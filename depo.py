@@ -0,0 +1,293 @@
+import math
+import pickle
+import shutil
+from array import array
+from pathlib import Path
+
+# numpy ve pandas yalnızca okurken gerekir; ekleme yolu ve bu modülü içe
+# aktaran ayrıştırma işçileri onları yüklemez
+
+# Sütunlar kayit.Fatura ve kayit.Kalem alanlarıyla aynı sırada olmalıdır.
+# Sütun türleri: 'metin' Python listesi, 'kategori' sözlük kodlu int32 dizisi,
+# 'sayi' float64 dizisi olarak saklanır
+FATURA_SUTUNLARI = (
+    ('Sipariş Tarihi', 'metin'),
+    ('Sipariş No', 'metin'),
+    ('Fatura No', 'metin'),
+    ('Tarih', 'metin'),
+    ('Satıcı', 'kategori'),
+    ('Alıcı', 'kategori'),
+    ('Toplam', 'sayi'),
+    ('Para Birimi', 'kategori'),
+    ('TRY Karşılığı', 'sayi'),
+)
+
+KALEM_SUTUNLARI = (
+    ('Sipariş No', 'metin'),
+    ('Kalem No', 'metin'),
+    ('Ürün/Hizmet', 'kategori'),
+    ('Miktar', 'sayi'),
+    ('Birim Fiyat', 'sayi'),
+    ('KDV Oranı', 'sayi'),
+    ('KDV Tutarı', 'sayi'),
+    ('Toplam Tutar', 'sayi'),
+    ('Para Birimi', 'kategori'),
+)
+
+TABLOLAR = {
+    'faturalar': FATURA_SUTUNLARI,
+    'kalemler': KALEM_SUTUNLARI,
+}
+
+# Bellek tahmini için Python str nesnesinin sabit maliyeti
+_METIN_EK_YUKU = 49
+
+
+class Sozluk:
+    """Tekrarlayan metinleri tamsayı kodlarla saklayan sözlük kodlaması."""
+
+    def __init__(self, degerler=()):
+        self.degerler = list(degerler)
+        self.kodlar = {deger: kod for kod, deger in enumerate(self.degerler)}
+
+    def kodla(self, deger):
+        if deger is None:
+            return -1
+        kod = self.kodlar.get(deger)
+        if kod is None:
+            kod = self.kodlar[deger] = len(self.degerler)
+            self.degerler.append(deger)
+        return kod
+
+
+class _Tablo:
+    """Bir yılın tek bir tablosu: bellekteki açık parça ve diske yazılmış parçalar."""
+
+    def __init__(self, sutunlar):
+        self.sutunlar = sutunlar
+        self.satir_sayisi = 0
+        # Sonradan çıkarılan satırların sıra numaraları; okurken atlanır
+        self.silinenler = set()
+        # Excel sütun genişlikleri için her sütunun en uzun metin karşılığı
+        self.en_uzun = {ad: 0 for ad, _ in sutunlar}
+        self.parca_dosyalari = []
+        self._yeni_parca()
+
+    def _yeni_parca(self):
+        self.parca = {}
+        for ad, tur in self.sutunlar:
+            if tur == 'sayi':
+                self.parca[ad] = array('d')
+            elif tur == 'kategori':
+                self.parca[ad] = array('i')
+            else:
+                self.parca[ad] = []
+        self.parca_satiri = 0
+        self.parca_bellek = 0
+
+    def ekle(self, kayit, sozlukler):
+        # Kaydın ilk alanları sütunlarla aynı sıradadır (bkz. kayit.py); fazlası okunmaz
+        bellek = 0
+        en_uzun = self.en_uzun
+        for (ad, tur), deger in zip(self.sutunlar, kayit):
+            if tur == 'sayi':
+                deger = math.nan if deger is None else deger
+                self.parca[ad].append(deger)
+                uzunluk = len(str(deger))
+                bellek += 8
+            elif tur == 'kategori':
+                self.parca[ad].append(sozlukler[ad].kodla(deger))
+                uzunluk = len(deger) if deger is not None else 0
+                bellek += 4
+            else:
+                self.parca[ad].append(deger)
+                uzunluk = len(deger) if deger is not None else 0
+                bellek += _METIN_EK_YUKU + uzunluk
+            if uzunluk > en_uzun[ad]:
+                en_uzun[ad] = uzunluk
+        self.parca_satiri += 1
+        self.satir_sayisi += 1
+        self.parca_bellek += bellek
+        return bellek
+
+    def diske_yaz(self, dosya_yolu):
+        """Açık parçayı diske yazar ve boşaltır; boşalan bellek miktarını döndürür."""
+        if not self.parca_satiri:
+            return 0
+        with open(dosya_yolu, 'wb') as dosya:
+            pickle.dump(self.parca, dosya, protocol=pickle.HIGHEST_PROTOCOL)
+        self.parca_dosyalari.append(dosya_yolu)
+        bosalan = self.parca_bellek
+        self._yeni_parca()
+        return bosalan
+
+    def gecerli_satir_sayisi(self):
+        return self.satir_sayisi - len(self.silinenler)
+
+    def ham_parcalar(self):
+        for dosya_yolu in self.parca_dosyalari:
+            with open(dosya_yolu, 'rb') as dosya:
+                yield pickle.load(dosya)
+        if self.parca_satiri:
+            yield self.parca
+
+
+class KolonDeposu:
+    """Ayrıştırılan faturaları yıl başına sütunlu parçalar halinde tutan ara depo.
+
+    Kayıtlar her yıl için ``faturalar`` ve ``kalemler`` tablolarına eklenir.
+    Eklenen bir fatura, ``fatura_ekle``'nin döndürdüğü tutamakla ``cikar``
+    çağrılarak sonradan kaldırılabilir; satırlar silinmez, okurken atlanır.
+    Satıcı, alıcı, ürün ve para birimi sütunları sözlük kodlamasıyla saklanır.
+    Bellekteki parçaların tahmini boyutu ``bellek_siniri`` baytı aşınca tüm
+    açık parçalar ``dizin`` altına yazılır; okuyucular parçaları sırayla
+    DataFrame olarak alır, böylece işlenen yıl sayısından bağımsız olarak
+    bellek sınırlı kalır.
+    """
+
+    def __init__(self, dizin, bellek_siniri=256 * 1024 * 1024):
+        self.dizin = Path(dizin)
+        self.dizin.mkdir(exist_ok=True, parents=True)
+        self.bellek_siniri = bellek_siniri
+        self.bellek = 0
+        self.sozlukler = {}
+        for sutunlar in TABLOLAR.values():
+            for ad, tur in sutunlar:
+                if tur == 'kategori':
+                    self.sozlukler.setdefault(ad, Sozluk())
+        self._tablolar = {}  # {(yil, tablo_adi): _Tablo}
+        self._parca_sayaci = 0
+
+    def _tablo(self, yil, tablo_adi):
+        anahtar = (yil, tablo_adi)
+        tablo = self._tablolar.get(anahtar)
+        if tablo is None:
+            tablo = self._tablolar[anahtar] = _Tablo(TABLOLAR[tablo_adi])
+        return tablo
+
+    def fatura_ekle(self, yil, veri, kalemler):
+        """``kayit.Fatura`` ve ``kayit.Kalem`` kayıtlarını ekler.
+
+        ``cikar`` için ``(yil, fatura_satiri, ilk_kalem, kalem_sayisi)`` döndürür.
+        """
+        fatura_tablosu = self._tablo(yil, 'faturalar')
+        kalem_tablosu = self._tablo(yil, 'kalemler')
+        tutamak = (yil, fatura_tablosu.satir_sayisi, kalem_tablosu.satir_sayisi, len(kalemler))
+        self.bellek += fatura_tablosu.ekle(veri, self.sozlukler)
+        for kalem in kalemler:
+            self.bellek += kalem_tablosu.ekle(kalem, self.sozlukler)
+        if self.bellek > self.bellek_siniri:
+            self.diske_yaz()
+        return tutamak
+
+    def cikar(self, tutamak):
+        """``fatura_ekle`` ile eklenmiş bir faturayı ve kalemlerini kaldırır."""
+        yil, fatura_satiri, ilk_kalem, kalem_sayisi = tutamak
+        self._tablolar[(yil, 'faturalar')].silinenler.add(fatura_satiri)
+        self._tablolar[(yil, 'kalemler')].silinenler.update(range(ilk_kalem, ilk_kalem + kalem_sayisi))
+
+    def diske_yaz(self):
+        """Bellekteki tüm açık parçaları diske yazar."""
+        for (yil, tablo_adi), tablo in self._tablolar.items():
+            yil_dizini = self.dizin / str(yil)
+            yil_dizini.mkdir(exist_ok=True)
+            dosya_yolu = yil_dizini / f"{tablo_adi}_{self._parca_sayaci:06d}.parca"
+            self._parca_sayaci += 1
+            self.bellek -= tablo.diske_yaz(dosya_yolu)
+
+    def yil_gorunumu(self, yil):
+        """Yalnızca bir yılın tablolarını içeren salt okunur kopya.
+
+        Rapor işçi süreçlerine gönderilmek içindir: açık parçalar önce
+        ``diske_yaz`` ile yazılmışsa kopya yalnızca parça dosyalarının
+        yollarını, sözlükleri ve sütun istatistiklerini taşır. Kopya üzerinde
+        ``temizle`` çağrılmamalıdır; dizin asıl depoya aittir.
+        """
+        gorunum = KolonDeposu.__new__(KolonDeposu)
+        gorunum.__dict__.update(self.__dict__)
+        gorunum._tablolar = {anahtar: tablo for anahtar, tablo in self._tablolar.items() if anahtar[0] == yil}
+        return gorunum
+
+    def yillar(self):
+        return sorted({yil for yil, _ in self._tablolar})
+
+    def satir_sayisi(self, yil, tablo_adi):
+        tablo = self._tablolar.get((yil, tablo_adi))
+        return tablo.gecerli_satir_sayisi() if tablo else 0
+
+    def en_uzun_degerler(self, yil, tablo_adi):
+        """Sütun adı -> en uzun değer uzunluğu (başlık hariç)."""
+        tablo = self._tablolar.get((yil, tablo_adi))
+        if tablo is None:
+            return {ad: 0 for ad, _ in TABLOLAR[tablo_adi]}
+        return dict(tablo.en_uzun)
+
+    def parcalar(self, yil, tablo_adi, sutunlar=None):
+        """Bir yılın tablosunu ekleme sırasıyla DataFrame parçaları halinde üretir."""
+        import numpy as np
+        tablo = self._tablolar.get((yil, tablo_adi))
+        if tablo is None:
+            return
+        secilen = [(ad, tur) for ad, tur in tablo.sutunlar if sutunlar is None or ad in sutunlar]
+        silinenler = np.array(sorted(tablo.silinenler), dtype=np.int64)
+        ilk_satir = 0
+        for parca in tablo.ham_parcalar():
+            parca_satiri = len(parca[tablo.sutunlar[0][0]])
+            df = self._veri_cercevesi(parca, secilen)
+
+            # Bu parçaya düşen çıkarılmış satırlar atlanır
+            bas, son = np.searchsorted(silinenler, (ilk_satir, ilk_satir + parca_satiri))
+            if son > bas:
+                df = df.drop(index=silinenler[bas:son] - ilk_satir).reset_index(drop=True)
+            ilk_satir += parca_satiri
+            yield df
+
+    def _veri_cercevesi(self, parca, secilen):
+        import numpy as np
+        import pandas as pd
+        veri = {}
+        for ad, tur in secilen:
+            deger = parca[ad]
+            if tur == 'sayi':
+                veri[ad] = np.frombuffer(deger, dtype=np.float64).copy()
+            elif tur == 'kategori':
+                veri[ad] = pd.Categorical.from_codes(
+                    np.frombuffer(deger, dtype=np.int32).copy(),
+                    categories=self.sozlukler[ad].degerler
+                )
+            else:
+                veri[ad] = deger
+        return pd.DataFrame(veri, columns=[ad for ad, _ in secilen])
+
+    def sutun_guncelle(self, yil, tablo_adi, sutun, hesapla):
+        """Bir 'sayi' sütununu parça parça ``hesapla(df)``'nin sonucuyla değiştirir.
+
+        ``hesapla`` parçanın tüm sütunlarını (çıkarılmış satırlar dahil) alır
+        ve aynı uzunlukta bir dizi döndürür. Diske yazılmış parçalar yerinde
+        yeniden yazılır; bellek kullanımı değişmez.
+        """
+        import numpy as np
+        import pandas as pd
+        tablo = self._tablolar.get((yil, tablo_adi))
+        if tablo is None:
+            return
+
+        def guncelle(parca):
+            yeni = np.ascontiguousarray(hesapla(self._veri_cercevesi(parca, tablo.sutunlar)), dtype=np.float64)
+            parca[sutun] = array('d', yeni.tobytes())
+            if len(yeni):
+                tablo.en_uzun[sutun] = max(tablo.en_uzun[sutun], int(pd.Series(yeni).astype(str).str.len().max()))
+
+        for dosya_yolu in tablo.parca_dosyalari:
+            with open(dosya_yolu, 'rb') as dosya:
+                parca = pickle.load(dosya)
+            guncelle(parca)
+            with open(dosya_yolu, 'wb') as dosya:
+                pickle.dump(parca, dosya, protocol=pickle.HIGHEST_PROTOCOL)
+        if tablo.parca_satiri:
+            guncelle(tablo.parca)
+
+    def temizle(self):
+        """Diske yazılmış parçaları siler."""
+        self._tablolar.clear()
+        shutil.rmtree(self.dizin, ignore_errors=True)
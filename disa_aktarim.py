@@ -0,0 +1,409 @@
+"""Yıllık verilerin dışa aktarımı: Excel, CSV, Parquet ve SQLite.
+
+Her biçim aynı Faturalar ve Kalemler tablolarını ``KolonDeposu``'ndaki
+parçalardan akış halinde yazar; hiçbir biçim bir yılın tamamını belleğe
+almaz. Yazıcılar rapor işçi süreçlerinde çalışır, bu yüzden yalnızca depoya
+ve verilen argümanlara dayanır.
+
+pandas, openpyxl ve pyarrow yazıcıların içinde yüklenir: biçim listesi ve
+çıktı yolları için bu modülü içe aktaran arayüz ve komut satırı açılırken
+onları beklemez.
+"""
+import importlib.util
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+
+from depo import FATURA_SUTUNLARI, KALEM_SUTUNLARI, TABLOLAR
+from gunluk import gunlukcu
+from tekrar import CAKISMA_SUTUNLARI
+
+gunluk = gunlukcu(__name__)
+
+# Parquet çıktısı isteğe bağlıdır; pyarrow yalnızca kurulu mu diye bakılır
+PARQUET_DESTEKLI = importlib.util.find_spec('pyarrow') is not None
+
+# Tüm yılların satırlarını tutan ortak SQLite veritabanı
+SQLITE_DOSYASI = "faturalar.sqlite"
+
+# SQLite'ta indekslenen sütunlar: indeks adı -> sütunlar. Satıcı, alıcı ve
+# para birimi tarihle birlikte indekslenir; "X satıcısının 3. çeyrek
+# faturaları" gibi sorgular tek indeks aralığından okunur (bkz. sorgu)
+_SQLITE_INDEKSLERI = {
+    'faturalar': {
+        'tarih': ('Tarih',),
+        'satici_tarih': ('Satıcı', 'Tarih'),
+        'alici_tarih': ('Alıcı', 'Tarih'),
+        'para_birimi_tarih': ('Para Birimi', 'Tarih'),
+        'fatura_no': ('Fatura No',),
+        'siparis_no': ('Sipariş No',),
+    },
+    # Kalemler faturalara (Sipariş No, yil) ile bağlanır
+    'kalemler': {
+        'siparis_yil': ('Sipariş No', 'yil'),
+        'kdv_orani': ('KDV Oranı',),
+    },
+}
+
+
+def sutun_genislikleri(df):
+    """Her sütunun başlık ve değerlerinin en uzun metin uzunluğuna göre genişliği."""
+    genislikler = []
+    for sutun in df.columns:
+        en_uzun = len(str(sutun))
+        if len(df):
+            en_uzun = max(en_uzun, int(df[sutun].astype(str).str.len().max()))
+        genislikler.append(en_uzun + 2)
+    return genislikler
+
+
+def excel_sayfasi_yaz(kitap, sayfa_adi, basliklar, genislikler, parcalar,
+                      kopru_sutunu=None, ilk_kalem_satiri=None):
+    """DataFrame parçalarını yalnızca yazma kipindeki çalışma kitabına satır satır yazar.
+
+    ``ilk_kalem_satiri`` verilirse ``kopru_sutunu`` indeksli hücreler Kalemler
+    sayfasındaki ilgili satıra bağlanır.
+    """
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+    from openpyxl.utils import get_column_letter
+
+    sayfa = kitap.create_sheet(sayfa_adi)
+    
+    # Yalnızca yazma kipinde genişlikler ilk satırdan önce belirlenmeli
+    for indeks, genislik in enumerate(genislikler, start=1):
+        sayfa.column_dimensions[get_column_letter(indeks)].width = genislik
+    
+    # pandas'ın to_excel başlık biçimiyle aynı görünüm
+    yazi_tipi = Font(bold=True)
+    kenarlik = Border(*(Side(style='thin'),) * 4)
+    hizalama = Alignment(horizontal='center', vertical='top')
+    baslik = []
+    for sutun in basliklar:
+        hucre = WriteOnlyCell(sayfa, value=sutun)
+        hucre.font = yazi_tipi
+        hucre.border = kenarlik
+        hucre.alignment = hizalama
+        baslik.append(hucre)
+    sayfa.append(baslik)
+    
+    for df in parcalar:
+        # Boş değerler (NaN) Excel'e boş hücre olarak yazılmalı
+        bos_iceren = [sutun for sutun in df.columns if df[sutun].isna().any()]
+        if bos_iceren:
+            df = df.astype({sutun: object for sutun in bos_iceren})
+            for sutun in bos_iceren:
+                df[sutun] = df[sutun].where(df[sutun].notna(), None)
+        
+        satirlar = df.itertuples(index=False, name=None)
+        if ilk_kalem_satiri is None:
+            for satir in satirlar:
+                sayfa.append(satir)
+            continue
+        
+        for satir in satirlar:
+            siparis_no = satir[kopru_sutunu]
+            detay_idx = ilk_kalem_satiri.get(siparis_no) if siparis_no else None
+            if detay_idx:
+                satir = list(satir)
+                hucre = WriteOnlyCell(sayfa, value=siparis_no)
+                hucre.hyperlink = f"#Kalemler!A{detay_idx}"
+                hucre.style = "Hyperlink"
+                satir[kopru_sutunu] = hucre
+            sayfa.append(satir)
+
+
+def excel_raporu_yaz(depo, yil, excel_yolu, kopru_ekle=True, cakismalar=None, atlanan_tekrar=0):
+    """Bir yılın raporunu depodaki parçalardan yazar; fatura sayısını döndürür.
+
+    Rapor işçi süreçlerinde de çalışır; bu yüzden ``FaturaIsleyici``'ye değil
+    yalnızca depoya ve tekrar dizininden o yıla düşen bilgilere dayanır.
+    """
+    import pandas as pd
+    from openpyxl import Workbook
+
+    from analiz import YillikOzet
+
+    try:
+        fatura_sayisi = depo.satir_sayisi(yil, 'faturalar')
+        kalem_sayisi = depo.satir_sayisi(yil, 'kalemler')
+        
+        # Ana sayfada XML'den gelen TRY karşılığı 'Alıcı Toplam (TRY)' başlığıyla yazılır
+        fatura_basliklari = [
+            'Alıcı Toplam (TRY)' if ad == 'TRY Karşılığı' else ad for ad, _ in FATURA_SUTUNLARI
+        ]
+        kalem_basliklari = [ad for ad, _ in KALEM_SUTUNLARI]
+        
+        # Ana sayfadaki Sipariş No'dan Kalemler sayfasına link ekle
+        ilk_kalem_satiri = None
+        if kopru_ekle and kalem_sayisi:
+            # Her sipariş numarasının Kalemler sayfasındaki ilk satırı tek geçişte bulunur
+            ilk_kalem_satiri = {}
+            satir_no = 2
+            for parca in depo.parcalar(yil, 'kalemler', sutunlar=('Sipariş No',)):
+                for siparis_no in parca['Sipariş No']:
+                    ilk_kalem_satiri.setdefault(siparis_no, satir_no)
+                    satir_no += 1
+        
+        # TRY toplamı ve analiz sayfaları, sayfalar yazılırken parça parça hesaplanır
+        try_toplam = 0.0
+        analiz = YillikOzet()
+        
+        def fatura_parcalari():
+            nonlocal try_toplam
+            for parca in depo.parcalar(yil, 'faturalar'):
+                try_toplam += float(parca['TRY Karşılığı'].sum())
+                analiz.fatura_parcasi_ekle(parca)
+                yield parca
+        
+        def kalem_parcalari():
+            for parca in depo.parcalar(yil, 'kalemler'):
+                analiz.kalem_parcasi_ekle(parca)
+                yield parca
+        
+        # Yalnızca yazma kipinde satırlar doğrudan dosyaya akar, bellek sabit kalır
+        kitap = Workbook(write_only=True)
+        excel_sayfasi_yaz(
+            kitap, 'Faturalar', fatura_basliklari,
+            _depo_genislikleri(depo, yil, 'faturalar', fatura_basliklari),
+            fatura_parcalari(), kopru_sutunu=1, ilk_kalem_satiri=ilk_kalem_satiri
+        )
+        excel_sayfasi_yaz(
+            kitap, 'Kalemler', kalem_basliklari,
+            _depo_genislikleri(depo, yil, 'kalemler', kalem_basliklari),
+            kalem_parcalari()
+        )
+        
+        # Özet sayfası ekle
+        metrikler = ['Toplam Fatura Sayısı', 'TRY Cinsinden Toplam']
+        degerler = [fatura_sayisi, f"{try_toplam:,.2f} TL"]
+        if atlanan_tekrar:
+            metrikler.append('Atlanan Tekrar Fatura')
+            degerler.append(atlanan_tekrar)
+        df_ozet = pd.DataFrame({'Metrik': metrikler, 'Değer': degerler})
+        excel_sayfasi_yaz(kitap, 'Özet', list(df_ozet.columns), sutun_genislikleri(df_ozet), [df_ozet])
+        
+        # Aylık, satıcı, alıcı, para birimi ve KDV oranı kırılımları
+        for sayfa_adi, df_analiz in analiz.tablolar():
+            excel_sayfasi_yaz(
+                kitap, sayfa_adi, list(df_analiz.columns), sutun_genislikleri(df_analiz), [df_analiz]
+            )
+        
+        # Aynı UUID ya da Fatura No ile farklı içerikte gelen faturalar
+        if cakismalar:
+            df_cakisma = pd.DataFrame(cakismalar, columns=list(CAKISMA_SUTUNLARI))
+            excel_sayfasi_yaz(
+                kitap, 'Çakışmalar', list(df_cakisma.columns), sutun_genislikleri(df_cakisma), [df_cakisma]
+            )
+        kitap.save(excel_yolu)
+        
+        gunluk.info(
+            "Excel oluşturuldu: %s (%d fatura, %d kalem, %s TL)",
+            excel_yolu, fatura_sayisi, kalem_sayisi, f"{try_toplam:,.2f}"
+        )
+        return fatura_sayisi
+        
+    except Exception as e:
+        gunluk.error("Excel oluşturulurken hata: %s", e)
+        raise
+
+
+def _depo_genislikleri(depo, yil, tablo_adi, basliklar):
+    # Genişlikler depoya eklenirken tutulan en uzun değerlerden hesaplanır
+    en_uzun = depo.en_uzun_degerler(yil, tablo_adi)
+    return [
+        max(len(baslik), en_uzun[ad]) + 2
+        for baslik, (ad, _) in zip(basliklar, TABLOLAR[tablo_adi])
+    ]
+
+
+def excel_yaz(depo, yil, cikti_dizin, kopru_ekle=True, cakismalar=None, atlanan_tekrar=0, siniri=None):
+    """``siniri``'ndan fazla faturası olan yıllarda Excel yazılmaz, eskisi silinir."""
+    excel_yolu = cikti_yolu('xlsx', cikti_dizin, yil)
+    fatura_sayisi = depo.satir_sayisi(yil, 'faturalar')
+    if siniri is not None and fatura_sayisi > siniri:
+        gunluk.info("%s: %d fatura Excel sınırını (%d) aşıyor, Excel raporu atlandı", yil, fatura_sayisi, siniri)
+        excel_yolu.unlink(missing_ok=True)
+        return []
+    excel_raporu_yaz(depo, yil, excel_yolu, kopru_ekle, cakismalar, atlanan_tekrar)
+    return [excel_yolu]
+
+
+def csv_yaz(depo, yil, cikti_dizin):
+    """Faturalar ve Kalemler tablolarını parça parça ``csv/`` altındaki dosyalara akıtır."""
+    import pandas as pd
+
+    yollar = []
+    for tablo_adi, sutunlar in TABLOLAR.items():
+        yol = Path(cikti_dizin) / "csv" / f"{yil}_{tablo_adi}.csv"
+        yol.parent.mkdir(exist_ok=True, parents=True)
+        with open(yol, 'w', encoding='utf-8', newline='') as dosya:
+            baslik = True
+            for parca in depo.parcalar(yil, tablo_adi):
+                parca.to_csv(dosya, header=baslik, index=False)
+                baslik = False
+            if baslik:  # Tabloda satır yoksa yalnızca başlık yazılır
+                pd.DataFrame(columns=[ad for ad, _ in sutunlar]).to_csv(dosya, index=False)
+        yollar.append(yol)
+    return yollar
+
+
+def _arrow_semasi(pa, sutunlar):
+    # Boş ya da tamamı None olan parçalarda da türler sabit kalsın
+    return pa.schema([(ad, pa.float64() if tur == 'sayi' else pa.string()) for ad, tur in sutunlar])
+
+
+def parquet_yaz(depo, yil, cikti_dizin):
+    """Yılı ``parquet/<tablo>/yil=<yil>/`` altında Hive bölümlü veri setine yazar.
+
+    Faturalar ayrıca ``ay=<MM>`` bölümlerine ayrılır. Kalemler tarih
+    taşımadığından yalnızca yıla göre bölünür; faturalara Sipariş No ile
+    bağlanır. Her bölüm tek dosyadır ve parçalar ona sırayla eklenir.
+    """
+    if not PARQUET_DESTEKLI:
+        raise RuntimeError("Parquet çıktısı için pyarrow kurulu olmalı")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    yollar = []
+    for tablo_adi, sutunlar in TABLOLAR.items():
+        yil_dizini = Path(cikti_dizin) / "parquet" / tablo_adi / f"yil={yil}"
+        shutil.rmtree(yil_dizini, ignore_errors=True)
+        sema = _arrow_semasi(pa, sutunlar)
+        kategoriler = {ad: object for ad, tur in sutunlar if tur == 'kategori'}
+        yazicilar = {}  # bölüm dizini -> ParquetWriter
+        try:
+            for parca in depo.parcalar(yil, tablo_adi):
+                parca = parca.astype(kategoriler)
+                if tablo_adi == 'faturalar':
+                    bolumler = parca.groupby(parca['Tarih'].str[5:7], sort=True)
+                    bolumler = [(yil_dizini / f"ay={ay}", grup) for ay, grup in bolumler]
+                else:
+                    bolumler = [(yil_dizini, parca)]
+                for bolum, grup in bolumler:
+                    yazici = yazicilar.get(bolum)
+                    if yazici is None:
+                        bolum.mkdir(exist_ok=True, parents=True)
+                        yazici = yazicilar[bolum] = pq.ParquetWriter(bolum / "part-0.parquet", sema)
+                    yazici.write_table(pa.Table.from_pandas(grup, schema=sema, preserve_index=False))
+        finally:
+            for yazici in yazicilar.values():
+                yazici.close()
+        if yazicilar:
+            yollar.append(yil_dizini)
+    return yollar
+
+
+def _sqlite_semasi(baglanti):
+    for tablo_adi, sutunlar in TABLOLAR.items():
+        tanimlar = ", ".join(f'"{ad}" {"REAL" if tur == "sayi" else "TEXT"}' for ad, tur in sutunlar)
+        baglanti.execute(f"CREATE TABLE IF NOT EXISTS {tablo_adi} (yil INTEGER NOT NULL, {tanimlar})")
+        baglanti.execute(f"CREATE INDEX IF NOT EXISTS {tablo_adi}_yil ON {tablo_adi} (yil)")
+        for indeks_adi, indeks_sutunlari in _SQLITE_INDEKSLERI[tablo_adi].items():
+            tanim = ", ".join(f'"{sutun}"' for sutun in indeks_sutunlari)
+            baglanti.execute(f'CREATE INDEX IF NOT EXISTS {tablo_adi}_{indeks_adi} ON {tablo_adi} ({tanim})')
+
+
+def sqlite_yaz(depo, yil, cikti_dizin):
+    """Yılın satırlarını ortak SQLite veritabanında tek işlemde yenileriyle değiştirir.
+
+    Tablolar ``yil`` sütunu ve depodaki sütun adlarıyla oluşturulur; tarih,
+    satıcı, alıcı, para birimi, fatura ve sipariş numarası indekslidir.
+    Veritabanı ``sorgu.FaturaSorgusu`` ile sorgulanabilir.
+    """
+    yol = cikti_yolu('sqlite', cikti_dizin, yil)
+    # Yıllar paralel yazılırken süreçler yazma kilidini sırayla alır
+    baglanti = sqlite3.connect(yol, timeout=600)
+    try:
+        baglanti.execute("PRAGMA journal_mode=WAL")
+        _sqlite_semasi(baglanti)
+        with baglanti:
+            for tablo_adi, sutunlar in TABLOLAR.items():
+                baglanti.execute(f"DELETE FROM {tablo_adi} WHERE yil = ?", (yil,))
+                komut = f"INSERT INTO {tablo_adi} VALUES (?, {', '.join('?' * len(sutunlar))})"
+                for parca in depo.parcalar(yil, tablo_adi):
+                    parca = parca.astype(object).where(parca.notna(), None)
+                    baglanti.executemany(komut, ((yil, *satir) for satir in parca.itertuples(index=False, name=None)))
+        # Sorgu planlayıcısı için indeks istatistikleri; örneklemeyle sınırlı
+        # olduğundan veritabanı büyüdükçe yavaşlamaz
+        baglanti.execute("PRAGMA analysis_limit=1000")
+        baglanti.execute("ANALYZE")
+    finally:
+        baglanti.close()
+    return [yol]
+
+
+# Biçim -> yazıcı; her yazıcı ``(depo, yil, cikti_dizin, ...)`` alıp yazdığı yolları döndürür
+DISA_AKTARICILAR = {
+    'xlsx': excel_yaz,
+    'csv': csv_yaz,
+    'parquet': parquet_yaz,
+    'sqlite': sqlite_yaz,
+}
+CIKTI_FORMATLARI = tuple(DISA_AKTARICILAR)
+
+
+def cikti_yolu(bicim, cikti_dizin, yil):
+    """Bir yılın o biçimdeki ana çıktısı (dosya, veri seti dizini ya da veritabanı)."""
+    cikti_dizin = Path(cikti_dizin)
+    if bicim == 'xlsx':
+        return cikti_dizin / f"{yil}_rapor.xlsx"
+    if bicim == 'csv':
+        return cikti_dizin / "csv" / f"{yil}_faturalar.csv"
+    if bicim == 'parquet':
+        return cikti_dizin / "parquet" / "faturalar" / f"yil={yil}"
+    if bicim == 'sqlite':
+        return cikti_dizin / SQLITE_DOSYASI
+    raise ValueError(f"Bilinmeyen çıktı formatı: {bicim}")
+
+
+def cikti_var_mi(bicim, cikti_dizin, yil):
+    yol = cikti_yolu(bicim, cikti_dizin, yil)
+    if bicim == 'csv':
+        return all((yol.parent / f"{yil}_{tablo_adi}.csv").exists() for tablo_adi in TABLOLAR)
+    if bicim != 'sqlite' or not yol.exists():
+        return yol.exists()
+    baglanti = sqlite3.connect(yol)
+    try:
+        return baglanti.execute("SELECT 1 FROM faturalar WHERE yil = ? LIMIT 1", (yil,)).fetchone() is not None
+    except sqlite3.OperationalError:  # Tablo henüz yok
+        return False
+    finally:
+        baglanti.close()
+
+
+def ciktilari_sil(cikti_dizin, yil):
+    """Bir yılın tüm biçimlerdeki çıktılarını kaldırır (yılın hiç faturası kalmadığında)."""
+    cikti_dizin = Path(cikti_dizin)
+    cikti_yolu('xlsx', cikti_dizin, yil).unlink(missing_ok=True)
+    for tablo_adi in TABLOLAR:
+        (cikti_dizin / "csv" / f"{yil}_{tablo_adi}.csv").unlink(missing_ok=True)
+        shutil.rmtree(cikti_dizin / "parquet" / tablo_adi / f"yil={yil}", ignore_errors=True)
+    yol = cikti_yolu('sqlite', cikti_dizin, yil)
+    if yol.exists():
+        baglanti = sqlite3.connect(yol, timeout=600)
+        try:
+            with baglanti:
+                for tablo_adi in TABLOLAR:
+                    baglanti.execute(f"DELETE FROM {tablo_adi} WHERE yil = ?", (yil,))
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            baglanti.close()
+
+
+def rapor_isle(depo, yil, cikti_dizin, formatlar=('xlsx',), excel_ayarlari=None):
+    """Rapor işçisi giriş noktası: yılı istenen biçimlerde yazar.
+
+    ``(fatura_sayisi, {bicim: sure}, yazilan_yollar)`` döndürür.
+    ``excel_ayarlari`` yalnızca Excel yazıcısına geçirilir.
+    """
+    sureler = {}
+    yollar = []
+    for bicim in formatlar:
+        baslangic = time.perf_counter()
+        ayarlar = (excel_ayarlari or {}) if bicim == 'xlsx' else {}
+        yollar.extend(DISA_AKTARICILAR[bicim](depo, yil, cikti_dizin, **ayarlar))
+        sureler[bicim] = time.perf_counter() - baslangic
+    return depo.satir_sayisi(yil, 'faturalar'), sureler, yollar
@@ -1,208 +1,944 @@
 import os
+import io
+import sys
+import json
+import hashlib
 import zipfile
 import xml.etree.ElementTree as ET
-import pandas as pd
 from pathlib import Path
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import asyncio
-import aiofiles
 from datetime import datetime
-import sys
 import shutil  # Temp klasörünü silmek için ekleyelim
+import time
+import tempfile
+import threading
+from gunluk import HataDefteri, gunlukcu, hata_kaydi
+from onbellek import ArsivOnbellegi, bayt_ozeti, dosya_ozeti
+from olcum import CalismaOlcumu, Profilleyici, rapor_yaz
+from tekrar import TekrarDizini
+from parca import PARCA_AYARI, PARCA_HATALARI_AYARI, PARCA_YOLLARI_AYARI, arsivleri_sirala, eksik_parcalar
+from depo import KolonDeposu
+from kayit import Fatura, Kalem, kayitlari_coz
+from disa_aktarim import (
+    CIKTI_FORMATLARI, PARQUET_DESTEKLI, cikti_var_mi, cikti_yolu, ciktilari_sil, excel_raporu_yaz, rapor_isle
+)
+
+gunluk = gunlukcu(__name__)
+
+# UBL-TR namespace'leri
+CAC = '{urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2}'
+CBC = '{urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2}'
+
+# Sık kullanılan etiketler, her faturada yeniden çözülmemeleri için önceden hazırlanır
+_ID = CBC + 'ID'
+_UUID = CBC + 'UUID'
+_ISSUE_DATE = CBC + 'IssueDate'
+_ORDER_REFERENCE = CAC + 'OrderReference'
+_SUPPLIER_PARTY = CAC + 'AccountingSupplierParty'
+_CUSTOMER_PARTY = CAC + 'AccountingCustomerParty'
+_TARAF_ADI = (CAC + 'Party', CAC + 'PartyName', CBC + 'Name')
+_PRICING_EXCHANGE_RATE = CAC + 'PricingExchangeRate'
+_PAYMENT_ALTERNATIVE_EXCHANGE_RATE = CAC + 'PaymentAlternativeExchangeRate'
+_CALCULATION_RATE = CBC + 'CalculationRate'
+_LEGAL_MONETARY_TOTAL = CAC + 'LegalMonetaryTotal'
+_TAX_INCLUSIVE_AMOUNT = CBC + 'TaxInclusiveAmount'
+_INVOICE_LINE = CAC + 'InvoiceLine'
+_INVOICED_QUANTITY = CBC + 'InvoicedQuantity'
+_LINE_EXTENSION_AMOUNT = CBC + 'LineExtensionAmount'
+_TAX_TOTAL = CAC + 'TaxTotal'
+_TAX_AMOUNT = CBC + 'TaxAmount'
+_PERCENT = CBC + 'Percent'
+_ITEM = CAC + 'Item'
+_NAME = CBC + 'Name'
+_PRICE = CAC + 'Price'
+_PRICE_AMOUNT = CBC + 'PriceAmount'
+
+try:
+    # lxml kuruluysa daha hızlı olan onu kullan; yoksa standart kütüphane yeterli
+    from lxml import etree as _lxml_etree
+    _LXML_AYRISTIRICI = _lxml_etree.XMLParser(resolve_entities=False, huge_tree=True)
+except ImportError:
+    _lxml_etree = None
+
+
+def _xml_kok(xml_dosyasi):
+    if _lxml_etree is not None:
+        if isinstance(xml_dosyasi, Path):
+            xml_dosyasi = str(xml_dosyasi)
+        return _lxml_etree.parse(xml_dosyasi, _LXML_AYRISTIRICI).getroot()
+    return ET.parse(xml_dosyasi).getroot()
+
+
+def _bul(element, yol):
+    # Yalnızca doğrudan çocuklara bakan find çağrılarını zincirle
+    for etiket in yol:
+        element = element.find(etiket)
+        if element is None:
+            return None
+    return element
+
+
+def _metin(element, yol, varsayilan=None):
+    bulunan = _bul(element, yol)
+    return bulunan.text if bulunan is not None else varsayilan
+
+
+class AlanHatasi(ValueError):
+    """Faturanın bir alanı eksik ya da okunamıyor; ``alan`` hata defterine yazılır."""
+
+    def __init__(self, alan, mesaj):
+        super().__init__(mesaj)
+        self.alan = alan
+
+
+def _sayi(alan, metin):
+    try:
+        return float(metin)
+    except (TypeError, ValueError):
+        raise AlanHatasi(alan, f"'{alan}' alanı sayı değil: {metin!r}") from None
+
+
+def _kalem_oku(kalem, siparis_no):
+    """Bir InvoiceLine elemanını çocukları üzerinde tek geçişte okur."""
+    kalem_no = urun = miktar = birim_fiyat = kdv_tutari = tutar = None
+    kdv_orani = 0
+    para_birimi = 'TRY'
+    for cocuk in kalem:
+        etiket = cocuk.tag
+        if etiket == _ID:
+            kalem_no = cocuk.text
+        elif etiket == _INVOICED_QUANTITY:
+            miktar = cocuk.text
+        elif etiket == _LINE_EXTENSION_AMOUNT:
+            tutar = cocuk.text
+            para_birimi = cocuk.get('currencyID', 'TRY')
+        elif etiket == _TAX_TOTAL:
+            kdv_tutari = _metin(cocuk, (_TAX_AMOUNT,))
+            # Oran TaxSubtotal ya da TaxCategory altında olabilir
+            for oran in cocuk.iter(_PERCENT):
+                kdv_orani = oran.text
+                break
+        elif etiket == _ITEM:
+            urun = _metin(cocuk, (_NAME,))
+        elif etiket == _PRICE:
+            birim_fiyat = _metin(cocuk, (_PRICE_AMOUNT,))
+    
+    for alan, deger in (('Kalem No', kalem_no), ('Ürün/Hizmet', urun), ('Miktar', miktar),
+                        ('Birim Fiyat', birim_fiyat), ('KDV Tutarı', kdv_tutari), ('Toplam Tutar', tutar)):
+        if deger is None:
+            raise AlanHatasi(alan, f"Kalem '{alan}' alanı bulunamadı")
+    try:
+        return Kalem(
+            siparis_no, kalem_no, sys.intern(urun), float(miktar), float(birim_fiyat), float(kdv_orani),
+            float(kdv_tutari), float(tutar), sys.intern(para_birimi)
+        )
+    except ValueError:
+        # Hangi alanın okunamadığı yalnızca hata durumunda aranır
+        for alan, deger in (('Miktar', miktar), ('Birim Fiyat', birim_fiyat), ('KDV Oranı', kdv_orani),
+                            ('KDV Tutarı', kdv_tutari), ('Toplam Tutar', tutar)):
+            _sayi(alan, deger)
+        raise
+
+
+def zip_xmlleri(kaynak, on_ek='', hatalar=None):
+    """Zip arşivindeki XML'leri (iç içe zip'ler dahil) diske çıkarmadan üretir.
+
+    Her eleman ``(uye_adi, xml_baytlari)`` ikilisidir. İç zip'ler bellekte
+    açılır; ``uye_adi`` iç zip yolunu da içerir (örn. ``ic.zip/fatura.xml``).
+    Açılamayan iç zip'ler atlanır; ``hatalar`` listesi verilirse
+    ``(uye_adi, istisna)`` olarak ona eklenir, verilmezse günlüğe yazılır.
+    """
+    with zipfile.ZipFile(kaynak, 'r') as zip_ref:
+        for bilgi in zip_ref.infolist():
+            if bilgi.is_dir():
+                continue
+            isim = bilgi.filename
+            if isim.lower().endswith('.zip'):
+                try:
+                    ic_zip = io.BytesIO(zip_ref.read(bilgi))
+                    yield from zip_xmlleri(ic_zip, f"{on_ek}{isim}/", hatalar)
+                except zipfile.BadZipFile as e:
+                    if hatalar is None:
+                        gunluk.warning("İç zip açılırken hata: %s - %s", f"{on_ek}{isim}", e)
+                    else:
+                        hatalar.append((f"{on_ek}{isim}", e))
+            elif isim.endswith('.xml'):
+                yield f"{on_ek}{isim}", zip_ref.read(bilgi)
+
+
+def xml_ayristir(xml_yolu, kaynak_adi=None):
+    """Tek bir UBL-TR faturasını okuyup ``(Fatura, [Kalem, ...])`` döndürür.
+
+    ``xml_yolu`` bir dosya yolu, XML baytları ya da okunabilir bir akış
+    olabilir. Okunamayan fatura günlüğe yazılır ve None döner.
+    """
+    kaynak_adi = kaynak_adi or xml_yolu
+    try:
+        if isinstance(xml_yolu, (bytes, bytearray)):
+            xml_dosyasi = io.BytesIO(xml_yolu)
+        elif isinstance(xml_yolu, Path):
+            # Eğer dizin ise atla
+            if xml_yolu.is_dir():
+                return None
+
+            # XML dosyasını bul - iç zip'teki .xml dosyasını bellekte oku
+            xml_dosyasi = None
+            if xml_yolu.suffix == '.zip':
+                for _, xml_baytlari in zip_xmlleri(xml_yolu):
+                    xml_dosyasi = io.BytesIO(xml_baytlari)
+                    break
+            elif xml_yolu.exists():
+                xml_dosyasi = xml_yolu
+
+            if xml_dosyasi is None:
+                gunluk.warning("XML dosyası bulunamadı: %s", xml_yolu)
+                return None
+        else:
+            xml_dosyasi = xml_yolu
+        return fatura_oku(xml_dosyasi)
+    except Exception as e:
+        gunluk.warning("%s okunurken hata oluştu - %s", kaynak_adi, e)
+        return None
+
+
+def fatura_oku(xml_dosyasi):
+    """``xml_ayristir``'ın çekirdeği; okunamayan faturada istisna fırlatır.
+
+    Eksik ya da sayıya çevrilemeyen alanlar ``AlanHatasi`` olarak bildirilir.
+    """
+    root = _xml_kok(xml_dosyasi)
+    
+    # Kök elemanın çocukları tek geçişte dolaşılır; başlık alanları kökten
+    # başlayan sabit yollarla okunur, .// araması yapılmaz
+    siparis_tarihi = siparis_no = ''
+    fatura_no = tarih = satici = alici = toplam = uuid = None
+    para_birimi = 'TRY'
+    kur = None
+    alternatif_kur = None
+    kalem_elemanlari = []
+    
+    for cocuk in root:
+        etiket = cocuk.tag
+        if etiket == _INVOICE_LINE:
+            kalem_elemanlari.append(cocuk)
+        elif etiket == _ID:
+            fatura_no = cocuk.text
+        elif etiket == _ISSUE_DATE:
+            tarih = cocuk.text
+        elif etiket == _UUID:
+            uuid = cocuk.text
+        elif etiket == _ORDER_REFERENCE:
+            siparis_tarihi = _metin(cocuk, (_ISSUE_DATE,), '')
+            siparis_no = _metin(cocuk, (_ID,), '')
+        elif etiket == _SUPPLIER_PARTY:
+            satici = _metin(cocuk, _TARAF_ADI)
+        elif etiket == _CUSTOMER_PARTY:
+            alici = _metin(cocuk, _TARAF_ADI)
+        elif etiket == _PRICING_EXCHANGE_RATE:
+            kur = _metin(cocuk, (_CALCULATION_RATE,))
+        elif etiket == _PAYMENT_ALTERNATIVE_EXCHANGE_RATE:
+            alternatif_kur = _metin(cocuk, (_CALCULATION_RATE,))
+        elif etiket == _LEGAL_MONETARY_TOTAL:
+            toplam_elementi = cocuk.find(_TAX_INCLUSIVE_AMOUNT)
+            if toplam_elementi is not None:
+                toplam = _sayi('Toplam', toplam_elementi.text)
+                para_birimi = toplam_elementi.get('currencyID', 'TRY')
+    
+    for alan, deger in (('Fatura No', fatura_no), ('Tarih', tarih), ('Satıcı', satici),
+                        ('Alıcı', alici), ('Toplam', toplam)):
+        if deger is None:
+            raise AlanHatasi(alan, f"'{alan}' alanı bulunamadı")
+    
+    # Döviz kuru bilgisini al
+    kur = kur or alternatif_kur
+    if kur:
+        try_karsiligi = toplam * _sayi('Kur', kur)
+    else:
+        try_karsiligi = toplam if para_birimi == 'TRY' else 0
+    
+    veri = Fatura(
+        siparis_tarihi, siparis_no, fatura_no, tarih, sys.intern(satici), sys.intern(alici),
+        toplam, sys.intern(para_birimi), try_karsiligi, uuid
+    )
+    # Kalemler sipariş numarası bilindikten sonra okunur
+    kalemler = [_kalem_oku(kalem, siparis_no) for kalem in kalem_elemanlari]
+    return veri, kalemler
+
+
+def dosyalari_bul(dizin, uzanti):
+    """``dizin`` altındaki ``uzanti`` ile biten dosyaları tembel olarak üretir.
+
+    Ağaç ``os.scandir`` ile derinlik öncelikli gezilir ve her dizin kendi
+    içinde ada göre sıralanır; sıra ``sorted(dizin.glob("**/*" + uzanti))``
+    ile aynıdır, ama ilk dosya tüm ağaç taranmadan gelir. Okunamayan
+    dizinler glob'daki gibi atlanır.
+
+    glob'dan farklı olarak sembolik bağlantılı dizinlerin içine de girilir
+    (ör. başka diskteki yıl klasörleri). Her gerçek dizin ``(st_dev,
+    st_ino)`` ile bir kez gezilir; döngü oluşturan ya da ağacın içini
+    gösteren bağlantılar sonsuz taramaya ya da aynı arşivin iki kez
+    bulunmasına yol açmaz, dizin ilk görüldüğü yoldan listelenir.
+    """
+    gezilenler = set()
+
+    def gez(dizin):
+        try:
+            durum = os.stat(dizin)
+            if (durum.st_dev, durum.st_ino) in gezilenler:
+                return
+            gezilenler.add((durum.st_dev, durum.st_ino))
+            with os.scandir(dizin) as girdiler:
+                girdiler = sorted(girdiler, key=lambda girdi: girdi.name)
+        except OSError:
+            return
+        for girdi in girdiler:
+            try:
+                if girdi.is_dir():
+                    yield from gez(girdi.path)
+                elif girdi.name.endswith(uzanti):
+                    yield Path(girdi.path)
+            except OSError:
+                continue  # Tarama sırasında silinmiş
+
+    yield from gez(dizin)
+
+
+def zip_cikar(zip_yolu, temp_dizin, kaynak=None, hatalar=None):
+    """Yedek yol: arşivi ve iç zip'lerini ``temp_dizin`` altına çıkarır.
+
+    Her çağrı ``temp_dizin`` altında yeni bir dizin açar ve onu döndürür;
+    farklı klasörlerdeki aynı adlı arşivler paralel çıkarılırken çakışmaz.
+    Dizini silmek çağırana kalır (bkz. ``cikarilan_xmller``).
+
+    ``kaynak`` verilirse arşiv dosyadan değil ondan (ör. ``io.BytesIO``) okunur.
+    Dış arşiv açılamazsa dizin silinir ve istisna yükselir. Açılamayan iç
+    zip'ler atlanır; ``zip_xmlleri``'deki gibi ``hatalar`` listesine
+    ``(uye_adi, istisna)`` olarak eklenir, liste verilmezse günlüğe yazılır.
+    """
+    Path(temp_dizin).mkdir(parents=True, exist_ok=True)
+    hedef_dizin = Path(tempfile.mkdtemp(prefix=f"{zip_yolu.stem}_", dir=temp_dizin))
+    gunluk.debug("Zip hedef dizin: %s", hedef_dizin)
+
+    try:
+        with zipfile.ZipFile(zip_yolu if kaynak is None else kaynak, 'r') as zip_ref:
+            icerdeki_dosyalar = zip_ref.namelist()
+            gunluk.debug("%s: %d üye", zip_yolu, len(icerdeki_dosyalar))
+
+            # Ana zip'i aç
+            zip_ref.extractall(hedef_dizin)
+
+            # İç zip dosyalarını bul ve aç
+            for dosya in icerdeki_dosyalar:
+                if dosya.lower().endswith('.zip'):
+                    ic_zip_yolu = hedef_dizin / dosya
+                    try:
+                        with zipfile.ZipFile(ic_zip_yolu, 'r') as ic_zip:
+                            ic_zip.extractall(hedef_dizin / ic_zip_yolu.stem)
+                            gunluk.debug("İç zip açıldı: %s", ic_zip_yolu)
+                    except (zipfile.BadZipFile, OSError) as e:
+                        if hatalar is None:
+                            gunluk.warning("İç zip açılırken hata: %s - %s", ic_zip_yolu, e)
+                        else:
+                            hatalar.append((dosya, e))
+    except BaseException:
+        shutil.rmtree(hedef_dizin, ignore_errors=True)
+        raise
+
+    return hedef_dizin
+
+
+def cikarilan_xmller(hedef_dizin):
+    """``zip_cikar``'ın çıkardığı XML'leri ``(uye_adi, xml_baytlari)`` olarak üretir.
+
+    Dizin, XML'ler bitince ya da üreteç kapatılınca silinir.
+    """
+    try:
+        for xml_yolu in dosyalari_bul(hedef_dizin, ".xml"):
+            yield xml_yolu.relative_to(hedef_dizin).as_posix(), xml_yolu.read_bytes()
+    finally:
+        shutil.rmtree(hedef_dizin, ignore_errors=True)
+
+
+# Bundan büyük arşivler bir kerede okunmaz; işçi onları dosyadan parça
+# parça okur
+ONCEDEN_OKUMA_SINIRI = 16 * 1024 * 1024
+# Önceden okunup ayrıştırılmayı bekleyen arşivlerin toplam bayt sınırı
+ONCEDEN_OKUMA_BUTCESI = 64 * 1024 * 1024
+# İşçiler sürelerinin bu kadarını arşiv okumayla geçiriyorsa girdi yavaş
+# sayılır ve arşivler işçilerden önce okunmaya başlanır
+YAVAS_OKUMA_ORANI = 0.2
+
+
+def arsiv_oku(zip_yolu, sinir=None):
+    """Arşivin tüm baytlarını okur; G/Ç iş parçacıklarında çalışır.
+
+    Arşiv ``sinir``'dan büyükse okumaz ve None döndürür; işçi onu
+    dosyadan parça parça okur.
+    """
+    with open(zip_yolu, 'rb') as dosya:
+        if sinir is not None and os.fstat(dosya.fileno()).st_size > sinir:
+            return None
+        return dosya.read()
+
+
+class OncedenOkuma:
+    """Arşivlerin işçilerden önce okunup okunmayacağını belirler.
+
+    Yerel diskte arşivi işçinin kendisinin okuması daha ucuzdur; önceden
+    okunan baytlar işçiye bir kez daha kopyalanır. ``acik`` değilse
+    işçilerin bildirdiği okuma süreleri izlenir ve okuma yavaşsa (bkz.
+    ``YAVAS_OKUMA_ORANI``) önceden okumaya geçilir. Okunup ayrıştırılmayı
+    bekleyen baytların toplamı ``butce`` ile sınırlıdır.
+    """
+
+    # Karar vermeden önce işçinin okuduğu en az arşiv sayısı
+    ORNEK_SAYISI = 2
+
+    def __init__(self, acik=False, butce=ONCEDEN_OKUMA_BUTCESI):
+        self.acik = acik
+        self.butce = butce
+        self.kullanilan = 0
+        self._bosaldi = asyncio.Event()
+        self._okuma_suresi = 0.0
+        self._isci_suresi = 0.0
+        self._ornek = 0
+
+    def isci_olcumu_ekle(self, arsiv_olcumu):
+        """İşçinin arşivi kendisi okuduğu bir ayrıştırmanın ölçümünü işler."""
+        if self.acik:
+            return
+        self._okuma_suresi += arsiv_olcumu['okuma_suresi']
+        self._isci_suresi += arsiv_olcumu['okuma_suresi'] + arsiv_olcumu['sure']
+        self._ornek += 1
+        if self._ornek >= self.ORNEK_SAYISI and self._okuma_suresi > YAVAS_OKUMA_ORANI * self._isci_suresi:
+            self.acik = True
+            gunluk.info(
+                "Arşiv okuma yavaş (işçi süresinin %%%d'i); arşivler önceden okunacak",
+                100 * self._okuma_suresi / self._isci_suresi
+            )
+
+    async def ayir(self, boyut):
+        """Bütçede ``boyut`` bayt yer açılana kadar bekler."""
+        while self.kullanilan and self.kullanilan + boyut > self.butce:
+            self._bosaldi.clear()
+            await self._bosaldi.wait()
+        self.kullanilan += boyut
+
+    def birak(self, boyut):
+        self.kullanilan -= boyut
+        self._bosaldi.set()
+
+
+def arsiv_xmlleri(zip_yolu):
+    """Bir arşivdeki XML'leri ``(kaynak_adi, xml_baytlari)`` olarak üretir."""
+    for uye_adi, xml_baytlari in zip_xmlleri(zip_yolu):
+        yield f"{zip_yolu.name}:{uye_adi}", xml_baytlari
+
+
+def karantinaya_al(karantina_dizini, zip_yolu, uye_adi, xml_baytlari):
+    """Okunamayan XML'i ``<karantina>/<arşiv adı>/<üye yolu>`` altına kopyalar.
+
+    Yazılan dosyanın yolunu döndürür; yazılamazsa None.
+    """
+    # Üye adı arşivden gelir; dizin dışına çıkan parçalar atılır
+    parcalar = [parca for parca in uye_adi.replace('\\', '/').split('/') if parca not in ('', '.', '..')]
+    hedef = Path(karantina_dizini, Path(zip_yolu).name, *parcalar)
+    try:
+        hedef.parent.mkdir(parents=True, exist_ok=True)
+        hedef.write_bytes(xml_baytlari)
+    except OSError as e:
+        gunluk.warning("Karantinaya yazılamadı: %s - %s", hedef, e)
+        return None
+    return hedef
+
+
+def zip_isle(zip_yolu, temp_dizin=None, olcum=None, hatalar=None, karantina_dizini=None, arsiv_baytlari=None):
+    """Bir arşivdeki tüm faturaları ayrıştırır; işçi süreçlerde çalışır.
+
+    Arşiv içindeki sırayla ``[(Fatura, [Kalem, ...]), ...]`` döndürür. ``temp_dizin``
+    verilirse arşiv önce diske çıkarılır (yedek yol). ``olcum`` sözlüğü
+    verilirse açma/ayrıştırma süreleri ve açılan bayt miktarı ona eklenir.
+    ``arsiv_baytlari`` verilirse arşiv diskten okunmaz, bellekte açılır.
+    
+    Her faturaya kaynağı ve XML içeriğinin özeti eklenir. Arşiv içinde bayt
+    bayt aynı olan XML'ler yeniden ayrıştırılmaz, önceki sonuç kullanılır.
+    
+    Okunamayan XML'ler ve iç zip'ler ``hatalar`` listesine hata defteri
+    kaydı olarak eklenir (bkz. ``gunluk.hata_kaydi``); ``karantina_dizini``
+    verilirse okunamayan XML'ler oraya kopyalanır.
+    """
+    baslangic = time.perf_counter()
+    if olcum is None:
+        olcum = {}
+    if hatalar is None:
+        hatalar = []
+    olcum.update(sure=0.0, arsiv_bayt=0, acilan_bayt=0, xml_sayisi=0, ayni_xml=0,
+                 acma_suresi=0.0, ayristirma_suresi=0.0)
+    if arsiv_baytlari is not None:
+        olcum['arsiv_bayt'] = len(arsiv_baytlari)
+        kaynak = io.BytesIO(arsiv_baytlari)
+    else:
+        kaynak = zip_yolu
+        try:
+            olcum['arsiv_bayt'] = os.path.getsize(zip_yolu)
+        except OSError:
+            pass
+    arsiv_adi = Path(zip_yolu).name
+    
+    ic_zip_hatalari = []
+    if temp_dizin is not None:
+        # Dış arşiv açılamazsa istisna arşiv hatası olarak ana sürece döner
+        # ve arşiv önbelleğe yazılmaz
+        hedef_dizin = zip_cikar(
+            zip_yolu, temp_dizin, None if kaynak is zip_yolu else kaynak, ic_zip_hatalari
+        )
+        olcum['acma_suresi'] = time.perf_counter() - baslangic
+        xml_kaynaklari = cikarilan_xmller(hedef_dizin)
+    else:
+        xml_kaynaklari = zip_xmlleri(kaynak, hatalar=ic_zip_hatalari)
+    
+    faturalar = []
+    gorulen_ozetler = {}  # içerik özeti -> ayrıştırma sonucu ya da hata
+    while True:
+        # Bellekte açmada süre iç zip'lerin okunmasında, ayrıştırmada fatura_oku'da geçer
+        an = time.perf_counter()
+        kaynak = next(xml_kaynaklari, None)
+        olcum['acma_suresi'] += time.perf_counter() - an
+        if kaynak is None:
+            break
+        uye_adi, xml_baytlari = kaynak
+        olcum['xml_sayisi'] += 1
+        olcum['acilan_bayt'] += len(xml_baytlari)
+        
+        an = time.perf_counter()
+        ozet = hashlib.blake2b(xml_baytlari, digest_size=16).hexdigest()
+        if ozet in gorulen_ozetler:
+            olcum['ayni_xml'] += 1
+            sonuc = gorulen_ozetler[ozet]
+        else:
+            try:
+                sonuc = fatura_oku(io.BytesIO(xml_baytlari))
+            except Exception as e:
+                sonuc = e
+            gorulen_ozetler[ozet] = sonuc
+        olcum['ayristirma_suresi'] += time.perf_counter() - an
+        if isinstance(sonuc, Exception):
+            karantina = None
+            if karantina_dizini is not None:
+                karantina = karantinaya_al(karantina_dizini, zip_yolu, uye_adi, xml_baytlari)
+            hatalar.append(hata_kaydi(zip_yolu, uye_adi, sonuc, karantina))
+            continue
+        veri, kalemler = sonuc
+        # Kayıtlar değişmez; aynı XML'in kopyaları kalem listesini paylaşır
+        faturalar.append((veri._replace(kaynak=f"{arsiv_adi}:{uye_adi}", icerik_ozeti=ozet), kalemler))
+    for uye_adi, hata in ic_zip_hatalari:
+        hatalar.append(hata_kaydi(zip_yolu, uye_adi, hata))
+    olcum['sure'] = time.perf_counter() - baslangic
+    return faturalar
+
+
+def arsiv_isle(zip_yolu, temp_dizin=None, ozet_hesapla=False, karantina_dizini=None, arsiv_baytlari=None):
+    """İşçi giriş noktası: ``(icerik_ozeti, faturalar, olcum, hatalar)`` döndürür.
+
+    ``arsiv_baytlari`` ana süreçte önceden okunmuş arşiv içeriğidir; yoksa
+    arşiv dosyadan okunur.
+    """
+    olcum = {}
+    hatalar = []
+    okuma_suresi = 0.0
+    if arsiv_baytlari is None:
+        # Özet ve açma aynı baytları kullanır; okuma süresi ana sürecin
+        # önceden okumaya geçip geçmeyeceğine karar vermesi içindir
+        an = time.perf_counter()
+        arsiv_baytlari = arsiv_oku(zip_yolu, ONCEDEN_OKUMA_SINIRI)
+        okuma_suresi = time.perf_counter() - an
+    ozet = None
+    if ozet_hesapla:
+        ozet = dosya_ozeti(zip_yolu) if arsiv_baytlari is None else bayt_ozeti(arsiv_baytlari)
+    faturalar = zip_isle(zip_yolu, temp_dizin, olcum, hatalar, karantina_dizini, arsiv_baytlari)
+    olcum['okuma_suresi'] = okuma_suresi
+    return ozet, faturalar, olcum, hatalar
+
+
+def fatura_yili(veri):
+    return datetime.strptime(veri.tarih, '%Y-%m-%d').year
+
 
 class FaturaIsleyici:
-    def __init__(self, ana_dizin, cikti_dizin):
+    def __init__(self, ana_dizin, cikti_dizin, temp_kullan=False, isci_sayisi=None,
+                 onbellek_kullan=True, onbellek_yolu=None, kopru_ekle=True, kopru_siniri=None,
+                 depo_bellek_siniri=256 * 1024 * 1024, yillar=None, tekrar_politikasi='ilk',
+                 rapor_isci_sayisi=None, kontrol_noktasi_araligi=10.0, kuyruk_siniri=None,
+                 formatlar=('xlsx',), excel_siniri=None, kur_tablosu=None, karantina_dizini=None,
+                 parca=None, okuma_siniri=None):
         self.ana_dizin = Path(ana_dizin)
         self.cikti_dizin = Path(cikti_dizin)
         self.temp_dizin = self.cikti_dizin / "temp"
+        # Varsayılan olarak zip'ler bellekte okunur; temp dizinine çıkarma
+        # yalnızca isteğe bağlı yedek yol olarak kalır
+        self.temp_kullan = temp_kullan
+        # Ayrıştırma için süreç sayısı (varsayılan: tüm çekirdekler)
+        self.isci_sayisi = isci_sayisi or os.cpu_count() or 1
+        # Yıllık raporlar için süreç sayısı üst sınırı (varsayılan: isci_sayisi);
+        # her yıl bir işçide yazılır
+        self.rapor_isci_sayisi = rapor_isci_sayisi or self.isci_sayisi
+        # Önceden okumada aynı anda okunan en fazla arşiv sayısı. Arşiv
+        # baytları ayrı G/Ç iş parçacıklarında okunup işçilere verilir; ağ
+        # paylaşımlarında okuma gecikmesi ayrıştırmayla örtüşür. Verilmezse
+        # arşivleri işçiler okur ve yalnızca okuma yavaşsa önceden okumaya
+        # geçilir (bkz. OncedenOkuma)
+        self.onceden_oku = okuma_siniri is not None
+        self.okuma_siniri = okuma_siniri or 4
+        # Keşfedilip henüz birleştirilmemiş en fazla arşiv sayısı; okunan
+        # arşivler ve ayrıştırma sonuçları bellekte bu kadar arşivle sınırlı
+        # kalır. Varsayılan, işçiler meşgulken okumaların sürmesine yeter
+        self.kuyruk_siniri = kuyruk_siniri or max(2 * self.isci_sayisi, self.isci_sayisi + self.okuma_siniri)
+        # Ayrıştırılan arşivler çıktı dizinindeki önbellekte saklanır; sonraki
+        # çalışmalarda yalnızca yeni ya da değişen arşivler işlenir
+        self.onbellek_kullan = onbellek_kullan
+        self.onbellek_yolu = Path(onbellek_yolu) if onbellek_yolu else self.cikti_dizin / "fatura_onbellek.sqlite"
+        # Ayrıştırılan arşivler en geç bu kadar saniyede bir önbelleğe işlenir;
+        # kesilen ya da çöken çalışma son kontrol noktasından devam eder
+        self.kontrol_noktasi_araligi = kontrol_noktasi_araligi
+        # Faturalar sayfasından Kalemler sayfasına bağlantı; kopru_siniri'ndan
+        # fazla faturası olan çalışma kitaplarında bağlantılar atlanır
+        self.kopru_ekle = kopru_ekle
+        self.kopru_siniri = kopru_siniri
+        # Her yıl için yazılacak çıktı biçimleri (bkz. disa_aktarim); Excel
+        # yalnızca excel_siniri'ndan az faturası olan yıllar için yazılır
+        for bicim in formatlar:
+            if bicim not in CIKTI_FORMATLARI:
+                raise ValueError(f"Bilinmeyen çıktı formatı: {bicim}")
+        if 'parquet' in formatlar and not PARQUET_DESTEKLI:
+            raise ValueError("Parquet çıktısı için pyarrow kurulu olmalı")
+        self.formatlar = tuple(formatlar)
+        self.excel_siniri = excel_siniri
+        # Kuru XML'de olmayan dövizli faturaların TRY karşılığı için çevrimdışı
+        # TCMB kur tablosu (bkz. kurlar): dosya/dizin yolu ya da KurTablosu.
+        # Verilmezse varsayılan konumlara bakılır; False ile kapatılır
+        self.kur_tablosu = self._kur_tablosu_yukle(kur_tablosu)
+        # Okunamayan XML'ler verilirse bu dizine kopyalanır; düzeltilip bir
+        # zip'le girdi dizinine bırakılınca yalnızca o arşiv işlenir
+        self.karantina_dizini = Path(karantina_dizini) if karantina_dizini else None
+        # Verilirse (parca.Parca) yalnızca bu parçaya düşen arşivler
+        # ayrıştırılıp önbelleğe yazılır, rapor üretilmez; raporlar
+        # parcalari_birlestir ile tüm parçalardan üretilir
+        if parca is not None and not onbellek_kullan:
+            raise ValueError("Parça çalışması önbellek gerektirir")
+        self.parca = parca
         
-        # Debug mesajları ekleyelim
-        print(f"Ana dizin: {self.ana_dizin.absolute()}")
-        print(f"Çıktı dizin: {self.cikti_dizin.absolute()}")
+        gunluk.debug("Ana dizin: %s", self.ana_dizin.absolute())
+        gunluk.debug("Çıktı dizin: %s", self.cikti_dizin.absolute())
         
         # Dizinleri oluştururken hata kontrolü ekleyelim
         try:
-            self.temp_dizin.mkdir(exist_ok=True, parents=True)
+            if self.temp_kullan:
+                self.temp_dizin.mkdir(exist_ok=True, parents=True)
             self.cikti_dizin.mkdir(exist_ok=True, parents=True)
         except Exception as e:
-            print(f"Dizin oluşturulurken hata: {e}")
+            gunluk.error("Dizin oluşturulurken hata: %s", e)
 
         self.progress_callback = None
-        self.fatura_yillari = {}  # {yil: [fatura_verileri]}
+        # Ayrıştırılan faturalar yıllara göre sütunlu depoda tutulur; bellek
+        # sınırı aşılınca parçalar çıktı dizinindeki geçici klasöre yazılır
+        self.depo_bellek_siniri = depo_bellek_siniri
+        self.depo = None
+        # Yalnızca bu yılların raporları üretilir (None: tüm yıllar)
+        self.yil_filtresi = set(yillar) if yillar else None
+        # Arşivler arası tekrar eden faturalardan hangisinin tutulacağı:
+        # 'ilk', 'yeni' (arşivi daha yeni olan) ya da None (ayıklama yapılmaz)
+        self.tekrar_politikasi = tekrar_politikasi
+        self.tekrarlar = self._tekrar_dizini_olustur()
+        # Keşifte atlanan arşivler (izleme kipinde henüz yazılmakta olanlar)
+        self.haric_arsivler = set()
+        # iptal() ile başka bir iş parçacığından kurulur, arşivler arasında bakılır
+        self._iptal = threading.Event()
+        # Son çalışmanın özeti (komut satırı ve arayüz için)
+        self.istatistikler = {}
+        # Son çalışmanın aşama süreleri ve sayaçları; çalışma sonunda
+        # çıktı dizinine calisma_raporu.json olarak yazılır
+        self.olcum = CalismaOlcumu()
+        self.rapor_dosyasi = self.cikti_dizin / "calisma_raporu.json"
+        # Okunamayan arşiv ve XML'ler; önbellekten gelen arşivlerin önceki
+        # hataları da dahil edilir ve çalışma sonunda dosyaya yazılır
+        self.hata_defteri = HataDefteri()
+        self.hata_defteri_dosyasi = self.cikti_dizin / "hata_defteri.jsonl"
 
     async def zip_ac(self, zip_yolu):
-        try:
-            hedef_dizin = self.temp_dizin / zip_yolu.stem
-            print(f"Zip hedef dizin: {hedef_dizin}")
-            
-            with zipfile.ZipFile(zip_yolu, 'r') as zip_ref:
-                # Zip içindeki dosyaları listele
-                icerdeki_dosyalar = zip_ref.namelist()
-                print(f"Zip içindeki dosyalar: {icerdeki_dosyalar}")
-                
-                # Ana zip'i aç
-                zip_ref.extractall(hedef_dizin)
-                
-                # İç zip dosyalarını bul ve aç
-                for dosya in icerdeki_dosyalar:
-                    if dosya.lower().endswith('.zip'):
-                        ic_zip_yolu = hedef_dizin / dosya
-                        print(f"İç zip bulundu: {ic_zip_yolu}")
-                        try:
-                            with zipfile.ZipFile(ic_zip_yolu, 'r') as ic_zip:
-                                ic_zip.extractall(hedef_dizin / ic_zip_yolu.stem)
-                                print(f"İç zip açıldı: {ic_zip_yolu}")
-                        except Exception as e:
-                            print(f"İç zip açılırken hata: {ic_zip_yolu} - {e}")
-                            
-            return hedef_dizin
-        except Exception as e:
-            print(f"Zip açılırken hata: {zip_yolu} - {e}")
-            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, zip_cikar, zip_yolu, self.temp_dizin)
+
+    def zip_icerigi(self, zip_yolu):
+        """Bir arşivdeki XML'leri ``(kaynak_adi, xml_baytlari)`` olarak üretir."""
+        return arsiv_xmlleri(zip_yolu)
+
+    def xml_oku(self, xml_yolu, kaynak_adi=None):
+        return xml_ayristir(xml_yolu, kaynak_adi)
+
+    async def tum_yillari_isle(self):
+        """Tüm arşivleri işleyip yıllık raporları üretir.
 
-    def xml_oku(self, xml_yolu):
+        ``parca`` verilmişse yalnızca parçaya düşen arşivler önbelleğe yazılır
+        ve parça tamamlandı olarak işaretlenir; raporlar üretilmez.
+
+        Çalışma ölçülür ve sonunda (hata olsa da) ``rapor_dosyasi`` yazılır.
+        FATURA_PROFIL ortam değişkeni tanımlıysa çalışma cProfile/tracemalloc
+        altında yürütülür.
+        """
+        await self._olcerek(self._yillari_isle())
+
+    async def parcalari_birlestir(self, parca_dizinleri):
+        """Parça çalışmalarının önbelleklerinden yıllık raporları üretir (bkz. ``parca``).
+
+        ``parca_dizinleri`` parça çalışmalarının çıktı dizinleri ya da
+        önbellek dosyalarıdır. Arşivler yeniden ayrıştırılmaz; faturalar
+        tek çalışmadaki keşif sırasıyla eklenir, böylece tekrar ayıklama ve
+        raporlar bölünmemiş çalışmayla aynı olur. Parçaların hata defterleri
+        bu çalışmanın defterine eklenir.
+        """
+        await self._olcerek(self._parcalari_birlestir(parca_dizinleri))
+
+    async def _olcerek(self, islem):
+        """Çalışmayı ölçer ve sonunda (hata olsa da) ``rapor_dosyasi``'nı yazar."""
+        self.olcum = CalismaOlcumu()
+        self.hata_defteri = HataDefteri()
+        profilleyici = Profilleyici(self.cikti_dizin)
         try:
-            # Eğer dizin ise atla
-            if xml_yolu.is_dir():
-                return None
-            
-            # XML dosyasını bul - iç zip'ten çıkan .xml dosyasını ara
-            xml_dosyasi = None
-            if xml_yolu.suffix == '.zip':
-                with zipfile.ZipFile(xml_yolu, 'r') as zip_ref:
-                    for isim in zip_ref.namelist():
-                        if isim.endswith('.xml'):
-                            # XML'i geçici olarak çıkar
-                            zip_ref.extract(isim, xml_yolu.parent)
-                            xml_dosyasi = xml_yolu.parent / isim
-                            break
-            else:
-                xml_dosyasi = xml_yolu
-            
-            if not xml_dosyasi or not xml_dosyasi.exists():
-                print(f"XML dosyası bulunamadı: {xml_yolu}")
-                return None
-            
-            tree = ET.parse(xml_dosyasi)
-            root = tree.getroot()
-            
-            # UBL-TR namespace'lerini tanımlayalım
-            ns = {
-                'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
-                'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2'
-            }
-            
-            # Temel verileri çekelim
-            toplam = float(root.find('.//cac:LegalMonetaryTotal/cbc:TaxInclusiveAmount', ns).text)
-            para_birimi = root.find('.//cac:LegalMonetaryTotal/cbc:TaxInclusiveAmount', ns).attrib.get('currencyID', 'TRY')
-            
-            # Döviz kuru bilgisini al
+            with profilleyici:
+                await islem
+        finally:
+            self._hata_defterini_yaz()
+            rapor = self.olcum.rapor(self.istatistikler)
+            rapor['isci_sayisi'] = self.isci_sayisi
+            rapor['profil'] = profilleyici.ozet
+            rapor['hatalar'] = self.hata_defteri.ozet()
             try:
-                kur_elementi = root.find('.//cac:PricingExchangeRate', ns)
-                if not kur_elementi:
-                    kur_elementi = root.find('.//cac:PaymentAlternativeExchangeRate', ns)
-                
-                if kur_elementi:
-                    kur = float(kur_elementi.find('cbc:CalculationRate', ns).text)
-                    try_karsiligi = toplam * kur
-                else:
-                    try_karsiligi = toplam if para_birimi == 'TRY' else 0
-            except:
-                try_karsiligi = toplam if para_birimi == 'TRY' else 0
-            
-            veri = {
-                'Sipariş Tarihi': root.find('.//cac:OrderReference/cbc:IssueDate', ns).text if root.find('.//cac:OrderReference/cbc:IssueDate', ns) is not None else '',
-                'Sipariş No': root.find('.//cac:OrderReference/cbc:ID', ns).text if root.find('.//cac:OrderReference/cbc:ID', ns) is not None else '',
-                'Fatura No': root.find('.//cbc:ID', ns).text,
-                'Tarih': root.find('.//cbc:IssueDate', ns).text,
-                'Satıcı': root.find('.//cac:AccountingSupplierParty//cac:PartyName/cbc:Name', ns).text,
-                'Alıcı': root.find('.//cac:AccountingCustomerParty//cac:PartyName/cbc:Name', ns).text,
-                'Toplam': toplam,
-                'Para Birimi': para_birimi,
-                'TRY Karşılığı': try_karsiligi  # Yeni alan
-            }
-            
-            # Kalem detaylarını çekelim
-            kalemler = []
-            for kalem in root.findall('.//cac:InvoiceLine', ns):
-                # Para birimi bilgisini al
-                para_birimi = kalem.find('.//cbc:LineExtensionAmount', ns).attrib.get('currencyID', 'TRY')
-                
-                kalem_veri = {
-                    'Sipariş No': veri['Sipariş No'],  # Ana veriyle ilişkilendirmek için
-                    'Kalem No': kalem.find('cbc:ID', ns).text,
-                    'Ürün/Hizmet': kalem.find('.//cac:Item/cbc:Name', ns).text,
-                    'Miktar': float(kalem.find('cbc:InvoicedQuantity', ns).text),
-                    'Birim Fiyat': float(kalem.find('.//cac:Price/cbc:PriceAmount', ns).text),
-                    'KDV Oranı': float(kalem.find('.//cac:TaxTotal//cbc:Percent', ns).text if kalem.find('.//cac:TaxTotal//cbc:Percent', ns) is not None else 0),
-                    'KDV Tutarı': float(kalem.find('.//cac:TaxTotal/cbc:TaxAmount', ns).text),
-                    'Toplam Tutar': float(kalem.find('.//cbc:LineExtensionAmount', ns).text),
-                    'Para Birimi': para_birimi
-                }
-                kalemler.append(kalem_veri)
-            
-            return veri, kalemler
-            
-        except Exception as e:
-            print(f"Hata: {xml_yolu} okunurken hata oluştu - {e}")
-            return None
+                rapor_yaz(self.rapor_dosyasi, rapor)
+                self.istatistikler['calisma_raporu'] = str(self.rapor_dosyasi)
+            except OSError as e:
+                gunluk.error("Çalışma raporu yazılamadı: %s", e)
 
-    async def tum_yillari_isle(self):
+    def _hata_ekle(self, kayit):
+        self.hata_defteri.ekle(kayit)
+        konum = f"{kayit['arsiv']}:{kayit['uye']}" if kayit['uye'] else kayit['arsiv']
+        gunluk.warning("%s okunamadı (%s) - %s", konum, kayit['tur'], kayit['mesaj'])
+
+    def _hata_defterini_yaz(self):
+        self.istatistikler['hatali_xml'] = sum(1 for kayit in self.hata_defteri.kayitlar if kayit['uye'])
         try:
-            # Tüm zip dosyalarını bul
-            zip_dosyalari = list(self.ana_dizin.glob("**/*.zip"))
-            toplam_dosya = len(zip_dosyalari)
+            self.hata_defteri.yaz(self.hata_defteri_dosyasi)
+        except OSError as e:
+            gunluk.error("Hata defteri yazılamadı: %s", e)
+            return
+        self.istatistikler['hata_defteri'] = str(self.hata_defteri_dosyasi)
+        if len(self.hata_defteri):
+            gunluk.warning("%d hata kaydedildi: %s", len(self.hata_defteri), self.hata_defteri_dosyasi)
+
+    def iptal(self):
+        """Çalışan ``tum_yillari_isle``'yi arşivler arasında durdurur.
+
+        Başka bir iş parçacığından çağrılabilir. O ana kadar ayrıştırılan
+        arşivler önbelleğe işlenir, raporlar üretilmez; sonraki çalışma
+        kaldığı yerden devam eder.
+        """
+        self._iptal.set()
+
+    def _istatistikleri_sifirla(self):
+        self.istatistikler = {
+            'toplam_dosya': 0,
+            'islenen_dosya': 0,
+            'onbellekten_dosya': 0,
+            'hatali_dosya': 0,
+            'bulunan_fatura': 0,
+            'tekrarlanan_fatura': 0,
+            'cakisan_fatura': 0,
+            'raporlar': [],
+            'hatali_raporlar': [],
+            'kurla_cevrilen': 0,
+            'kuru_bulunamayan': 0,
+            'hatali_xml': 0,
+            'iptal_edildi': False,
+            'sure_saniye': 0.0
+        }
+
+    async def _yillari_isle(self):
+        olcum = self.olcum
+        onbellek = None
+        baslangic = time.perf_counter()
+        guncellenecek_yillar = set()
+        tamamlanan_yillar = set()
+        self._istatistikleri_sifirla()
+        self.depo = KolonDeposu(
+            tempfile.mkdtemp(prefix=".depo_", dir=self.cikti_dizin), self.depo_bellek_siniri
+        )
+        self.tekrarlar = self._tekrar_dizini_olustur()
+        try:
+            zip_dosyalari = []  # Keşif sırasıyla bulunan arşivler
             islenen_dosya = 0
             toplam_fatura = 0
             
             # İlk durumu bildir
             if self.progress_callback:
                 self.progress_callback("", {
-                    'toplam_dosya': toplam_dosya,
+                    'toplam_dosya': 0,
                     'islenen_dosya': islenen_dosya,
                     'bulunan_fatura': toplam_fatura,
                     'yillik_dagilim': '-'
                 }, {})  # Boş detay gönder
             
-            for zip_yolu in zip_dosyalari:
-                try:
-                    hedef_dizin = await self.zip_ac(zip_yolu)
-                    if not hedef_dizin:
-                        continue
-                        
-                    # XML dosyalarını bul ve işle
-                    xml_dosyalari = list(hedef_dizin.rglob("*.xml"))
-                    zip_fatura_sayisi = 0
-                    yil_dagilimi = {}
+            if self.onbellek_kullan:
+                with olcum.asama('onbellek_kontrol'):
+                    onbellek = ArsivOnbellegi(self.onbellek_yolu)
+                    # Yarıda kalan önceki çalışmanın raporlanmamış yılları
+                    guncellenecek_yillar |= onbellek.bekleyen_yillar()
+                    # Tekrar politikası değiştiyse tüm raporlar yeniden üretilir
+                    if onbellek.ayar('tekrar_politikasi') != str(self.tekrar_politikasi):
+                        guncellenecek_yillar |= onbellek.tum_yillar()
+                        onbellek.ayar_kaydet('tekrar_politikasi', str(self.tekrar_politikasi))
+                    # Kur tablosu değiştiyse de TRY karşılıkları yeniden hesaplanır
+                    kur_ozeti = self.kur_tablosu.ozet if self.kur_tablosu is not None else ''
+                    if (onbellek.ayar('kur_tablosu') or '') != kur_ozeti:
+                        guncellenecek_yillar |= onbellek.tum_yillar()
+                        onbellek.ayar_kaydet('kur_tablosu', kur_ozeti)
+                    if self.parca is not None:
+                        # Yarıda kalan parça birleştirilmesin diye önce tamamlanmamış işaretlenir
+                        onbellek.ayar_kaydet(PARCA_AYARI, self.parca.bilgi(False))
+            
+            # Keşif, ayrıştırma ve birleştirme akış halinde çalışır: klasör
+            # tembel taranır ve bulunan arşiv hemen işçi havuzuna verilir;
+            # girdi yavaşsa arşivler önceden, en fazla ``okuma_siniri``
+            # tanesi aynı anda okunur.
+            # Keşif sırasıyla bekleyen arşivler ``kuyruk_siniri`` ile
+            # sınırlıdır; birleştirme geride kalırsa kuyruk dolar ve keşif
+            # durur, böylece bellekte sınırlı sayıda arşivin sonucu bulunur.
+            # Önbellekte güncel kaydı olan arşivler yeniden ayrıştırılmaz;
+            # raporu yeniden üretilecek yıllar ayrıca takip edilir
+            onbellekteki = {}
+            temp_dizin = self.temp_dizin if self.temp_kullan else None
+            loop = asyncio.get_running_loop()
+            kuyruk = deque()  # (sıra, arşiv durumu, yıl dağılımı ya da ayrıştırma görevi)
+            son_kontrol_noktasi = time.perf_counter()
+            
+            okuma_sirasi = asyncio.Semaphore(self.okuma_siniri)
+            onceden_okuma = OncedenOkuma(self.onceden_oku)
+            ayristirmalar = {}  # sıra -> işçiye verilmiş ayrıştırma (concurrent.futures.Future)
+            
+            with olcum.asama('ayristirma'), self._havuz_olustur() as havuz, \
+                    ThreadPoolExecutor(self.okuma_siniri, thread_name_prefix="arsiv_okuma") as okuyucu:
+                async def arsivi_isle(sira, zip_yolu, durum):
+                    arsiv_baytlari = None
+                    ayrilan = 0
+                    try:
+                        if onceden_okuma.acik:
+                            # Okuma G/Ç iş parçacığında, açma ve ayrıştırma
+                            # işçide yapılır; bir arşiv ayrıştırılırken
+                            # sonrakiler okunur
+                            async with okuma_sirasi:
+                                if durum is None:
+                                    durum = await loop.run_in_executor(okuyucu, zip_yolu.stat)
+                                if durum.st_size <= ONCEDEN_OKUMA_SINIRI:
+                                    await onceden_okuma.ayir(durum.st_size)
+                                    ayrilan = durum.st_size
+                                    an = time.perf_counter()
+                                    arsiv_baytlari = await loop.run_in_executor(
+                                        okuyucu, arsiv_oku, zip_yolu, ONCEDEN_OKUMA_SINIRI
+                                    )
+                                    olcum.sure_ekle('arsiv_okuma', time.perf_counter() - an)
+                        # İptalde başlamış ayrıştırmalar ayırt edilebilsin diye
+                        # işçi görevi saklanır
+                        ayristirmalar[sira] = havuz.submit(
+                            arsiv_isle, zip_yolu, temp_dizin, onbellek is not None, self.karantina_dizini,
+                            arsiv_baytlari
+                        )
+                        sonuc = await asyncio.wrap_future(ayristirmalar[sira])
+                        if arsiv_baytlari is None:
+                            onceden_okuma.isci_olcumu_ekle(sonuc[2])
+                        return sonuc
+                    except Exception as e:
+                        self._hata_ekle(hata_kaydi(zip_yolu, None, e))
+                        self.istatistikler['hatali_dosya'] += 1
+                        return None
+                    finally:
+                        ayristirmalar.pop(sira, None)
+                        if ayrilan:
+                            onceden_okuma.birak(ayrilan)
+                
+                def kesfet():
+                    for zip_yolu in dosyalari_bul(self.ana_dizin, ".zip"):
+                        if zip_yolu in self.haric_arsivler:
+                            continue
+                        if self.parca is not None and not self.parca.icerir(zip_yolu, self.ana_dizin):
+                            continue
+                        sira = len(zip_dosyalari)
+                        zip_dosyalari.append(zip_yolu)
+                        durum = None
+                        if onbellek is not None:
+                            try:
+                                durum = zip_yolu.stat()
+                                guncel, yil_dagilimi = onbellek.kontrol(zip_yolu)
+                            except OSError as e:
+                                self._hata_ekle(hata_kaydi(zip_yolu, None, e))
+                                self.istatistikler['hatali_dosya'] += 1
+                                continue
+                            if guncel:
+                                onbellekteki[sira] = yil_dagilimi
+                                yield sira, durum, yil_dagilimi
+                                continue
+                            guncellenecek_yillar.update(yil_dagilimi)
+                        yield sira, durum, asyncio.ensure_future(arsivi_isle(sira, zip_yolu, durum))
+                
+                arsivler = kesfet()
+                kesif_bitti = False
+                while True:
+                    # Kuyrukta yer oldukça keşfe devam et
+                    with olcum.asama('kesif'):
+                        while not kesif_bitti and len(kuyruk) < self.kuyruk_siniri:
+                            oge = next(arsivler, None)
+                            if oge is None:
+                                kesif_bitti = True
+                            else:
+                                kuyruk.append(oge)
+                    self.istatistikler['toplam_dosya'] = len(zip_dosyalari)
+                    if not kuyruk:
+                        break
                     
-                    for xml_yolu in xml_dosyalari:
-                        sonuc = self.xml_oku(xml_yolu)
-                        if sonuc:
-                            veri, kalemler = sonuc
-                            yil = datetime.strptime(veri['Tarih'], '%Y-%m-%d').year
-                            
-                            # Yıl dağılımını güncelle
-                            if yil not in yil_dagilimi:
-                                yil_dagilimi[yil] = 0
-                            yil_dagilimi[yil] += 1
-                            zip_fatura_sayisi += 1
-                            
-                            # Fatura verilerini sakla
-                            if yil not in self.fatura_yillari:
-                                self.fatura_yillari[yil] = {'veriler': [], 'kalemler': []}
-                            self.fatura_yillari[yil]['veriler'].append(veri)
-                            self.fatura_yillari[yil]['kalemler'].extend(kalemler)
+                    # Arşivler keşif sırasıyla birleştirilir
+                    sira, durum, sonuc = kuyruk.popleft()
+                    zip_yolu = zip_dosyalari[sira]
+                    if sira in onbellekteki:
+                        yil_dagilimi = sonuc
+                    else:
+                        sonuc = await sonuc
+                        if sonuc is None:
+                            continue
+                        ozet, faturalar, arsiv_olcumu, hatalar = sonuc
+                        for hata in hatalar:
+                            self._hata_ekle(hata)
+                        olcum.arsiv_olcumu_ekle(arsiv_olcumu)
+                        olcum.say('fatura', len(faturalar))
+                        olcum.say('kalem', sum(len(kalemler) for _, kalemler in faturalar))
+                        with olcum.asama('toplama'):
+                            if onbellek is not None:
+                                yil_dagilimi = self._yil_dagilimi(faturalar)
+                                onbellek.kaydet(zip_yolu, durum, ozet, faturalar, yil_dagilimi, hatalar)
+                                guncellenecek_yillar.update(yil_dagilimi)
+                            else:
+                                yil_dagilimi = self._faturalari_ekle(
+                                    faturalar, self.yil_filtresi, self._arsiv_zamani(zip_yolu)
+                                )
+                    zip_fatura_sayisi = sum(yil_dagilimi.values())
                     
                     # İşlenen dosya istatistiklerini güncelle
                     islenen_dosya += 1
                     toplam_fatura += zip_fatura_sayisi
                     
-                    # İşlem bittiğinde son durumu gönder
                     if self.progress_callback:
                         self.progress_callback(
                             "",
                             {
-                                'toplam_dosya': toplam_dosya,
+                                'toplam_dosya': len(zip_dosyalari),
                                 'islenen_dosya': islenen_dosya,
                                 'bulunan_fatura': toplam_fatura
                             },
@@ -213,8 +949,47 @@ class FaturaIsleyici:
                             }
                         )
                     
-                except Exception as e:
-                    print(f"Zip işlenirken hata: {zip_yolu} - {e}")
+                    # Ayrıştırılan arşivleri düzenli aralıklarla kalıcı hale getir
+                    if onbellek is not None and time.perf_counter() - son_kontrol_noktasi >= self.kontrol_noktasi_araligi:
+                        onbellek.kontrol_noktasi(guncellenecek_yillar)
+                        son_kontrol_noktasi = time.perf_counter()
+                    if self._iptal.is_set():
+                        break
+                
+                if self._iptal.is_set():
+                    # Keşif durdurulur; henüz okunan ya da işçi bekleyen
+                    # arşivler iptal edilir, işçide ayrıştırılmakta olanların
+                    # bitmesi beklenir
+                    arsivler.close()
+                    gorevler = [(sira, gorev) for sira, _, gorev in kuyruk if sira not in onbellekteki]
+                    for sira, gorev in gorevler:
+                        ayristirma = ayristirmalar.get(sira)
+                        if ayristirma is None or ayristirma.cancel():
+                            gorev.cancel()
+                    await asyncio.gather(*(gorev for _, gorev in gorevler), return_exceptions=True)
+                    if onbellek is not None:
+                        # Kuyrukta bitmiş sonuçlar da boşa gitmesin; önbelleğe
+                        # yazmak için keşif sırası gerekmez
+                        for sira, durum, gorev in kuyruk:
+                            if sira in onbellekteki or gorev.cancelled() or gorev.result() is None:
+                                continue
+                            ozet, faturalar, _, hatalar = gorev.result()
+                            yil_dagilimi = self._yil_dagilimi(faturalar)
+                            onbellek.kaydet(zip_dosyalari[sira], durum, ozet, faturalar, yil_dagilimi, hatalar)
+                            guncellenecek_yillar.update(yil_dagilimi)
+                            islenen_dosya += 1
+                            toplam_fatura += len(faturalar)
+            
+            toplam_dosya = len(zip_dosyalari)
+            if self._iptal.is_set():
+                self._iptal_edildi(onbellek, islenen_dosya, len(onbellekteki), toplam_fatura)
+                return
+            if onbellek is not None:
+                # Keşif bitince klasörden silinmiş arşivlerin kayıtları temizlenir
+                guncellenecek_yillar |= onbellek.silinenleri_temizle(zip_dosyalari)
+                # Yeniden ayrıştırılmayan arşivlerin hataları da deftere girer
+                for hata in onbellek.hatalar([zip_dosyalari[sira] for sira in onbellekteki]):
+                    self.hata_defteri.ekle(hata)
             
             # İşlem bittiğinde son durumu gönder
             if self.progress_callback:
@@ -232,110 +1007,438 @@ class FaturaIsleyici:
                     }
                 )
             
+            if self.parca is not None:
+                self._parcayi_tamamla(onbellek, zip_dosyalari, islenen_dosya, len(onbellekteki), toplam_fatura)
+                return
+            
+            if onbellek is not None:
+                # Raporu hiç oluşturulmamış yıllar da yeniden üretilir
+                for yil in onbellek.tum_yillar():
+                    if not self._ciktilar_hazir(yil):
+                        guncellenecek_yillar.add(yil)
+                onbellek.kontrol_noktasi(guncellenecek_yillar)
+                uretilecek_yillar = set(guncellenecek_yillar)
+                if self.yil_filtresi is not None:
+                    uretilecek_yillar &= self.yil_filtresi
+                with olcum.asama('onbellek_yukleme'):
+                    self._onbellekten_yukle(onbellek, zip_dosyalari, onbellekteki, uretilecek_yillar)
+                if self._iptal.is_set():
+                    self._iptal_edildi(onbellek, islenen_dosya, len(onbellekteki), toplam_fatura)
+                    return
+                
+                # Tüm faturaları silinen yılların eski raporlarını kaldır
+                for yil in uretilecek_yillar - set(self.depo.yillar()):
+                    ciktilari_sil(self.cikti_dizin, yil)
+                    tamamlanan_yillar.add(yil)
+            
+            # Kuru XML'de olmayan dövizli faturalar tablodaki kurla çevrilir
+            if self.kur_tablosu is not None:
+                with olcum.asama('kur_donusumu'):
+                    self._kurlari_uygula()
+            
             # Her yıl için Excel oluştur
-            for yil, veriler in self.fatura_yillari.items():
-                try:
-                    excel_yolu = self.cikti_dizin / f"{yil}_rapor.xlsx"
-                    self.excel_olustur(veriler['veriler'], veriler['kalemler'], excel_yolu)
-                except Exception as e:
-                    print(f"Excel oluşturulurken hata: {e}")
+            with olcum.asama('rapor_yazimi'):
+                tamamlanan_yillar |= await self._raporlari_olustur({
+                    'toplam_dosya': toplam_dosya,
+                    'islenen_dosya': islenen_dosya,
+                    'bulunan_fatura': toplam_fatura
+                })
+            self.istatistikler['iptal_edildi'] = self._iptal.is_set()
+            
+            self.istatistikler.update({
+                'islenen_dosya': islenen_dosya,
+                'onbellekten_dosya': len(onbellekteki),
+                'bulunan_fatura': toplam_fatura
+            })
+            if self.tekrarlar is not None:
+                self.istatistikler['tekrarlanan_fatura'] = self.tekrarlar.toplam_atlanan()
+                self.istatistikler['cakisan_fatura'] = self.tekrarlar.toplam_cakisma()
             
         except Exception as e:
-            print(f"İşlem sırasında hata: {e}")
+            gunluk.error("İşlem sırasında hata: %s", e)
             raise
         finally:
+            self.istatistikler['sure_saniye'] = time.perf_counter() - baslangic
+            self._iptal.clear()
+            if onbellek is not None:
+                # Hata ya da iptalde de o ana kadarki arşivler ve raporu
+                # üretilemeyen yıllar saklanır
+                onbellek.kontrol_noktasi(guncellenecek_yillar - tamamlanan_yillar)
+                onbellek.kapat()
+            self.depo.temizle()
             # Temp klasörünü temizle
             try:
-                if self.temp_dizin.exists():
+                if self.temp_kullan and self.temp_dizin.exists():
                     shutil.rmtree(self.temp_dizin)
-                    print("Temp dizini temizlendi")
+                    gunluk.debug("Temp dizini temizlendi")
             except Exception as e:
-                print(f"Temp dizini temizlenirken hata: {e}")
+                gunluk.warning("Temp dizini temizlenirken hata: %s", e)
 
-    def progress(self, message, stats=None, file_details=None):
-        if stats is None:
-            stats = {}
-        if file_details:
-            self.progress_callback(message, stats, file_details)
+    def _rapor_yolu(self, yil):
+        return cikti_yolu('xlsx', self.cikti_dizin, yil)
+
+    def _ciktilar_hazir(self, yil):
+        # Excel sınırı varken büyük yılların Excel'i bilerek yazılmaz; ona bakılmaz
+        return all(
+            cikti_var_mi(bicim, self.cikti_dizin, yil) for bicim in self.formatlar
+            if not (bicim == 'xlsx' and self.excel_siniri is not None)
+        )
 
-    def excel_olustur(self, veriler, kalemler, excel_yolu):
+    def _iptal_edildi(self, onbellek, islenen_dosya, onbellekten_dosya, toplam_fatura):
+        if onbellek is not None:
+            gunluk.warning("İşlem iptal edildi; ayrıştırılan arşivler önbelleğe kaydedildi, sonraki çalışma kaldığı yerden devam edecek")
+        else:
+            gunluk.warning("İşlem iptal edildi; raporlar oluşturulmadı")
+        self.istatistikler.update({
+            'islenen_dosya': islenen_dosya,
+            'onbellekten_dosya': onbellekten_dosya,
+            'bulunan_fatura': toplam_fatura,
+            'iptal_edildi': True
+        })
+
+    def _parcayi_tamamla(self, onbellek, zip_dosyalari, islenen_dosya, onbellekten_dosya, toplam_fatura):
+        self.istatistikler.update({
+            'islenen_dosya': islenen_dosya,
+            'onbellekten_dosya': onbellekten_dosya,
+            'bulunan_fatura': toplam_fatura,
+            'parca': str(self.parca)
+        })
+        ozet = {
+            ad: self.istatistikler[ad]
+            for ad in ('toplam_dosya', 'islenen_dosya', 'onbellekten_dosya', 'hatali_dosya', 'bulunan_fatura')
+        }
+        # Tüm arşivi okunamayanlar önbellekte kaydı olmadığından defter ayrıca saklanır
+        onbellek.ayar_kaydet(PARCA_HATALARI_AYARI, json.dumps(self.hata_defteri.kayitlar, ensure_ascii=False))
+        # Birleştirme, girdi dizini başka yere bağlanmış parçaları da
+        # sıralayabilsin diye göreli yollar saklanır
+        onbellek.ayar_kaydet(PARCA_YOLLARI_AYARI, json.dumps({
+            onbellek.anahtar(zip_yolu): zip_yolu.relative_to(self.ana_dizin).as_posix()
+            for zip_yolu in zip_dosyalari
+        }, ensure_ascii=False))
+        onbellek.ayar_kaydet(PARCA_AYARI, self.parca.bilgi(True, ozet))
+        gunluk.info("Parça %s tamamlandı: %d arşiv, %d fatura", self.parca, islenen_dosya, toplam_fatura)
+
+    async def _parcalari_birlestir(self, parca_dizinleri):
+        olcum = self.olcum
+        baslangic = time.perf_counter()
+        self._istatistikleri_sifirla()
+        self.depo = KolonDeposu(
+            tempfile.mkdtemp(prefix=".depo_", dir=self.cikti_dizin), self.depo_bellek_siniri
+        )
+        self.tekrarlar = self._tekrar_dizini_olustur()
+        onbellekler = []
         try:
-            # Ana veri için DataFrame oluştur ve TRY toplamı sütunu ekle
-            df_ana = pd.DataFrame(veriler)
-            df_ana['Alıcı Toplam (TRY)'] = df_ana['TRY Karşılığı']  # XML'den gelen TRY karşılığını kullan
-            
-            # Sütun sırasını düzenle
-            sutun_sirasi = [
-                'Sipariş Tarihi',
-                'Sipariş No',
-                'Fatura No',
-                'Tarih',
-                'Satıcı',
-                'Alıcı',
-                'Toplam',
-                'Para Birimi',
-                'Alıcı Toplam (TRY)'
-            ]
-            df_ana = df_ana[sutun_sirasi]
+            with olcum.asama('onbellek_kontrol'):
+                arsivler = self._parca_arsivleri(parca_dizinleri, onbellekler)
+            toplam_dosya = len(arsivler)
+            toplam_fatura = 0
             
-            # Kalemler için DataFrame oluştur
-            df_kalemler = pd.DataFrame(kalemler)
+            with olcum.asama('onbellek_yukleme'):
+                for islenen_dosya, (yol, zaman, yil_dagilimi, onbellek) in enumerate(arsivler, 1):
+                    if self._iptal.is_set():
+                        break
+                    if self.yil_filtresi is None or self.yil_filtresi.intersection(yil_dagilimi):
+                        self._faturalari_ekle(kayitlari_coz(onbellek.kayit_faturalari(yol)), self.yil_filtresi, zaman)
+                    zip_fatura_sayisi = sum(yil_dagilimi.values())
+                    toplam_fatura += zip_fatura_sayisi
+                    if self.progress_callback:
+                        self.progress_callback(
+                            "",
+                            {
+                                'toplam_dosya': toplam_dosya,
+                                'islenen_dosya': islenen_dosya,
+                                'bulunan_fatura': toplam_fatura
+                            },
+                            {
+                                'filename': Path(yol).name,
+                                'fatura_count': zip_fatura_sayisi,
+                                'year_distribution': ", ".join(f"{yil}: {sayi}" for yil, sayi in yil_dagilimi.items())
+                            }
+                        )
+            if self._iptal.is_set():
+                self._iptal_edildi(None, 0, 0, toplam_fatura)
+                return
             
-            # TRY toplamını hesapla
-            try_toplam = df_ana['Alıcı Toplam (TRY)'].sum()
+            if self.kur_tablosu is not None:
+                with olcum.asama('kur_donusumu'):
+                    self._kurlari_uygula()
             
-            # Excel yazıcı oluştur
-            with pd.ExcelWriter(excel_yolu, engine='openpyxl') as writer:
-                # Ana sayfayı yaz
-                df_ana.to_excel(writer, sheet_name='Faturalar', index=False)
-                
-                # Kalemler sayfasını yaz
-                df_kalemler.to_excel(writer, sheet_name='Kalemler', index=False)
-                
-                # Özet sayfası ekle
-                ozet_data = {
-                    'Metrik': ['Toplam Fatura Sayısı', 'TRY Cinsinden Toplam'],
-                    'Değer': [len(veriler), f"{try_toplam:,.2f} TL"]
+            with olcum.asama('rapor_yazimi'):
+                await self._raporlari_olustur({
+                    'toplam_dosya': toplam_dosya,
+                    'islenen_dosya': toplam_dosya,
+                    'bulunan_fatura': toplam_fatura
+                })
+            self.istatistikler.update({
+                'iptal_edildi': self._iptal.is_set(),
+                'islenen_dosya': toplam_dosya,
+                'onbellekten_dosya': toplam_dosya,
+                'bulunan_fatura': toplam_fatura,
+                'parcalar': len(onbellekler)
+            })
+            if self.tekrarlar is not None:
+                self.istatistikler['tekrarlanan_fatura'] = self.tekrarlar.toplam_atlanan()
+                self.istatistikler['cakisan_fatura'] = self.tekrarlar.toplam_cakisma()
+        except Exception as e:
+            gunluk.error("Parçalar birleştirilirken hata: %s", e)
+            raise
+        finally:
+            self.istatistikler['sure_saniye'] = time.perf_counter() - baslangic
+            self._iptal.clear()
+            for onbellek in onbellekler:
+                onbellek.kapat()
+            self.depo.temizle()
+
+    def _parca_arsivleri(self, parca_dizinleri, onbellekler):
+        """Parça önbelleklerindeki arşivleri keşif sırasıyla listeler.
+
+        ``(yol, mtime_ns, yil_dagilimi, onbellek)`` listesi döndürür; açılan
+        önbellekler ``onbellekler``'e eklenir. Tamamlanmamış ya da eksik
+        parça varsa ``ValueError`` verir. Parçaların istatistikleri ve hata
+        defterleri bu çalışmanınkilere eklenir.
+        """
+        bilgiler = []
+        for yol in map(Path, parca_dizinleri):
+            db_yolu = yol / self.onbellek_yolu.name if yol.is_dir() else yol
+            if not db_yolu.exists():
+                raise FileNotFoundError(f"Parça önbelleği bulunamadı: {db_yolu}")
+            onbellek = ArsivOnbellegi(db_yolu)
+            onbellekler.append(onbellek)
+            bilgi = onbellek.ayar(PARCA_AYARI)
+            if bilgi is None:
+                raise ValueError(f"{db_yolu} bir parça çalışmasının önbelleği değil")
+            bilgi = json.loads(bilgi)
+            if not bilgi['tamamlandi']:
+                raise ValueError(f"Parça {bilgi['no']}/{bilgi['sayi']} tamamlanmamış: {db_yolu}")
+            bilgiler.append(bilgi)
+        if not bilgiler:
+            raise ValueError("Birleştirilecek parça yok")
+        eksikler = eksik_parcalar(bilgiler)
+        if eksikler:
+            raise ValueError(f"Eksik parçalar: {', '.join(map(str, eksikler))} / {bilgiler[0]['sayi']}")
+        
+        parcalar = []
+        for bilgi, onbellek in zip(bilgiler, onbellekler):
+            for ad in ('toplam_dosya', 'hatali_dosya'):
+                self.istatistikler[ad] += bilgi['istatistikler'].get(ad, 0)
+            for kayit in json.loads(onbellek.ayar(PARCA_HATALARI_AYARI) or '[]'):
+                self.hata_defteri.ekle(kayit)
+            goreli_yollar = onbellek.ayar(PARCA_YOLLARI_AYARI)
+            if goreli_yollar is None:
+                raise ValueError(f"Parça {bilgi['no']}/{bilgi['sayi']} göreli yolları içermiyor; yeniden çalıştırın")
+            parcalar.append((
+                json.loads(goreli_yollar),
+                [(yol, mtime_ns, yil_dagilimi, onbellek) for yol, mtime_ns, yil_dagilimi in onbellek.arsivler()]
+            ))
+        # Yollar makineden bağımsız olarak keşifteki gibi sıralanır
+        arsivler, tekrarlar = arsivleri_sirala(parcalar)
+        for goreli in tekrarlar:
+            # Aynı parça iki kez verilmiş ya da parçalar örtüşüyor
+            gunluk.warning("%s birden fazla parçada var; ilki kullanılacak", goreli)
+        return [kayit for _, kayit in arsivler]
+
+    def _onbellekten_yukle(self, onbellek, zip_dosyalari, onbellekteki, yillar):
+        """Verilen yıllara fatura içeren arşivleri önbellekten okuyup yıllara dağıtır."""
+        if not yillar:
+            return
+        for sira, zip_yolu in enumerate(zip_dosyalari):
+            if self._iptal.is_set():
+                return
+            yil_dagilimi = onbellekteki.get(sira)
+            if yil_dagilimi is not None and not yillar.intersection(yil_dagilimi):
+                continue
+            self._faturalari_ekle(kayitlari_coz(onbellek.faturalar(zip_yolu)), yillar, self._arsiv_zamani(zip_yolu))
+
+    @staticmethod
+    def _kur_tablosu_yukle(kur_tablosu):
+        if kur_tablosu is False:
+            return None
+        # pandas kurlar modülünde yalnızca bir tablo okunurken yüklenir
+        from kurlar import KurTablosu, kur_tablosu_bul
+        if isinstance(kur_tablosu, KurTablosu):
+            return kur_tablosu
+        if kur_tablosu is not None:
+            # Açıkça verilen tablo okunamazsa çalışma başlamaz
+            return KurTablosu.yukle(kur_tablosu)
+        yol = kur_tablosu_bul()
+        if yol is None:
+            return None
+        try:
+            tablo = KurTablosu.yukle(yol)
+        except (OSError, ValueError, ET.ParseError) as e:
+            gunluk.warning("Kur tablosu okunamadı, kullanılmayacak: %s - %s", yol, e)
+            return None
+        gunluk.info("Kur tablosu: %s (%d kur)", yol, len(tablo))
+        return tablo
+
+    def _kurlari_uygula(self):
+        """Depodaki yılların kursuz dövizli faturalarını kur tablosuyla çevirir."""
+        sayaclar = [0, 0]
+
+        def hesapla(faturalar):
+            try_karsiligi, cevrilen, bulunamayan = self.kur_tablosu.try_karsiligi_doldur(faturalar)
+            sayaclar[0] += cevrilen
+            sayaclar[1] += bulunamayan
+            return try_karsiligi
+
+        for yil in self.depo.yillar():
+            self.depo.sutun_guncelle(yil, 'faturalar', 'TRY Karşılığı', hesapla)
+        self.istatistikler['kurla_cevrilen'], self.istatistikler['kuru_bulunamayan'] = sayaclar
+        self.olcum.say('kurla_cevrilen', sayaclar[0])
+        if sayaclar[1]:
+            gunluk.warning("%d dövizli faturanın kuru ne XML'de ne kur tablosunda var; TRY karşılığı 0 yazıldı", sayaclar[1])
+
+    def _tekrar_dizini_olustur(self):
+        return TekrarDizini(self.tekrar_politikasi) if self.tekrar_politikasi else None
+
+    @staticmethod
+    def _arsiv_zamani(zip_yolu):
+        # 'yeni' politikasında hangi kopyanın tutulacağını arşivin değişiklik zamanı belirler
+        try:
+            return zip_yolu.stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    def _havuz_olustur(self, isci_sayisi=None):
+        isci_sayisi = isci_sayisi or self.isci_sayisi
+        # Tek işçide süreç başlatma maliyetine girmeden aynı süreçte çalış
+        if isci_sayisi == 1:
+            return ThreadPoolExecutor(max_workers=1)
+        return ProcessPoolExecutor(max_workers=isci_sayisi)
+
+    async def _raporlari_olustur(self, durum):
+        """Yıllık raporları her yıl bir işçide olacak şekilde paralel yazar.
+
+        İşçilere faturalar değil, deponun yalnızca o yılı içeren görünümü
+        gönderilir; veriler diske yazılmış parçalardan okunur. Biten her
+        rapor ``progress_callback`` ile bildirilir. Yazılan yılları döndürür.
+        """
+        yillar = self.depo.yillar()
+        if not yillar:
+            return set()
+        isci_sayisi = min(self.rapor_isci_sayisi, len(yillar))
+        if isci_sayisi > 1:
+            # Açık parçalar süreçlere kopyalanmasın diye önce diske yazılır
+            self.depo.diske_yaz()
+        
+        loop = asyncio.get_running_loop()
+        raporlar = {}
+        hatali_raporlar = {}
+        with self._havuz_olustur(isci_sayisi) as havuz:
+            async def yili_yaz(yil):
+                depo = self.depo.yil_gorunumu(yil) if isci_sayisi > 1 else self.depo
+                cakismalar, atlanan_tekrar = self._tekrar_bilgisi(yil)
+                excel_ayarlari = {
+                    'kopru_ekle': self._kopru_eklenecek_mi(self.depo.satir_sayisi(yil, 'faturalar')),
+                    'cakismalar': cakismalar,
+                    'atlanan_tekrar': atlanan_tekrar,
+                    'siniri': self.excel_siniri
                 }
-                pd.DataFrame(ozet_data).to_excel(writer, sheet_name='Özet', index=False)
+                try:
+                    sonuc = await loop.run_in_executor(
+                        havuz, rapor_isle, depo, yil, self.cikti_dizin, self.formatlar, excel_ayarlari
+                    )
+                except Exception as e:
+                    gunluk.error("%s çıktıları oluşturulurken hata: %s", yil, e)
+                    sonuc = None
+                return yil, sonuc
+            
+            gorevler = [asyncio.ensure_future(yili_yaz(yil)) for yil in yillar]
+            for gorev in asyncio.as_completed(gorevler):
+                if self._iptal.is_set():
+                    # Başlamamış raporlar iptal edilir, yazılmakta olanlar beklenir
+                    gorev.close()
+                    for kalan in gorevler:
+                        kalan.cancel()
+                    await asyncio.gather(*gorevler, return_exceptions=True)
+                    break
+                yil, sonuc = await gorev
+                if sonuc is None:
+                    hatali_raporlar[yil] = str(cikti_yolu(self.formatlar[0], self.cikti_dizin, yil))
+                    continue
+                fatura_sayisi, sureler, yollar = sonuc
+                raporlar[yil] = [str(yol) for yol in yollar]
+                asamalar = self.olcum.asamalar
+                for bicim, sure in sureler.items():
+                    asamalar['isci_rapor'] = asamalar.get('isci_rapor', 0.0) + sure
+                    asamalar[f'isci_rapor_{bicim}'] = asamalar.get(f'isci_rapor_{bicim}', 0.0) + sure
                 
-                # Excel'i otomatik boyutlandır
-                for sheet_name in writer.sheets:
-                    sayfa = writer.sheets[sheet_name]
-                    
-                    # Sütun genişliklerini ayarla
-                    for column in sayfa.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        
-                        # Başlık ve içerik uzunluklarını kontrol et
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                            adjusted_width = (max_length + 2)
-                            sayfa.column_dimensions[column_letter].width = adjusted_width
-                    
-                    # Ana sayfadaki Sipariş No'ya link ekle
-                    if sheet_name == 'Faturalar':
-                        for idx, row in enumerate(sayfa.iter_rows(min_row=2), start=2):
-                            siparis_no = row[1].value  # Sipariş No sütunu
-                            if siparis_no:
-                                # Detay sayfasında ilgili satırı bul
-                                kalemler_sayfa = writer.sheets['Kalemler']
-                                for detay_idx, detay_row in enumerate(kalemler_sayfa.iter_rows(min_row=2), start=2):
-                                    if detay_row[0].value == siparis_no:  # Detay sayfasındaki Sipariş No
-                                        row[1].hyperlink = f"#Kalemler!A{detay_idx}"
-                                        row[1].style = "Hyperlink"
-                                        break
+                if self.progress_callback:
+                    self.progress_callback(
+                        f"{yil} raporu hazır ({len(raporlar) + len(hatali_raporlar)}/{len(yillar)})",
+                        {**durum, 'tamamlanan_rapor': len(raporlar), 'toplam_rapor': len(yillar)},
+                        {
+                            'filename': Path(yollar[0]).name if yollar else str(yil),
+                            'fatura_count': fatura_sayisi,
+                            'year_distribution': f"{yil} raporu oluşturuldu"
+                        }
+                    )
+        
+        # Raporlar bitiş sırasından bağımsız olarak yıl sırasıyla listelenir
+        # Ortak SQLite veritabanı gibi yıllarca paylaşılan çıktılar bir kez listelenir
+        self.istatistikler['raporlar'].extend(dict.fromkeys(yol for yil in sorted(raporlar) for yol in raporlar[yil]))
+        self.istatistikler['hatali_raporlar'].extend(hatali_raporlar[yil] for yil in sorted(hatali_raporlar))
+        return set(raporlar)
+
+    @staticmethod
+    def _yil_dagilimi(faturalar):
+        yil_dagilimi = {}
+        for veri, _ in faturalar:
+            yil = fatura_yili(veri)
+            yil_dagilimi[yil] = yil_dagilimi.get(yil, 0) + 1
+        return yil_dagilimi
+
+    def _faturalari_ekle(self, faturalar, yillar=None, zaman=0):
+        """Bir arşivden gelen faturaları yıllara dağıtır.
+
+        ``yillar`` verilirse yalnızca o yıllara ait faturalar eklenir. Daha
+        önce eklenmiş faturaların tekrarları tekrar dizinine göre atlanır ya da
+        eskisinin yerine geçer; ``zaman`` arşivin değişiklik zamanıdır.
+        Arşivin tüm yıl dağılımını döndürür.
+        """
+        yil_dagilimi = {}
+        for veri, kalemler in faturalar:
+            yil = fatura_yili(veri)
             
-            print(f"Excel başarıyla oluşturuldu: {excel_yolu}")
-            print(f"Toplam fatura sayısı: {len(veriler)}")
-            print(f"Toplam kalem sayısı: {len(kalemler)}")
-            print(f"TRY Cinsinden Toplam: {try_toplam:,.2f} TL")
+            # Yıl dağılımını güncelle
+            yil_dagilimi[yil] = yil_dagilimi.get(yil, 0) + 1
+            if yillar is not None and yil not in yillar:
+                continue
             
-        except Exception as e:
-            print(f"Excel oluşturulurken hata: {e}")
-            raise 
\ No newline at end of file
+            if self.tekrarlar is not None:
+                kayit_no, cikarilacak = self.tekrarlar.kontrol(yil, veri, zaman)
+                if kayit_no is None:
+                    continue
+                if cikarilacak is not None:
+                    self.depo.cikar(cikarilacak)
+            
+            # Fatura verilerini sütunlu depoya ekle
+            tutamak = self.depo.fatura_ekle(yil, veri, kalemler)
+            if self.tekrarlar is not None:
+                self.tekrarlar.tutamak_ata(kayit_no, tutamak)
+            self.olcum.say('rapor_fatura')
+            self.olcum.say('rapor_kalem', len(kalemler))
+        return yil_dagilimi
+
+    def progress(self, message, stats=None, file_details=None):
+        if stats is None:
+            stats = {}
+        if file_details:
+            self.progress_callback(message, stats, file_details)
+
+    def _kopru_eklenecek_mi(self, fatura_sayisi):
+        if not self.kopru_ekle:
+            return False
+        return self.kopru_siniri is None or fatura_sayisi <= self.kopru_siniri
+
+    def excel_olustur(self, depo, yil, excel_yolu):
+        cakismalar, atlanan_tekrar = self._tekrar_bilgisi(yil)
+        return excel_raporu_yaz(
+            depo, yil, excel_yolu, self._kopru_eklenecek_mi(depo.satir_sayisi(yil, 'faturalar')),
+            cakismalar, atlanan_tekrar
+        )
+
+    def _tekrar_bilgisi(self, yil):
+        if self.tekrarlar is None:
+            return None, 0
+        return self.tekrarlar.cakismalar.get(yil), self.tekrarlar.atlanan.get(yil, 0)
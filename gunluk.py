@@ -0,0 +1,134 @@
+"""Günlük (logging) ayarları ve ayrıştırma hata defteri.
+
+Modüller ``gunlukcu(__name__)`` ile ``fatura`` kök günlükçüsünün altında
+günlük tutar. ``yapilandir`` komut satırı ve arayüz tarafından bir kez
+çağrılır; çağrılmazsa (kütüphane olarak kullanım) yalnızca uyarılar
+Python'un varsayılan işleyicisiyle stderr'e yazılır.
+
+Ayrıştırma hataları işçi süreçlerde günlüğe yazılmaz; ``hata_kaydi`` ile
+sözlüğe çevrilip sonuçla birlikte ana sürece döner. Ana süreç onları
+``HataDefteri``'ne ekler ve hız sınırlı olarak günlüğe yazar.
+"""
+import json
+import logging
+import threading
+import time
+
+KOK_GUNLUKCU = "fatura"
+
+# Komut satırındaki seviye adları
+SEVIYELER = {
+    'hata': logging.ERROR,
+    'uyari': logging.WARNING,
+    'bilgi': logging.INFO,
+    'ayrinti': logging.DEBUG,
+}
+
+# Hata defterindeki bir kaydın alanları
+HATA_ALANLARI = ('arsiv', 'uye', 'tur', 'alan', 'mesaj', 'karantina')
+
+
+def gunlukcu(ad):
+    return logging.getLogger(f"{KOK_GUNLUKCU}.{ad}")
+
+
+class HizSiniri(logging.Filter):
+    """Aynı yerden gelen kayıtları ``aralik`` saniyede en fazla ``adet`` ile sınırlar.
+
+    Kayıtlar günlükçü adı ve biçimlenmemiş mesaj şablonuyla gruplanır; bu
+    yüzden sınırlanacak mesajlar f-string yerine ``%s`` argümanlarıyla
+    yazılmalıdır. Bastırılan kayıtların sayısı, pencere dolduktan sonra
+    gelen ilk kayda eklenir. ERROR ve üstü hiç sınırlanmaz.
+    """
+
+    def __init__(self, adet=20, aralik=10.0):
+        super().__init__()
+        self.adet = adet
+        self.aralik = aralik
+        self._pencereler = {}  # (günlükçü, şablon) -> [başlangıç, geçen, bastırılan]
+        self._kilit = threading.Lock()
+
+    def filter(self, kayit):
+        if kayit.levelno >= logging.ERROR:
+            return True
+        anahtar = (kayit.name, kayit.msg)
+        simdi = time.monotonic()
+        with self._kilit:
+            pencere = self._pencereler.get(anahtar)
+            if pencere is None or simdi - pencere[0] >= self.aralik:
+                bastirilan = pencere[2] if pencere else 0
+                self._pencereler[anahtar] = [simdi, 1, 0]
+                if bastirilan:
+                    kayit.msg = f"{kayit.getMessage()} (benzer {bastirilan} mesaj bastırıldı)"
+                    kayit.args = None
+                return True
+            if pencere[1] < self.adet:
+                pencere[1] += 1
+                return True
+            pencere[2] += 1
+            return False
+
+
+def yapilandir(seviye=logging.INFO, akis=None, adet=20, aralik=10.0):
+    """``fatura`` günlükçüsünü stderr'e (ya da ``akis``'a) yazacak şekilde kurar.
+
+    Tekrar çağrılırsa önceki işleyicinin yerine geçer.
+    """
+    if isinstance(seviye, str):
+        seviye = SEVIYELER[seviye]
+    kok = logging.getLogger(KOK_GUNLUKCU)
+    for isleyici in list(kok.handlers):
+        if getattr(isleyici, 'fatura_isleyicisi', False):
+            kok.removeHandler(isleyici)
+    isleyici = logging.StreamHandler(akis)
+    isleyici.fatura_isleyicisi = True
+    isleyici.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(message)s", "%H:%M:%S"))
+    isleyici.addFilter(HizSiniri(adet, aralik))
+    kok.addHandler(isleyici)
+    kok.setLevel(seviye)
+    kok.propagate = False
+    return kok
+
+
+def hata_kaydi(arsiv, uye, hata, karantina=None):
+    """Bir istisnayı hata defterine yazılacak sözlüğe çevirir.
+
+    ``alan`` yalnızca eksik ya da okunamayan fatura alanlarında doludur.
+    """
+    return {
+        'arsiv': str(arsiv),
+        'uye': uye,
+        'tur': type(hata).__name__,
+        'alan': getattr(hata, 'alan', None),
+        'mesaj': str(hata),
+        'karantina': str(karantina) if karantina is not None else None
+    }
+
+
+class HataDefteri:
+    """Bir çalışmada ayrıştırılamayan arşiv ve XML'lerin listesi.
+
+    Çalışma sonunda çıktı dizinine satır başına bir JSON nesnesi olarak
+    yazılır (bkz. ``HATA_ALANLARI``).
+    """
+
+    def __init__(self):
+        self.kayitlar = []
+
+    def __len__(self):
+        return len(self.kayitlar)
+
+    def ekle(self, kayit):
+        self.kayitlar.append(kayit)
+
+    def ozet(self):
+        """Hata türü -> adet."""
+        turler = {}
+        for kayit in self.kayitlar:
+            turler[kayit['tur']] = turler.get(kayit['tur'], 0) + 1
+        return turler
+
+    def yaz(self, yol):
+        with open(yol, 'w', encoding='utf-8') as dosya:
+            for kayit in self.kayitlar:
+                dosya.write(json.dumps(kayit, ensure_ascii=False) + "\n")
@@ -0,0 +1,167 @@
+import asyncio
+import time
+import zipfile
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog yoksa klasör düzenli aralıklarla taranır
+    FileSystemEventHandler = object
+    Observer = None
+
+from fatura_isleyici import dosyalari_bul
+from gunluk import gunlukcu
+
+gunluk = gunlukcu(__name__)
+
+# watchdog varken olay kaçırılırsa diye yapılan güvenlik taramasının aralığı
+_GUVENLIK_TARAMASI = 30.0
+
+
+def klasor_goruntusu(dizin):
+    """Dizindeki zip dosyalarının ``{yol: (boyut, mtime_ns)}`` görüntüsü."""
+    goruntu = {}
+    for zip_yolu in dosyalari_bul(dizin, ".zip"):
+        try:
+            durum = zip_yolu.stat()
+        except OSError:
+            continue  # Tarama sırasında silinmiş
+        goruntu[zip_yolu] = (durum.st_size, durum.st_mtime_ns)
+    return goruntu
+
+
+class _OlayIsleyici(FileSystemEventHandler):
+    """watchdog olaylarını izleyicinin olay döngüsüne aktarır."""
+
+    def __init__(self, uyandir):
+        super().__init__()
+        self.uyandir = uyandir
+
+    def on_any_event(self, event):
+        yollar = (event.src_path, getattr(event, 'dest_path', ''))
+        if event.is_directory or any(str(yol).endswith('.zip') for yol in yollar):
+            self.uyandir()
+
+
+class KlasorIzleyici:
+    """``ana_dizin``'i izleyip yeni arşivler geldikçe raporları günceller.
+
+    Değişiklikler watchdog ile (Linux'ta inotify), kurulu değilse
+    ``yoklama_araligi`` saniyede bir klasör taranarak fark edilir. Yazılmakta
+    olan dosyalar, boyutu ve zamanı ``bekleme`` saniye boyunca değişmeyip
+    geçerli bir zip olana kadar bekletilir ve o turda işlenmez.
+
+    Her tur ``tum_yillari_isle``'yi çağırır; önbellek sayesinde yalnızca yeni
+    ya da değişen arşivler ayrıştırılır ve yalnızca etkilenen yılların
+    raporları yeniden yazılır. ``tur_bitti`` verilirse her turdan sonra
+    istatistiklerle çağrılır.
+    """
+
+    def __init__(self, isleyici, bekleme=2.0, yoklama_araligi=1.0, tur_bitti=None):
+        if not isleyici.onbellek_kullan:
+            raise ValueError("İzleme kipi önbellek gerektirir")
+        self.isleyici = isleyici
+        self.bekleme = bekleme
+        self.yoklama_araligi = yoklama_araligi
+        self.tur_bitti = tur_bitti
+        self.islenen = {}  # Son turda işlenen arşivlerin görüntüsü
+        self.adaylar = {}  # Değişen arşiv -> (görülen durum, ilk görülme zamanı)
+        self.bekleyenler = set()
+        self._uyandirici = None
+        self._durduruldu = False
+
+    def durdur(self):
+        self._durduruldu = True
+        # Süren tur da arşivler arasında kesilir; kalanı sonraki çalışmada işlenir
+        self.isleyici.iptal()
+        if self._uyandirici is not None:
+            self._uyandirici()
+
+    def _gozlemci_baslat(self):
+        if Observer is None:
+            gunluk.info("watchdog kurulu değil; klasör düzenli aralıklarla taranacak")
+            return None
+        try:
+            gozlemci = Observer()
+            gozlemci.schedule(_OlayIsleyici(self._uyandirici), str(self.isleyici.ana_dizin), recursive=True)
+            gozlemci.start()
+        except Exception as e:
+            gunluk.warning("Klasör olayları izlenemiyor, taramaya geçiliyor: %s", e)
+            return None
+        return gozlemci
+
+    def _degisiklikleri_bul(self):
+        """Klasörü tarar; ``(goruntu, hazir, silinen)`` döndürür.
+
+        Yerleşmemiş dosyalar ``bekleyenler`` kümesinde tutulur.
+        """
+        simdi = time.time()
+        goruntu = klasor_goruntusu(self.isleyici.ana_dizin)
+        hazir = set()
+        self.bekleyenler = set()
+        for zip_yolu, durum in goruntu.items():
+            if self.islenen.get(zip_yolu) == durum:
+                continue
+            onceki = self.adaylar.get(zip_yolu)
+            if onceki is None or onceki[0] != durum:
+                self.adaylar[zip_yolu] = onceki = (durum, simdi)
+            # Boyutu ve zamanı bir süredir değişmeyen (ya da zaten eski olan)
+            # dosya yerleşmiş sayılır; yarım yazılmış zip'in sonu okunamaz.
+            # Uzun süre bozuk kalan dosya hatası raporlansın diye yine işlenir
+            yerlesti = simdi - onceki[1] >= self.bekleme or simdi - durum[1] / 1e9 >= self.bekleme
+            bozuk_kaldi = simdi - onceki[1] >= 10 * self.bekleme
+            if yerlesti and (bozuk_kaldi or zipfile.is_zipfile(zip_yolu)):
+                hazir.add(zip_yolu)
+            else:
+                self.bekleyenler.add(zip_yolu)
+        silinen = self.islenen.keys() - goruntu.keys()
+        for zip_yolu in list(self.adaylar):
+            if zip_yolu not in goruntu:
+                del self.adaylar[zip_yolu]
+        return goruntu, hazir, silinen
+
+    async def _tur(self, goruntu):
+        # Yerleşmemiş arşivler bu turda yokmuş gibi davranılır
+        self.isleyici.haric_arsivler = set(self.bekleyenler)
+        try:
+            await self.isleyici.tum_yillari_isle()
+        except Exception as e:
+            gunluk.error("İzleme turu başarısız: %s", e)
+        finally:
+            self.isleyici.haric_arsivler = set()
+        self.islenen = {
+            zip_yolu: durum for zip_yolu, durum in goruntu.items() if zip_yolu not in self.bekleyenler
+        }
+        for zip_yolu in self.islenen:
+            self.adaylar.pop(zip_yolu, None)
+        if self.tur_bitti:
+            self.tur_bitti(self.isleyici.istatistikler)
+
+    def _bekleme_suresi(self, gozlemci):
+        if self.bekleyenler:
+            return min(self.yoklama_araligi, self.bekleme / 2)
+        return _GUVENLIK_TARAMASI if gozlemci is not None else self.yoklama_araligi
+
+    async def calistir(self):
+        """``durdur`` çağrılana ya da görev iptal edilene kadar izler."""
+        loop = asyncio.get_running_loop()
+        uyandir = asyncio.Event()
+        self._uyandirici = lambda: loop.call_soon_threadsafe(uyandir.set)
+        gozlemci = self._gozlemci_baslat()
+        gunluk.info("İzleniyor: %s", self.isleyici.ana_dizin.absolute())
+        try:
+            while not self._durduruldu:
+                goruntu, hazir, silinen = self._degisiklikleri_bul()
+                if hazir or silinen:
+                    await self._tur(goruntu)
+                    continue
+                try:
+                    await asyncio.wait_for(uyandir.wait(), self._bekleme_suresi(gozlemci))
+                except asyncio.TimeoutError:
+                    pass
+                uyandir.clear()
+        finally:
+            self._uyandirici = None
+            if gozlemci is not None:
+                gozlemci.stop()
+                gozlemci.join()
@@ -0,0 +1,57 @@
+"""Ayrıştırıcının ürettiği fatura ve kalem kayıtları.
+
+Kayıtlar alan adları tekrar tekrar saklanan sözlükler yerine ``NamedTuple``
+olarak tutulur; ilk alanlar depodaki ``FATURA_SUTUNLARI`` ve
+``KALEM_SUTUNLARI`` ile aynı sıradadır, depo onları konumla okur. Satıcı,
+alıcı, ürün ve para birimi metinleri ayrıştırılırken ``sys.intern`` ile
+paylaştırılır; işçi süreçlerinden dönen sonuç pickle edilirken de aynı
+nesneler bir kez yazılır.
+"""
+import sys
+from typing import NamedTuple, Optional
+
+
+class Fatura(NamedTuple):
+    siparis_tarihi: str
+    siparis_no: str
+    fatura_no: str
+    tarih: str
+    satici: str
+    alici: str
+    toplam: float
+    para_birimi: str
+    try_karsiligi: float
+    uuid: Optional[str] = None
+    # Fatura arşivden okunduktan sonra doldurulur
+    kaynak: Optional[str] = None
+    icerik_ozeti: Optional[str] = None
+
+
+class Kalem(NamedTuple):
+    siparis_no: str
+    kalem_no: str
+    urun: str
+    miktar: float
+    birim_fiyat: float
+    kdv_orani: float
+    kdv_tutari: float
+    toplam_tutar: float
+    para_birimi: str
+
+
+def paylas(metin):
+    """Tekrarlayan metni paylaşılan tek nesneye çevirir (None olduğu gibi kalır)."""
+    return metin if metin is None else sys.intern(metin)
+
+
+def kayitlari_coz(faturalar):
+    """Önbellekteki ``[[fatura, [kalem, ...]], ...]`` listelerini kayıtlara çevirir."""
+    sonuc = []
+    for veri, kalemler in faturalar:
+        veri[4], veri[5], veri[7] = paylas(veri[4]), paylas(veri[5]), paylas(veri[7])
+        sonuc.append((
+            Fatura(*veri),
+            [Kalem(siparis_no, kalem_no, paylas(urun), *sayilar, paylas(para_birimi))
+             for siparis_no, kalem_no, urun, *sayilar, para_birimi in kalemler]
+        ))
+    return sonuc
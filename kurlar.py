@@ -0,0 +1,212 @@
+"""Çevrimdışı TCMB döviz kuru tablosu.
+
+XML'inde ``PricingExchangeRate`` ya da ``PaymentAlternativeExchangeRate``
+bulunmayan dövizli faturaların TRY karşılığı, ayrıştırmadan sonra yılın tüm
+faturalarına tek seferde uygulanan vektörel bir birleştirmeyle bu tablodan
+hesaplanır. XML'deki kur her zaman önceliklidir.
+
+Desteklenen dosyalar:
+
+* TCMB günlük bülteni (``today.xml`` / ``AAAAGG.xml``); tek dosyada birden
+  çok ``Tarih_Date`` elemanı da olabilir.
+* EVDS CSV dışa aktarımı: ``Tarih`` sütunu ve ``TP_DK_USD_A_YTL`` gibi döviz
+  alış serileri.
+* Uzun CSV: ``Tarih``, ``Kod``, ``Kur`` ve isteğe bağlı ``Birim`` sütunları.
+
+Bir dizin verilirse içindeki tüm ``.xml`` ve ``.csv`` dosyaları okunur.
+
+pandas ve NumPy fonksiyonların içinde yüklenir; kur tablosu olmayan ya da
+kapatılan çalışmalar ve ``kur_tablosu_bul`` onları yüklemez.
+"""
+import hashlib
+import os
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+# Kur tablosu verilmediğinde sırayla bakılan konumlar; her biri dizin ya da
+# .xml/.csv uzantılı dosya olabilir
+KUR_TABLOSU_DEGISKENI = "FATURA_KUR_TABLOSU"
+KUR_TABLOSU_KONUMLARI = (
+    Path.home() / ".config" / "fatura_isleyici" / "kur_tablosu",
+    Path(__file__).resolve().parent / "kur_tablosu",
+)
+
+# Fatura tarihinden bu kadar günden eski kur kullanılmaz; tatil ve hafta
+# sonlarını kapsar ama tablonun bittiği yerden sonrası için tahmin yapmaz
+EN_ESKI_KUR_GUNU = 10
+
+_EVDS_SERISI = re.compile(r'^TP[\W_]DK[\W_]([A-Z]{3})[\W_]A(?:[\W_]YTL)?$')
+_TARIH_BICIMLERI = ('%d-%m-%Y', '%d.%m.%Y', '%Y-%m-%d', '%d/%m/%Y')
+
+
+def _gunler(tarihler, bicimler=_TARIH_BICIMLERI):
+    """Metin tarihleri 1970'ten beri gün sayısına çevirir; okunamayanlar NaT olur."""
+    import pandas as pd
+    seri = pd.Series(tarihler, dtype=object)
+    en_iyi = None
+    for bicim in bicimler:
+        cevrilen = pd.to_datetime(seri, format=bicim, errors='coerce')
+        if en_iyi is None or cevrilen.notna().sum() > en_iyi.notna().sum():
+            en_iyi = cevrilen
+        if en_iyi.notna().sum() == seri.notna().sum():
+            break
+    return en_iyi.to_numpy(dtype='datetime64[D]')
+
+
+def _tcmb_xml_oku(yol):
+    import pandas as pd
+    kayitlar = []
+    for bulten in ET.parse(yol).getroot().iter('Tarih_Date'):
+        tarih = bulten.get('Tarih')
+        for doviz in bulten.iter('Currency'):
+            kod = doviz.get('CurrencyCode') or doviz.get('Kod')
+            kur = doviz.findtext('ForexBuying')
+            if not kod or not kur or not kur.strip():
+                continue
+            birim = float(doviz.findtext('Unit') or 1)
+            kayitlar.append((tarih, kod, float(kur) / birim))
+    return pd.DataFrame(kayitlar, columns=['Tarih', 'Kod', 'Kur'])
+
+
+def _csv_oku(yol):
+    import pandas as pd
+    tablo = pd.read_csv(yol, dtype=str, skipinitialspace=True)
+    tablo.columns = [str(sutun).strip() for sutun in tablo.columns]
+    if 'Tarih' not in tablo.columns:
+        raise ValueError(f"{yol}: 'Tarih' sütunu yok")
+    if 'Kod' in tablo.columns and 'Kur' in tablo.columns:
+        birim = pd.to_numeric(tablo['Birim'], errors='coerce').fillna(1) if 'Birim' in tablo.columns else 1
+        tablo = pd.DataFrame({
+            'Tarih': tablo['Tarih'],
+            'Kod': tablo['Kod'].str.strip().str.upper(),
+            'Kur': pd.to_numeric(tablo['Kur'], errors='coerce') / birim
+        })
+        return tablo
+    # EVDS geniş biçimi: her döviz alış serisi ayrı sütun
+    seriler = {sutun: eslesme.group(1) for sutun in tablo.columns if (eslesme := _EVDS_SERISI.match(sutun))}
+    if not seriler:
+        raise ValueError(f"{yol}: tanınan kur sütunu yok")
+    tablo = tablo.melt(id_vars=['Tarih'], value_vars=list(seriler), var_name='Kod', value_name='Kur')
+    tablo['Kod'] = tablo['Kod'].map(seriler)
+    tablo['Kur'] = pd.to_numeric(tablo['Kur'], errors='coerce')
+    return tablo
+
+
+class KurTablosu:
+    """``(tarih, para birimi) -> 1 birimin TRY kuru`` tablosu.
+
+    Her para birimi için tarih sıralı gün ve kur dizileri tutulur; arama
+    ``np.searchsorted`` ile yapılır. Bir fatura için fatura tarihinden önce
+    ilan edilen son kur (TCMB döviz alışı) kullanılır.
+    """
+
+    def __init__(self, kurlar):
+        # kod -> (gün dizisi, kur dizisi)
+        self.kurlar = kurlar
+        ozet = hashlib.blake2b(digest_size=16)
+        for kod in sorted(kurlar):
+            gunler, degerler = kurlar[kod]
+            ozet.update(kod.encode())
+            ozet.update(gunler.tobytes())
+            ozet.update(degerler.tobytes())
+        # Tablo değişince raporların yeniden üretilmesi için önbelleğe yazılır
+        self.ozet = ozet.hexdigest()
+
+    @classmethod
+    def yukle(cls, yol):
+        """Bir kur dosyasını ya da dizinini okur."""
+        import numpy as np
+        import pandas as pd
+        yol = Path(yol)
+        if yol.is_dir():
+            dosyalar = sorted(p for p in yol.rglob('*') if p.suffix.lower() in ('.xml', '.csv'))
+        else:
+            dosyalar = [yol]
+        parcalar = []
+        for dosya in dosyalar:
+            parca = _tcmb_xml_oku(dosya) if dosya.suffix.lower() == '.xml' else _csv_oku(dosya)
+            # Tarih biçimi dosyadan dosyaya değişebilir
+            parca['Gun'] = _gunler(parca['Tarih'])
+            parcalar.append(parca)
+        if not parcalar:
+            raise ValueError(f"Kur dosyası bulunamadı: {yol}")
+        tablo = pd.concat(parcalar, ignore_index=True)
+        tablo = tablo.dropna(subset=['Gun', 'Kur'])
+        tablo = tablo[tablo['Kur'] > 0]
+        # Aynı gün birden çok dosyada varsa sonra okunan geçerlidir
+        tablo = tablo.drop_duplicates(subset=['Kod', 'Gun'], keep='last').sort_values(['Kod', 'Gun'])
+        kurlar = {
+            kod: (grup['Gun'].to_numpy(dtype='datetime64[D]').astype(np.int64), grup['Kur'].to_numpy(dtype=np.float64))
+            for kod, grup in tablo.groupby('Kod', sort=True)
+        }
+        if not kurlar:
+            raise ValueError(f"Kur bulunamadı: {yol}")
+        return cls(kurlar)
+
+    def __len__(self):
+        return sum(len(gunler) for gunler, _ in self.kurlar.values())
+
+    def kurlari_bul(self, tarihler, para_birimleri):
+        """Her satır için kuru döndürür; bulunamayanlar NaN olur."""
+        import numpy as np
+        import pandas as pd
+        tarihler = np.asarray(tarihler, dtype=object)
+        try:
+            # Fatura tarihleri ISO biçimindedir; NumPy bunları pandas'tan hızlı çevirir
+            gunler = np.array(tarihler, dtype='datetime64[D]')
+        except ValueError:
+            gunler = _gunler(tarihler, ('%Y-%m-%d',))
+        tarih_var = ~np.isnat(gunler)
+        gunler = gunler.astype(np.int64)
+        para_birimleri = pd.Categorical(para_birimleri)
+        kodlar = para_birimleri.codes
+        sonuc = np.full(len(gunler), np.nan)
+        for kod_no, kod in enumerate(para_birimleri.categories):
+            tablo = self.kurlar.get(kod)
+            if tablo is None:
+                continue
+            tablo_gunleri, tablo_kurlari = tablo
+            secim = np.flatnonzero((kodlar == kod_no) & tarih_var)
+            # Fatura gününden kesin önce ilan edilen son kur
+            konum = np.searchsorted(tablo_gunleri, gunler[secim], side='left') - 1
+            gecerli = konum >= 0
+            gecerli[gecerli] = gunler[secim[gecerli]] - tablo_gunleri[konum[gecerli]] <= EN_ESKI_KUR_GUNU
+            sonuc[secim[gecerli]] = tablo_kurlari[konum[gecerli]]
+        return sonuc
+
+    def try_karsiligi_doldur(self, faturalar):
+        """Kur bilgisi olmayan dövizli faturaların TRY karşılığını hesaplar.
+
+        ``faturalar`` depo ``faturalar`` tablosunun bir parçasıdır. Yeni
+        ``TRY Karşılığı`` dizisini, tablodan çevrilen ve kuru bulunamayan
+        satır sayılarıyla birlikte döndürür. XML'den gelen karşılık (sıfır
+        değilse) değiştirilmez.
+        """
+        import numpy as np
+        import pandas as pd
+        try_karsiligi = faturalar['TRY Karşılığı'].to_numpy(dtype=np.float64, copy=True)
+        # Para birimi sözlük kodludur; karşılaştırma kodlar üzerinde yapılır
+        para_birimleri = pd.Categorical(faturalar['Para Birimi'])
+        try_kodu = para_birimleri.categories.get_indexer(['TRY'])[0]
+        # Ayrıştırıcı kursuz dövizli faturaların karşılığını 0 yazar
+        eksik = np.flatnonzero((para_birimleri.codes != try_kodu) & (try_karsiligi == 0))
+        if not len(eksik):
+            return try_karsiligi, 0, 0
+        kurlar = self.kurlari_bul(faturalar['Tarih'].take(eksik), para_birimleri.take(eksik))
+        bulunan = ~np.isnan(kurlar)
+        toplamlar = faturalar['Toplam'].to_numpy(dtype=np.float64)[eksik[bulunan]]
+        try_karsiligi[eksik[bulunan]] = toplamlar * kurlar[bulunan]
+        cevrilen = int(bulunan.sum())
+        return try_karsiligi, cevrilen, len(eksik) - cevrilen
+
+
+def kur_tablosu_bul():
+    """Varsayılan konumlardaki ilk kur tablosunun yolu (yoksa None)."""
+    if os.environ.get(KUR_TABLOSU_DEGISKENI):
+        return Path(os.environ[KUR_TABLOSU_DEGISKENI])
+    for konum in KUR_TABLOSU_KONUMLARI:
+        for aday in (konum, konum.with_suffix('.xml'), konum.with_suffix('.csv')):
+            if aday.exists():
+                return aday
+    return None
@@ -1,9 +1,264 @@
+"""Fatura İşleyici komut satırı girişi.
+
+Arayüz olmadan (sunucu, cron) toplu çalıştırma içindir. İlerleme olayları
+stdout'a satır başına bir JSON nesnesi olarak yazılır; diğer tüm çıktılar
+stderr'e gider.
+
+Örnek: ``python main.py /arsiv /raporlar --isci 8 --yil 2023 --yil 2024``
+
+Parçalı çalışma: her parça ``python main.py /arsiv /parcalar/3 --parca 3/8``
+ile ayrı çalıştırılır, ardından ``python main.py /parcalar /raporlar
+--birlestir`` raporları üretir.
+"""
+import argparse
 import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+import gunluk
+from disa_aktarim import CIKTI_FORMATLARI, PARQUET_DESTEKLI
 from fatura_isleyici import FaturaIsleyici
+from izleyici import KlasorIzleyici
+from parca import PARCA_ANAHTARLARI, Parca
+from tekrar import TEKRAR_POLITIKALARI
+
+# Çıkış kodları
+BASARILI = 0
+HATA = 1
+GECERSIZ_ARGUMAN = 2
+KISMI_BASARI = 3  # Bazı arşivler ya da raporlar işlenemedi
+IPTAL_EDILDI = 4  # Sinyalle durduruldu; sonraki çalışma kaldığı yerden devam eder
+
+
+def argumanlari_ayristir(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="fatura-isleyici",
+        description="Paraşüt e-fatura zip arşivlerinden yıllık raporlar üretir."
+    )
+    parser.add_argument('girdi', type=Path, help="Zip arşivlerinin bulunduğu dizin")
+    parser.add_argument('cikti', type=Path, help="Raporların yazılacağı dizin")
+    parser.add_argument('--isci', type=int, default=None,
+                        help="Ayrıştırma için süreç sayısı (varsayılan: çekirdek sayısı)")
+    parser.add_argument('--format', dest='formatlar', action='append', choices=CIKTI_FORMATLARI,
+                        help="Çıktı formatı; birden fazla kez verilebilir (varsayılan: xlsx)")
+    parser.add_argument('--excel-siniri', type=int, default=None,
+                        help="Bu sayıdan fazla faturası olan yıllar için Excel raporu yazma")
+    onbellek = parser.add_mutually_exclusive_group()
+    onbellek.add_argument('--onbellek', type=Path, default=None,
+                          help="Önbellek dosyasının yolu (varsayılan: <cikti>/fatura_onbellek.sqlite)")
+    onbellek.add_argument('--onbelleksiz', action='store_true',
+                          help="Önbelleği kullanma, tüm arşivleri yeniden işle")
+    kur = parser.add_mutually_exclusive_group()
+    kur.add_argument('--kur-tablosu', type=Path, default=None,
+                     help="Kuru XML'de olmayan dövizli faturalar için TCMB kur dosyası ya da dizini "
+                          "(varsayılan: $FATURA_KUR_TABLOSU, ~/.config/fatura_isleyici/kur_tablosu)")
+    kur.add_argument('--kur-tablosuz', action='store_true',
+                     help="Kur tablosu kullanma; kursuz dövizli faturaların TRY karşılığı 0 kalır")
+    parser.add_argument('--yil', dest='yillar', action='append', type=int,
+                        help="Yalnızca bu yılın raporunu üret; birden fazla kez verilebilir")
+    parser.add_argument('--temp', action='store_true',
+                        help="Arşivleri bellekte okumak yerine temp dizinine çıkar")
+    parser.add_argument('--rapor-isci', type=int, default=None,
+                        help="Yıllık raporları paralel yazacak en fazla süreç sayısı (varsayılan: --isci)")
+    parser.add_argument('--kuyruk-siniri', type=int, default=None,
+                        help="Keşfedilip henüz birleştirilmemiş en fazla arşiv sayısı; ayrıştırma "
+                             "sonuçlarının bellekte kapladığı yeri sınırlar (varsayılan: 2 x --isci)")
+    parser.add_argument('--okuma-siniri', type=int, default=None,
+                        help="Arşivleri ayrıştırıcılardan önce, aynı anda en fazla bu kadarını okuyarak oku; "
+                             "ağ paylaşımları için (varsayılan: okuma yavaşsa 4)")
+    parser.add_argument('--kopru-siniri', type=int, default=None,
+                        help="Bu sayıdan fazla faturası olan raporlarda Sipariş No bağlantılarını atla")
+    parser.add_argument('--tekrar', choices=TEKRAR_POLITIKALARI + ('kapali',), default='ilk',
+                        help="Arşivler arası tekrar eden faturalardan hangisi tutulsun: ilk görülen, "
+                             "arşivi daha yeni olan ya da ayıklama yapılmasın (varsayılan: ilk)")
+    parser.add_argument('--karantina', type=Path, default=None,
+                        help="Okunamayan XML'lerin kopyalanacağı dizin (hepsi <cikti>/hata_defteri.jsonl'a yazılır)")
+    parser.add_argument('--gunluk', choices=tuple(gunluk.SEVIYELER), default='bilgi',
+                        help="stderr'e yazılan günlüğün seviyesi (varsayılan: bilgi)")
+    parser.add_argument('--parca', default=None, metavar='NO/SAYI',
+                        help="Yalnızca bu parçaya düşen arşivleri ayrıştırıp önbelleğe yaz (örn. 0/4); "
+                             "rapor üretilmez")
+    parser.add_argument('--parca-anahtari', choices=PARCA_ANAHTARLARI, default='yol',
+                        help="Arşivler parçalara göreli yollarına ya da dizinlerine göre dağıtılır (varsayılan: yol)")
+    parser.add_argument('--birlestir', action='store_true',
+                        help="Girdi, alt dizinlerinde parça çıktıları olan dizindir; raporları "
+                             "arşivleri yeniden ayrıştırmadan parçalardan üret")
+    parser.add_argument('--izle', action='store_true',
+                        help="Bitince çıkma; girdi dizinini izleyip yeni arşivler geldikçe raporları güncelle")
+    parser.add_argument('--izle-bekleme', type=float, default=2.0,
+                        help="Yeni bir dosyanın yerleşmiş sayılması için değişmeden geçmesi gereken saniye")
+    args = parser.parse_args(argv)
+    if args.isci is not None and args.isci < 1:
+        parser.error("--isci en az 1 olmalı")
+    if args.rapor_isci is not None and args.rapor_isci < 1:
+        parser.error("--rapor-isci en az 1 olmalı")
+    if args.kuyruk_siniri is not None and args.kuyruk_siniri < 1:
+        parser.error("--kuyruk-siniri en az 1 olmalı")
+    if args.okuma_siniri is not None and args.okuma_siniri < 1:
+        parser.error("--okuma-siniri en az 1 olmalı")
+    if args.kur_tablosu is not None and not args.kur_tablosu.exists():
+        parser.error(f"Kur tablosu bulunamadı: {args.kur_tablosu}")
+    if args.izle and args.onbelleksiz:
+        parser.error("--izle önbellek gerektirir, --onbelleksiz ile kullanılamaz")
+    if args.parca is not None:
+        try:
+            args.parca = Parca.ayristir(args.parca, args.parca_anahtari)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.onbelleksiz:
+            parser.error("--parca önbellek gerektirir, --onbelleksiz ile kullanılamaz")
+        if args.birlestir:
+            parser.error("--parca ve --birlestir birlikte kullanılamaz")
+    if args.birlestir and args.izle:
+        parser.error("--birlestir ve --izle birlikte kullanılamaz")
+    args.formatlar = list(dict.fromkeys(args.formatlar or ['xlsx']))
+    if 'parquet' in args.formatlar and not PARQUET_DESTEKLI:
+        parser.error("--format parquet için pyarrow kurulu olmalı")
+    return args
+
+
+class JsonIlerleme:
+    """progress_callback olaylarını satır başına bir JSON nesnesi olarak yazar."""
+
+    def __init__(self, cikis):
+        self.cikis = cikis
+
+    def yaz(self, olay, **alanlar):
+        kayit = {'olay': olay, 'zaman': round(time.time(), 3), **alanlar}
+        self.cikis.write(json.dumps(kayit, ensure_ascii=False, default=str) + "\n")
+        self.cikis.flush()
+
+    def __call__(self, message, stats, file_details):
+        self.yaz('ilerleme', mesaj=message, istatistik=stats, dosya=file_details or None)
+
+
+def json_cikisini_ayir():
+    """stdout'u yalnızca JSON satırlarına ayırır.
+
+    Asıl stdout'un bir kopyası JSON için döndürülür; dosya tanımlayıcısı 1
+    stderr'e yönlendirilir, böylece işçi süreçlerin çıktıları da JSON akışına
+    karışmaz.
+    """
+    sys.stdout.flush()
+    cikis = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    return cikis
+
+
+def isleyici_olustur(args, ilerleme):
+    isleyici = FaturaIsleyici(
+        args.girdi,
+        args.cikti,
+        temp_kullan=args.temp,
+        isci_sayisi=args.isci,
+        onbellek_kullan=not args.onbelleksiz,
+        onbellek_yolu=args.onbellek,
+        kopru_siniri=args.kopru_siniri,
+        yillar=args.yillar,
+        tekrar_politikasi=None if args.tekrar == 'kapali' else args.tekrar,
+        rapor_isci_sayisi=args.rapor_isci,
+        kuyruk_siniri=args.kuyruk_siniri,
+        okuma_siniri=args.okuma_siniri,
+        formatlar=args.formatlar,
+        excel_siniri=args.excel_siniri,
+        kur_tablosu=False if args.kur_tablosuz else args.kur_tablosu,
+        karantina_dizini=args.karantina,
+        parca=args.parca
+    )
+    isleyici.progress_callback = ilerleme
+    return isleyici
+
+
+def iptal_sinyallerini_bagla(iptal):
+    """İlk SIGINT/SIGTERM'de ``iptal``'i çağırır; ikincisi süreci hemen durdurur."""
+    loop = asyncio.get_running_loop()
+
+    def sinyal_geldi(sinyal):
+        loop.remove_signal_handler(sinyal)
+        iptal()
+
+    for sinyal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sinyal, sinyal_geldi, sinyal)
+        except (NotImplementedError, AttributeError):  # Windows
+            pass
+
+
+async def calistir(args, ilerleme):
+    isleyici = isleyici_olustur(args, ilerleme)
+    iptal_sinyallerini_bagla(isleyici.iptal)
+    if args.birlestir:
+        await isleyici.parcalari_birlestir(parca_dizinleri(args.girdi, isleyici.onbellek_yolu.name))
+    else:
+        await isleyici.tum_yillari_isle()
+    return isleyici.istatistikler
+
+
+def parca_dizinleri(dizin, onbellek_adi):
+    """``dizin``'in önbellek dosyası bulunan alt dizinleri, ada göre sıralı."""
+    return sorted(alt for alt in dizin.iterdir() if (alt / onbellek_adi).is_file())
+
+
+def ozet_yaz(ilerleme, istatistikler):
+    sure = istatistikler['sure_saniye']
+    ilerleme.yaz(
+        'ozet',
+        **istatistikler,
+        fatura_per_saniye=round(istatistikler['bulunan_fatura'] / sure, 1) if sure else None
+    )
+
+
+async def izle(args, ilerleme):
+    izleyici = KlasorIzleyici(
+        isleyici_olustur(args, ilerleme),
+        bekleme=args.izle_bekleme,
+        tur_bitti=lambda istatistikler: ozet_yaz(ilerleme, istatistikler)
+    )
+    # Ctrl+C ya da servis olarak çalışırken SIGTERM ile temiz kapanış
+    iptal_sinyallerini_bagla(izleyici.durdur)
+    await izleyici.calistir()
+
+
+def main(argv=None):
+    args = argumanlari_ayristir(argv)
+    ilerleme = JsonIlerleme(json_cikisini_ayir())
+    gunluk.yapilandir(args.gunluk)
+
+    if not args.girdi.is_dir():
+        ilerleme.yaz('hata', mesaj=f"Girdi dizini bulunamadı: {args.girdi}")
+        return GECERSIZ_ARGUMAN
+
+    ilerleme.yaz('basladi', girdi=str(args.girdi.absolute()), cikti=str(args.cikti.absolute()),
+                 isci=args.isci or os.cpu_count(), formatlar=args.formatlar, yillar=args.yillar,
+                 izle=args.izle, parca=str(args.parca) if args.parca else None, birlestir=args.birlestir)
+    if args.izle:
+        # Ctrl+C ya da SIGTERM ile durana kadar her turun özeti ayrı yazılır
+        try:
+            asyncio.run(izle(args, ilerleme))
+        except KeyboardInterrupt:
+            pass
+        ilerleme.yaz('durdu')
+        return BASARILI
+
+    try:
+        istatistikler = asyncio.run(calistir(args, ilerleme))
+    except Exception as e:
+        ilerleme.yaz('hata', mesaj=str(e), tur=type(e).__name__)
+        return HATA
+
+    ozet_yaz(ilerleme, istatistikler)
+    if istatistikler['iptal_edildi']:
+        return IPTAL_EDILDI
+    if istatistikler['hatali_dosya'] or istatistikler['hatali_raporlar']:
+        return KISMI_BASARI
+    return BASARILI
 
-async def main():
-    isleyici = FaturaIsleyici()
-    await isleyici.tum_yillari_isle()
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    multiprocessing.freeze_support()
+    sys.exit(main())
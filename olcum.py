@@ -0,0 +1,183 @@
+import cProfile
+import io
+import json
+import math
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# FATURA_PROFIL ortam değişkeni: 'cprofile', 'tracemalloc' ya da 'hepsi'.
+# Kod değiştirmeden bir çalışmayı profillemek için kullanılır.
+PROFIL_DEGISKENI = "FATURA_PROFIL"
+
+
+def tepe_bellek():
+    """Bu sürecin ve bitmiş alt süreçlerin en yüksek RSS değeri (bayt)."""
+    if resource is None:
+        return {}
+    # Linux KB, macOS bayt döndürür
+    carpan = 1 if sys.platform == 'darwin' else 1024
+    return {
+        'ana_surec': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * carpan,
+        'alt_surecler': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * carpan
+    }
+
+
+class Histogram:
+    """Milisaniye cinsinden 2'nin kuvveti aralıklı gecikme histogramı."""
+
+    def __init__(self):
+        self.kovalar = {}  # üst sınır (ms) -> adet
+        self.adet = 0
+        self.toplam = 0.0
+        self.en_kucuk = math.inf
+        self.en_buyuk = 0.0
+
+    def ekle(self, saniye):
+        ms = saniye * 1000
+        ust_sinir = 2 ** max(0, math.ceil(math.log2(ms))) if ms > 0 else 1
+        self.kovalar[ust_sinir] = self.kovalar.get(ust_sinir, 0) + 1
+        self.adet += 1
+        self.toplam += ms
+        self.en_kucuk = min(self.en_kucuk, ms)
+        self.en_buyuk = max(self.en_buyuk, ms)
+
+    def yuzdelik(self, oran):
+        # Kova üst sınırına göre yaklaşık değer
+        hedef = oran * self.adet
+        birikimli = 0
+        for ust_sinir in sorted(self.kovalar):
+            birikimli += self.kovalar[ust_sinir]
+            if birikimli >= hedef:
+                return ust_sinir
+        return 0
+
+    def ozet(self):
+        if not self.adet:
+            return {'adet': 0}
+        return {
+            'adet': self.adet,
+            'ortalama_ms': round(self.toplam / self.adet, 3),
+            'en_kucuk_ms': round(self.en_kucuk, 3),
+            'en_buyuk_ms': round(self.en_buyuk, 3),
+            'p50_ms': self.yuzdelik(0.50),
+            'p90_ms': self.yuzdelik(0.90),
+            'p99_ms': self.yuzdelik(0.99),
+            'kovalar_ms': {f"<={ust_sinir}": adet for ust_sinir, adet in sorted(self.kovalar.items())}
+        }
+
+
+class CalismaOlcumu:
+    """Bir tum_yillari_isle çalışmasının aşama süreleri, sayaçları ve gecikmeleri.
+
+    Aşamalar ``with olcum.asama('ad'):`` ile ölçülür; aynı aşama birden çok
+    kez girilirse süreler toplanır. İşçi süreçlerinin arşiv başına gönderdiği
+    ölçümler ``arsiv_olcumu_ekle`` ile toplanır.
+    """
+
+    def __init__(self):
+        self.baslangic = time.perf_counter()
+        self.asamalar = {}
+        self.sayaclar = {}
+        self.arsiv_gecikmeleri = Histogram()
+
+    @contextmanager
+    def asama(self, ad):
+        baslangic = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.asamalar[ad] = self.asamalar.get(ad, 0.0) + time.perf_counter() - baslangic
+
+    def say(self, ad, miktar=1):
+        self.sayaclar[ad] = self.sayaclar.get(ad, 0) + miktar
+
+    def sure_ekle(self, ad, saniye):
+        """Aşama süresine, ``asama`` dışında ölçülen süreyi ekler."""
+        self.asamalar[ad] = self.asamalar.get(ad, 0.0) + saniye
+
+    def arsiv_olcumu_ekle(self, arsiv_olcumu):
+        self.arsiv_gecikmeleri.ekle(arsiv_olcumu['sure'])
+        self.say('arsiv_bayt', arsiv_olcumu['arsiv_bayt'])
+        self.say('acilan_bayt', arsiv_olcumu['acilan_bayt'])
+        self.say('xml_sayisi', arsiv_olcumu['xml_sayisi'])
+        self.say('ayni_xml', arsiv_olcumu['ayni_xml'])
+        # İşçilerde harcanan süre; paralel çalıştığı için duvar saatini aşabilir
+        self.asamalar['isci_okuma'] = self.asamalar.get('isci_okuma', 0.0) + arsiv_olcumu['okuma_suresi']
+        self.asamalar['isci_acma'] = self.asamalar.get('isci_acma', 0.0) + arsiv_olcumu['acma_suresi']
+        self.asamalar['isci_ayristirma'] = (
+            self.asamalar.get('isci_ayristirma', 0.0) + arsiv_olcumu['ayristirma_suresi']
+        )
+
+    def rapor(self, istatistikler=None):
+        sure = time.perf_counter() - self.baslangic
+        fatura = self.sayaclar.get('fatura', 0)
+        kalem = self.sayaclar.get('kalem', 0)
+        return {
+            'zaman': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'sure_saniye': round(sure, 4),
+            'asamalar_saniye': {ad: round(deger, 4) for ad, deger in self.asamalar.items()},
+            'sayaclar': dict(self.sayaclar),
+            'fatura_per_saniye': round(fatura / sure, 1) if sure else None,
+            'kalem_per_saniye': round(kalem / sure, 1) if sure else None,
+            'arsiv_gecikmesi': self.arsiv_gecikmeleri.ozet(),
+            'tepe_bellek_bayt': tepe_bellek(),
+            'istatistikler': istatistikler or {}
+        }
+
+
+class Profilleyici:
+    """FATURA_PROFIL ortam değişkenine göre cProfile ve/veya tracemalloc çalıştırır.
+
+    Değişken tanımlı değilse hiçbir şey yapmaz. Yalnızca ana süreci profiller;
+    işçi süreçlerindeki ayrıştırmayı görmek için ``isci_sayisi=1`` ile çalıştırın.
+    """
+
+    def __init__(self, cikti_dizin, kip=None):
+        self.cikti_dizin = cikti_dizin
+        kip = (kip if kip is not None else os.environ.get(PROFIL_DEGISKENI, '')).lower()
+        self.cprofile = kip in ('cprofile', 'hepsi')
+        self.tracemalloc = kip in ('tracemalloc', 'hepsi')
+        self._profil = None
+        self.ozet = {}
+
+    def __enter__(self):
+        if self.tracemalloc:
+            tracemalloc.start(10)
+        if self.cprofile:
+            self._profil = cProfile.Profile()
+            self._profil.enable()
+        return self
+
+    def __exit__(self, *_):
+        if self._profil is not None:
+            self._profil.disable()
+        self.ozet = {}
+        if self._profil is not None:
+            profil_yolu = self.cikti_dizin / "calisma_profili.prof"
+            self._profil.dump_stats(profil_yolu)
+            metin = io.StringIO()
+            pstats.Stats(self._profil, stream=metin).sort_stats('cumulative').print_stats(25)
+            self.ozet['cprofile'] = {'dosya': str(profil_yolu), 'en_pahali': metin.getvalue()}
+        if self.tracemalloc and tracemalloc.is_tracing():
+            anlik = tracemalloc.take_snapshot()
+            _, tepe = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.ozet['tracemalloc'] = {
+                'tepe_bayt': tepe,
+                'en_cok_ayiran': [str(istatistik) for istatistik in anlik.statistics('lineno')[:25]]
+            }
+        return False
+
+
+def rapor_yaz(yol, rapor):
+    with open(yol, 'w', encoding='utf-8') as dosya:
+        json.dump(rapor, dosya, ensure_ascii=False, indent=2)
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import sqlite3
+import zlib
+from pathlib import Path
+
+# Ayrıştırıcının ürettiği kayıt biçimi değiştiğinde artırılır; eski sürümle
+# yazılmış önbellek tamamen yeniden oluşturulur
+ONBELLEK_SURUMU = 4
+
+
+def dosya_ozeti(yol, parca_boyutu=1 << 20):
+    """Dosya içeriğinin BLAKE2b özetini parça parça okuyarak hesaplar."""
+    ozet = hashlib.blake2b(digest_size=16)
+    with open(yol, 'rb') as dosya:
+        while parca := dosya.read(parca_boyutu):
+            ozet.update(parca)
+    return ozet.hexdigest()
+
+
+def bayt_ozeti(baytlar):
+    """Bellekteki dosya içeriğinin ``dosya_ozeti`` ile aynı özeti."""
+    return hashlib.blake2b(baytlar, digest_size=16).hexdigest()
+
+
+class ArsivOnbellegi:
+    """Arşiv başına ayrıştırılmış faturaları saklayan kalıcı SQLite manifest'i.
+
+    Her arşiv yolu, boyutu, değişiklik zamanı ve içerik özetiyle birlikte
+    saklanır. Boyut ve zaman aynıysa arşiv değişmemiş sayılır; yalnızca zaman
+    değişmişse içerik özeti karşılaştırılır.
+    """
+
+    def __init__(self, db_yolu):
+        self.db_yolu = Path(db_yolu)
+        self.db_yolu.parent.mkdir(exist_ok=True, parents=True)
+        self.baglanti = sqlite3.connect(self.db_yolu)
+        self.baglanti.execute("PRAGMA journal_mode=WAL")
+        self.baglanti.execute("PRAGMA synchronous=NORMAL")
+        self._tablolari_hazirla()
+
+    def _tablolari_hazirla(self):
+        self.baglanti.execute("CREATE TABLE IF NOT EXISTS meta (anahtar TEXT PRIMARY KEY, deger TEXT)")
+        satir = self.baglanti.execute("SELECT deger FROM meta WHERE anahtar = 'surum'").fetchone()
+        if satir is None or int(satir[0]) != ONBELLEK_SURUMU:
+            # Ayarlar da silinen kayıtlara aittir (bekleyen yıllar, parça bilgisi)
+            self.baglanti.execute("DROP TABLE IF EXISTS arsivler")
+            self.baglanti.execute("DELETE FROM meta")
+            self.baglanti.execute(
+                "INSERT OR REPLACE INTO meta (anahtar, deger) VALUES ('surum', ?)",
+                (str(ONBELLEK_SURUMU),)
+            )
+        self.baglanti.execute("""
+            CREATE TABLE IF NOT EXISTS arsivler (
+                yol TEXT PRIMARY KEY,
+                boyut INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                ozet TEXT NOT NULL,
+                yil_dagilimi TEXT NOT NULL,
+                faturalar BLOB NOT NULL,
+                hatalar TEXT NOT NULL DEFAULT '[]'
+            )
+        """)
+        self.baglanti.commit()
+
+    @staticmethod
+    def anahtar(zip_yolu):
+        """Arşivin önbellekteki anahtarı (çözümlenmiş mutlak yol)."""
+        return str(Path(zip_yolu).resolve())
+
+    def kontrol(self, zip_yolu):
+        """Arşivin önbellekteki kaydı güncel mi, bakar.
+
+        ``(guncel, yil_dagilimi)`` döndürür; ``yil_dagilimi`` önbellekte
+        kayıtlı dağılımdır (kayıt yoksa boş sözlük).
+        """
+        anahtar = self.anahtar(zip_yolu)
+        satir = self.baglanti.execute(
+            "SELECT boyut, mtime_ns, ozet, yil_dagilimi FROM arsivler WHERE yol = ?", (anahtar,)
+        ).fetchone()
+        if satir is None:
+            return False, {}
+
+        boyut, mtime_ns, ozet, yil_dagilimi = satir
+        yil_dagilimi = {int(yil): sayi for yil, sayi in json.loads(yil_dagilimi).items()}
+        durum = Path(zip_yolu).stat()
+        if durum.st_size == boyut and durum.st_mtime_ns == mtime_ns:
+            return True, yil_dagilimi
+
+        # Boyut aynı ama zaman değişmişse (kopyalama, touch) içeriğe bak
+        if durum.st_size == boyut and dosya_ozeti(zip_yolu) == ozet:
+            self.baglanti.execute(
+                "UPDATE arsivler SET mtime_ns = ? WHERE yol = ?", (durum.st_mtime_ns, anahtar)
+            )
+            return True, yil_dagilimi
+        return False, yil_dagilimi
+
+    def kaydet(self, zip_yolu, durum, ozet, faturalar, yil_dagilimi, hatalar=()):
+        """Bir arşivin ayrıştırılmış faturalarını önbelleğe yazar.
+
+        ``durum`` arşivin ayrıştırmadan önce alınmış ``os.stat`` sonucudur;
+        böylece ayrıştırma sırasında değişen arşiv bir sonraki çalışmada
+        yeniden işlenir. ``hatalar`` arşivin hata defteri kayıtlarıdır;
+        arşiv yeniden ayrıştırılmadığı sürece her çalışmanın defterine
+        eklenir.
+        """
+        paket = zlib.compress(json.dumps(faturalar, ensure_ascii=False).encode('utf-8'))
+        self.baglanti.execute(
+            "INSERT OR REPLACE INTO arsivler (yol, boyut, mtime_ns, ozet, yil_dagilimi, faturalar, hatalar) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.anahtar(zip_yolu), durum.st_size, durum.st_mtime_ns, ozet,
+             json.dumps(yil_dagilimi), paket, json.dumps(list(hatalar), ensure_ascii=False))
+        )
+
+    def faturalar(self, zip_yolu):
+        """Arşivin faturalarını JSON listeleri olarak döndürür (bkz. ``kayit.kayitlari_coz``)."""
+        return self.kayit_faturalari(self.anahtar(zip_yolu))
+
+    def kayit_faturalari(self, anahtar):
+        """``faturalar`` gibi, ancak ``arsivler()``'in döndürdüğü anahtarla.
+
+        Başka bir makinede yazılmış önbellekte yol bu makinede çözümlenemeyebilir.
+        """
+        satir = self.baglanti.execute("SELECT faturalar FROM arsivler WHERE yol = ?", (anahtar,)).fetchone()
+        if satir is None:
+            return []
+        return json.loads(zlib.decompress(satir[0]))
+
+    def arsivler(self):
+        """Kayıtlı arşivler: ``(yol, mtime_ns, yil_dagilimi)`` listesi."""
+        return [
+            (yol, mtime_ns, {int(yil): sayi for yil, sayi in json.loads(yil_dagilimi).items()})
+            for yol, mtime_ns, yil_dagilimi in self.baglanti.execute(
+                "SELECT yol, mtime_ns, yil_dagilimi FROM arsivler"
+            )
+        ]
+
+    def hatalar(self, zip_dosyalari):
+        """Verilen arşivlerin önbellekteki hata defteri kayıtları."""
+        istenen = {self.anahtar(zip_yolu) for zip_yolu in zip_dosyalari}
+        kayitlar = []
+        for yol, hatalar in self.baglanti.execute("SELECT yol, hatalar FROM arsivler WHERE hatalar != '[]'"):
+            if yol in istenen:
+                kayitlar.extend(json.loads(hatalar))
+        return kayitlar
+
+    def silinenleri_temizle(self, zip_dosyalari):
+        """Artık diskte olmayan arşivlerin kayıtlarını siler.
+
+        Silinen kayıtların etkilediği yılların kümesini döndürür.
+        """
+        mevcut = {self.anahtar(zip_yolu) for zip_yolu in zip_dosyalari}
+        etkilenen_yillar = set()
+        silinecekler = []
+        for yol, yil_dagilimi in self.baglanti.execute("SELECT yol, yil_dagilimi FROM arsivler"):
+            if yol not in mevcut:
+                silinecekler.append((yol,))
+                etkilenen_yillar.update(int(yil) for yil in json.loads(yil_dagilimi))
+        self.baglanti.executemany("DELETE FROM arsivler WHERE yol = ?", silinecekler)
+        self.baglanti.commit()
+        return etkilenen_yillar
+
+    def ayar(self, anahtar):
+        """Önbellekle birlikte saklanan bir çalışma ayarını okur (yoksa None)."""
+        satir = self.baglanti.execute("SELECT deger FROM meta WHERE anahtar = ?", (anahtar,)).fetchone()
+        return satir[0] if satir else None
+
+    def ayar_kaydet(self, anahtar, deger):
+        self.baglanti.execute(
+            "INSERT OR REPLACE INTO meta (anahtar, deger) VALUES (?, ?)", (anahtar, deger)
+        )
+
+    def bekleyen_yillar(self):
+        """Önceki çalışmalarda raporu yeniden üretilemeden kalan yıllar."""
+        deger = self.ayar('bekleyen_yillar')
+        return set(json.loads(deger)) if deger else set()
+
+    def kontrol_noktasi(self, bekleyen_yillar):
+        """Kaydedilen arşivleri, raporu bekleyen yıllarla birlikte kalıcı hale getirir.
+
+        Çalışma yarıda kesilirse sonraki çalışma bu noktadan devam eder:
+        kaydedilmiş arşivler yeniden ayrıştırılmaz, bekleyen yılların
+        raporları yeniden üretilir.
+        """
+        self.ayar_kaydet('bekleyen_yillar', json.dumps(sorted(bekleyen_yillar)))
+        self.onayla()
+
+    def tum_yillar(self):
+        yillar = set()
+        for (yil_dagilimi,) in self.baglanti.execute("SELECT yil_dagilimi FROM arsivler"):
+            yillar.update(int(yil) for yil in json.loads(yil_dagilimi))
+        return yillar
+
+    def onayla(self):
+        self.baglanti.commit()
+
+    def kapat(self):
+        self.baglanti.commit()
+        self.baglanti.close()
@@ -0,0 +1,122 @@
+"""Büyük arşiv ağaçlarının parçalara bölünerek işlenmesi.
+
+Bir parça çalışması (``FaturaIsleyici(..., parca=Parca(...))``) girdi
+ağacındaki arşivlerin belirli bir alt kümesini ayrıştırır ve sonucu kendi
+çıktı dizinindeki önbelleğe yazar; rapor üretmez. Parçalar ayrı süreçlerde
+ya da paylaşılan dosya sistemi üzerinden ayrı makinelerde çalışabilir.
+``FaturaIsleyici.parcalari_birlestir`` parça önbelleklerini yeniden
+ayrıştırmadan okuyup yıllık raporları üretir.
+
+Bir arşivin hangi parçaya düştüğü, girdi dizinine göre göreli yolunun
+özetinden belirlenir; bu yüzden dizin farklı makinelerde farklı yerlere
+bağlanmış olsa da aynı arşiv hep aynı parçaya düşer. ``dizin`` anahtarıyla
+aynı klasördeki arşivler birlikte kalır. Parça önbellekleri arşivleri
+mutlak yollarıyla tutar; birleştirme de göreli yolları kullanır
+(``PARCA_YOLLARI_AYARI``).
+"""
+import hashlib
+import json
+from pathlib import Path, PurePosixPath
+from typing import NamedTuple
+
+PARCA_ANAHTARLARI = ('yol', 'dizin')
+
+# Önbellekte parça bilgisinin saklandığı ayar
+PARCA_AYARI = 'parca'
+# Parçanın hata defteri; tüm arşiv hataları dahil, birleştirmede deftere eklenir
+PARCA_HATALARI_AYARI = 'parca_hatalari'
+# Önbellek anahtarından girdi dizinine göre göreli yola eşleme
+PARCA_YOLLARI_AYARI = 'parca_yollari'
+
+
+class Parca(NamedTuple):
+    no: int
+    sayi: int
+    anahtar: str = 'yol'
+
+    @classmethod
+    def ayristir(cls, metin, anahtar='yol'):
+        """``3/8`` biçimindeki parça tanımını okur (parçalar 0'dan numaralanır)."""
+        try:
+            no, sayi = (int(deger) for deger in metin.split('/'))
+        except ValueError:
+            raise ValueError(f"Geçersiz parça: {metin} (örn. 0/4)") from None
+        if sayi < 1 or not 0 <= no < sayi:
+            raise ValueError(f"Geçersiz parça: {metin} (0 <= no < sayı olmalı)")
+        if anahtar not in PARCA_ANAHTARLARI:
+            raise ValueError(f"Bilinmeyen parça anahtarı: {anahtar}")
+        return cls(no, sayi, anahtar)
+
+    def __str__(self):
+        return f"{self.no}/{self.sayi}"
+
+    def icerir(self, zip_yolu, ana_dizin):
+        """Arşiv bu parçaya mı düşüyor?"""
+        goreli = Path(zip_yolu).relative_to(ana_dizin)
+        if self.anahtar == 'dizin':
+            goreli = goreli.parent
+        ozet = hashlib.blake2b(goreli.as_posix().encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(ozet, 'big') % self.sayi == self.no
+
+    def bilgi(self, tamamlandi, istatistikler=None):
+        """Önbelleğe ``PARCA_AYARI`` olarak yazılan JSON."""
+        return json.dumps({
+            'no': self.no,
+            'sayi': self.sayi,
+            'anahtar': self.anahtar,
+            'tamamlandi': tamamlandi,
+            'istatistikler': istatistikler or {},
+        }, ensure_ascii=False)
+
+
+def eksik_parcalar(bilgiler):
+    """Birleştirilecek parçaların tutarlılığını denetler.
+
+    ``bilgiler`` her parça önbelleğinin ``PARCA_AYARI`` sözlüğüdür. Parça
+    sayısı ya da anahtarı farklıysa ``ValueError`` verir; eksik parça
+    numaralarını döndürür.
+    """
+    sayilar = {(bilgi['sayi'], bilgi['anahtar']) for bilgi in bilgiler}
+    if len(sayilar) > 1:
+        raise ValueError(
+            "Parçalar farklı bölmelerden: " + ", ".join(f"{sayi} parça/{anahtar}" for sayi, anahtar in sorted(sayilar))
+        )
+    (sayi, _), = sayilar
+    return sorted(set(range(sayi)) - {bilgi['no'] for bilgi in bilgiler})
+
+
+def arsivleri_sirala(parcalar):
+    """Parçaların arşivlerini göreli yollarına göre birleştirir.
+
+    ``parcalar`` her parça için ``(goreli_yollar, kayitlar)`` çiftidir:
+    ``goreli_yollar`` önbellek anahtarını göreli yola eşler
+    (``PARCA_YOLLARI_AYARI``), ``kayitlar`` ilk öğesi önbellek anahtarı olan
+    kayıtlardır. Keşif sırasıyla (dizin dizin, ada göre) ``(goreli_yol,
+    kayit)`` listesini ve birden fazla parçada bulunan göreli yolları
+    döndürür; tekrar eden yolun ilk parçadaki kaydı kullanılır.
+
+    Parçalar girdi dizinini farklı yerlere bağlamış olsa da sonuç aynıdır:
+
+    >>> a = ({'/mnt/a/2024/x.zip': '2024/x.zip', '/mnt/a/b.zip': 'b.zip'},
+    ...      [('/mnt/a/b.zip', 1), ('/mnt/a/2024/x.zip', 2)])
+    >>> b = ({'/srv/veri/2023/y.zip': '2023/y.zip', '/srv/veri/b.zip': 'b.zip'},
+    ...      [('/srv/veri/2023/y.zip', 3), ('/srv/veri/b.zip', 4)])
+    >>> sirali, tekrarlar = arsivleri_sirala([a, b])
+    >>> [(yol, kayit[1]) for yol, kayit in sirali]
+    [('2023/y.zip', 3), ('2024/x.zip', 2), ('b.zip', 1)]
+    >>> tekrarlar
+    ['b.zip']
+    """
+    arsivler = {}
+    tekrarlar = []
+    for goreli_yollar, kayitlar in parcalar:
+        for kayit in kayitlar:
+            goreli = goreli_yollar.get(kayit[0])
+            if goreli is None:
+                raise ValueError(f"Parça önbelleğinde göreli yolu olmayan arşiv: {kayit[0]}")
+            if goreli in arsivler:
+                tekrarlar.append(goreli)
+                continue
+            arsivler[goreli] = kayit
+    sirali = sorted(arsivler, key=lambda goreli: PurePosixPath(goreli).parts)
+    return [(goreli, arsivler[goreli]) for goreli in sirali], tekrarlar
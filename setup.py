@@ -22,6 +22,34 @@ with open('entitlements.plist', 'w') as f:
 </dict>
 </plist>''')
 
+# pandas'ın test paketleri ve yalnızca isteğe bağlı özelliklerinde kullandığı
+# kütüphaneler (kuruluysa py2app bunları da toplar) pakete alınmaz; uygulama
+# daha küçük olur ve daha hızlı açılır
+EXCLUDES = [
+    'tkinter',
+    'pandas.tests',
+    'pandas.io.clipboard',
+    'pandas.io.formats.style',
+    'pandas.io.formats.style_render',
+    'numpy.tests',
+    'numpy.f2py',
+    'numpy.distutils',
+    'matplotlib',
+    'scipy',
+    'IPython',
+    'jinja2',
+    'tables',
+    'sqlalchemy',
+    'numba',
+    'bs4',
+    'html5lib',
+    'xlrd',
+    'fsspec',
+    'pytest',
+    'PyQt5',
+    'PySide6',
+]
+
 OPTIONS = {
     'argv_emulation': True,
     'packages': ['PyQt6'],
@@ -32,13 +60,13 @@ OPTIONS = {
         'PyQt6.QtWidgets',
         'pandas',
         'numpy',
+        'openpyxl',
         'asyncio',
-        'aiofiles',
         'pathlib',
         'zipfile',
         'xml.etree.ElementTree'
     ],
-    'excludes': ['tkinter'],
+    'excludes': EXCLUDES,
     'plist': {
         'CFBundleName': 'FaturaIsleyici',
         'CFBundleDisplayName': 'Fatura Isleyici',
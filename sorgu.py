@@ -0,0 +1,283 @@
+"""Rapor klasöründeki SQLite deposunda fatura ve kalem sorguları.
+
+``--format sqlite`` ile üretilen ``faturalar.sqlite`` arşivler yeniden
+ayrıştırılmadan ve Excel açılmadan sorgulanır. Filtreler indeksli sütunlara
+eşitlik ya da tarih aralığı olarak uygulanır; değerde ``*`` varsa joker
+aramaya (LIKE) dönüşür ve indeks kullanılamaz.
+
+Örnekler::
+
+    python sorgu.py /raporlar faturalar --satici "ABC Ltd. Şti." --donem 2024-Q3
+    python sorgu.py /raporlar kalemler --siparis-no SIP123 --kdv-orani 1 --cikti sonuc.csv
+"""
+import argparse
+import csv
+import re
+import sqlite3
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from disa_aktarim import SQLITE_DOSYASI
+
+# Filtre adı -> sütun
+FATURA_FILTRELERI = {
+    'satici': 'Satıcı',
+    'alici': 'Alıcı',
+    'fatura_no': 'Fatura No',
+    'siparis_no': 'Sipariş No',
+    'para_birimi': 'Para Birimi',
+}
+KALEM_FILTRELERI = {
+    'siparis_no': 'Sipariş No',
+    'kdv_orani': 'KDV Oranı',
+    'para_birimi': 'Para Birimi',
+    'urun': 'Ürün/Hizmet',
+}
+
+_DONEM = re.compile(r'^(\d{4})(?:-(?:Q([1-4])|(\d{2})))?$', re.IGNORECASE)
+
+
+def donem_araligi(donem):
+    """``2024``, ``2024-Q3`` ya da ``2024-07`` dönemini ``[baslangic, bitis)`` tarihlerine çevirir."""
+    eslesme = _DONEM.match(donem.strip())
+    if eslesme is None:
+        raise ValueError(f"Geçersiz dönem: {donem} (örn. 2024, 2024-Q3, 2024-07)")
+    yil, ceyrek, ay = eslesme.groups()
+    yil = int(yil)
+    if ceyrek:
+        ilk_ay, ay_sayisi = 3 * int(ceyrek) - 2, 3
+    elif ay:
+        ilk_ay, ay_sayisi = int(ay), 1
+        if not 1 <= ilk_ay <= 12:
+            raise ValueError(f"Geçersiz ay: {donem}")
+    else:
+        ilk_ay, ay_sayisi = 1, 12
+    son_ay = ilk_ay + ay_sayisi
+    bitis_yili, bitis_ayi = (yil + 1, son_ay - 12) if son_ay > 12 else (yil, son_ay)
+    return f"{yil:04d}-{ilk_ay:02d}-01", f"{bitis_yili:04d}-{bitis_ayi:02d}-01"
+
+
+def _kosullar(filtreler, sutunlar, takma_ad):
+    kosullar, degerler = [], []
+    for ad, deger in filtreler.items():
+        if deger is None:
+            continue
+        sutun = f'{takma_ad}."{sutunlar[ad]}"'
+        if isinstance(deger, str) and '*' in deger:
+            # Değerdeki % ve _ LIKE'ta joker sayılmasın; yalnızca * joker olur
+            kalip = deger.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            kosullar.append(f"{sutun} LIKE ? ESCAPE '\\'")
+            degerler.append(kalip.replace('*', '%'))
+        else:
+            kosullar.append(f"{sutun} = ?")
+            degerler.append(deger)
+    return kosullar, degerler
+
+
+def _tarih_kosullari(baslangic, bitis, yil, takma_ad):
+    # Tarih ISO metni olarak saklanır; aralık karşılaştırması indeksten okunur
+    kosullar, degerler = [], []
+    if baslangic:
+        kosullar.append(f'{takma_ad}."Tarih" >= ?')
+        degerler.append(str(baslangic))
+    if bitis:
+        kosullar.append(f'{takma_ad}."Tarih" < ?')
+        degerler.append(str(bitis))
+    if yil is not None:
+        kosullar.append(f"{takma_ad}.yil = ?")
+        degerler.append(int(yil))
+    return kosullar, degerler
+
+
+class FaturaSorgusu:
+    """``faturalar.sqlite`` üzerinde salt okunur sorgular.
+
+    ``yol`` rapor klasörü ya da veritabanı dosyası olabilir. Tarihler
+    ``YYYY-AA-GG`` metni, ``bitis`` hariçtir; ``donem`` verilirse
+    ``donem_araligi`` ile aralığa çevrilir ve ``baslangic``/``bitis`` ile
+    birlikte verilemez. ``faturalar`` ve ``kalemler``
+    DataFrame döndürür; ``csv_yaz`` satırları pandas yüklemeden yazar.
+    """
+
+    def __init__(self, yol):
+        yol = Path(yol)
+        if yol.is_dir():
+            yol = yol / SQLITE_DOSYASI
+        if not yol.exists():
+            raise FileNotFoundError(f"Sorgu veritabanı bulunamadı: {yol} (raporları --format sqlite ile üretin)")
+        self.yol = yol
+        self.baglanti = sqlite3.connect(f"{yol.resolve().as_uri()}?mode=ro", uri=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.kapat()
+
+    def kapat(self):
+        self.baglanti.close()
+
+    @staticmethod
+    def _sinirla(komut, degerler, limit):
+        if limit is None:
+            return komut, degerler
+        return komut + " LIMIT ?", [*degerler, int(limit)]
+
+    def _oku(self, komut, degerler):
+        import pandas as pd
+        return pd.read_sql_query(komut, self.baglanti, params=degerler)
+
+    @staticmethod
+    def _aralik(baslangic, bitis, donem):
+        if donem is not None:
+            if baslangic or bitis:
+                raise ValueError("donem, baslangic ya da bitis ile birlikte verilemez")
+            return donem_araligi(donem)
+        return baslangic, bitis
+
+    @staticmethod
+    def _filtreleri_dogrula(filtreler, gecerli):
+        bilinmeyen = set(filtreler) - set(gecerli)
+        if bilinmeyen:
+            raise TypeError(f"Bilinmeyen filtre: {', '.join(sorted(bilinmeyen))}")
+
+    def faturalar(self, baslangic=None, bitis=None, donem=None, yil=None, limit=None, **filtreler):
+        """Filtrelere uyan faturalar, tarih sırasıyla.
+
+        ``filtreler``: ``satici``, ``alici``, ``fatura_no``, ``siparis_no``,
+        ``para_birimi``.
+        """
+        return self._oku(*self._fatura_komutu(baslangic, bitis, donem, yil, limit, filtreler))
+
+    def _fatura_komutu(self, baslangic, bitis, donem, yil, limit, filtreler):
+        self._filtreleri_dogrula(filtreler, FATURA_FILTRELERI)
+        baslangic, bitis = self._aralik(baslangic, bitis, donem)
+        kosullar, degerler = _kosullar(filtreler, FATURA_FILTRELERI, 'f')
+        tarih_kosullari, tarih_degerleri = _tarih_kosullari(baslangic, bitis, yil, 'f')
+        kosullar += tarih_kosullari
+        degerler += tarih_degerleri
+        komut = "SELECT f.* FROM faturalar f"
+        if kosullar:
+            komut += " WHERE " + " AND ".join(kosullar)
+        komut += ' ORDER BY f."Tarih", f."Fatura No"'
+        return self._sinirla(komut, degerler, limit)
+
+    def kalemler(self, baslangic=None, bitis=None, donem=None, yil=None, limit=None, **filtreler):
+        """Filtrelere uyan kalemler.
+
+        Kalem filtreleri: ``siparis_no``, ``kdv_orani``, ``para_birimi``,
+        ``urun``. ``satici``, ``alici``, ``fatura_no`` ve tarih aralığı,
+        kalemleri aynı yılda aynı Sipariş No'lu faturalarla eşleştirerek
+        uygulanır; siparişsiz faturaların kalemleri bu filtrelerle bulunmaz.
+        """
+        return self._oku(*self._kalem_komutu(baslangic, bitis, donem, yil, limit, filtreler))
+
+    def _kalem_komutu(self, baslangic, bitis, donem, yil, limit, filtreler):
+        filtreler = dict(filtreler)
+        fatura_filtreleri = {
+            ad: filtreler.pop(ad) for ad in ('satici', 'alici', 'fatura_no') if ad in filtreler
+        }
+        self._filtreleri_dogrula(filtreler, KALEM_FILTRELERI)
+        if filtreler.get('kdv_orani') is not None:
+            filtreler['kdv_orani'] = float(filtreler['kdv_orani'])
+        baslangic, bitis = self._aralik(baslangic, bitis, donem)
+        kosullar, degerler = _kosullar(filtreler, KALEM_FILTRELERI, 'k')
+        if yil is not None:
+            kosullar.append("k.yil = ?")
+            degerler.append(int(yil))
+
+        alt_kosullar, alt_degerler = _kosullar(fatura_filtreleri, FATURA_FILTRELERI, 'f')
+        tarih_kosullari, tarih_degerleri = _tarih_kosullari(baslangic, bitis, None, 'f')
+        alt_kosullar += tarih_kosullari
+        alt_degerler += tarih_degerleri
+        if alt_kosullar:
+            kosullar.append(
+                # Sipariş No önde olmalı; planlayıcı ancak böyle kalemler_siparis_yil
+                # indeksini seçer, yoksa kalemleri tarar
+                '(k."Sipariş No", k.yil) IN (SELECT f."Sipariş No", f.yil FROM faturalar f WHERE '
+                + " AND ".join(alt_kosullar) + " AND f.\"Sipariş No\" != '')"
+            )
+            degerler += alt_degerler
+
+        komut = "SELECT k.* FROM kalemler k"
+        if kosullar:
+            komut += " WHERE " + " AND ".join(kosullar)
+        komut += " ORDER BY k.rowid"
+        return self._sinirla(komut, degerler, limit)
+
+    def csv_yaz(self, tablo, dosya, baslangic=None, bitis=None, donem=None, yil=None, limit=None, **filtreler):
+        """``faturalar`` ya da ``kalemler`` sorgusunun sonucunu ``dosya``'ya CSV yazar.
+
+        Satırlar imleçten akıtılır; satır sayısını döndürür.
+        """
+        komutu = {'faturalar': self._fatura_komutu, 'kalemler': self._kalem_komutu}[tablo]
+        imlec = self.baglanti.execute(*komutu(baslangic, bitis, donem, yil, limit, filtreler))
+        yazici = csv.writer(dosya, lineterminator="\n")
+        yazici.writerow(tanim[0] for tanim in imlec.description)
+        satir_sayisi = 0
+        while satirlar := imlec.fetchmany(10_000):
+            yazici.writerows(satirlar)
+            satir_sayisi += len(satirlar)
+        return satir_sayisi
+
+
+def argumanlari_ayristir(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="fatura-sorgu",
+        description="Rapor klasöründeki SQLite veritabanından fatura ya da kalem sorgular; sonucu CSV yazar."
+    )
+    parser.add_argument('depo', type=Path, help="Rapor klasörü ya da faturalar.sqlite dosyası")
+    parser.add_argument('tablo', choices=('faturalar', 'kalemler'))
+    tarih = parser.add_mutually_exclusive_group()
+    tarih.add_argument('--donem', help="Yıl, çeyrek ya da ay: 2024, 2024-Q3, 2024-07")
+    tarih.add_argument('--baslangic', help="Bu tarihten (YYYY-AA-GG, dahil)")
+    parser.add_argument('--bitis', help="Bu tarihe kadar (YYYY-AA-GG, hariç)")
+    parser.add_argument('--yil', type=int)
+    parser.add_argument('--satici', help="Satıcı adı; * joker karakterdir")
+    parser.add_argument('--alici', help="Alıcı adı; * joker karakterdir")
+    parser.add_argument('--fatura-no')
+    parser.add_argument('--siparis-no')
+    parser.add_argument('--para-birimi')
+    parser.add_argument('--kdv-orani', type=float, help="Yalnızca kalemler")
+    parser.add_argument('--urun', help="Ürün/hizmet adı, yalnızca kalemler; * joker karakterdir")
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--cikti', type=Path, help="CSV dosyası (varsayılan: stdout)")
+    args = parser.parse_args(argv)
+    if args.donem is not None:
+        if args.bitis is not None:
+            parser.error("--bitis, --donem ile birlikte kullanılamaz")
+        try:
+            donem_araligi(args.donem)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.tablo == 'faturalar' and (args.kdv_orani is not None or args.urun is not None):
+        parser.error("--kdv-orani ve --urun yalnızca kalemler için kullanılabilir")
+    return args
+
+
+def main(argv=None):
+    args = argumanlari_ayristir(argv)
+    filtreler = {
+        ad: getattr(args, ad)
+        for ad in ('satici', 'alici', 'fatura_no', 'siparis_no', 'para_birimi', 'kdv_orani', 'urun')
+        if getattr(args, ad) is not None
+    }
+    baslangic = time.perf_counter()
+    try:
+        with FaturaSorgusu(args.depo) as sorgu:
+            cikti = open(args.cikti, 'w', encoding='utf-8', newline='') if args.cikti else nullcontext(sys.stdout)
+            with cikti as dosya:
+                satir_sayisi = sorgu.csv_yaz(args.tablo, dosya, baslangic=args.baslangic, bitis=args.bitis,
+                                             donem=args.donem, yil=args.yil, limit=args.limit, **filtreler)
+    except (FileNotFoundError, sqlite3.Error) as e:
+        print(f"Sorgu başarısız: {e}", file=sys.stderr)
+        return 1
+    sure = time.perf_counter() - baslangic
+    print(f"{satir_sayisi} satır, {sure * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
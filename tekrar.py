@@ -0,0 +1,117 @@
+TEKRAR_POLITIKALARI = ('ilk', 'yeni')
+
+# Çakışmalar sayfasının sütunları
+CAKISMA_SUTUNLARI = (
+    'Fatura No', 'UUID', 'Eşleşme', 'Tutulan Kaynak', 'Tutulan Toplam', 'Atlanan Kaynak', 'Atlanan Toplam'
+)
+
+
+class TekrarDizini:
+    """Farklı arşivlerde tekrar eden faturaları ayıklayan dizin.
+
+    Paraşüt dışa aktarımları çakışır: aynı fatura hem aylık hem üç aylık
+    arşivde bulunabilir. Her fatura XML içerik özeti ve kimliğiyle
+    sözlüklere yazılır; kontrol fatura başına sabit zamanlıdır. Kimlik
+    UUID'dir; UUID'si olmayan faturalarda satıcı ile Fatura No birlikte
+    kullanılır, çünkü farklı satıcıların (ör. GİB portalı) fatura numaraları
+    aynı olabilir.
+
+    İçerik özeti aynı olan kopyalar sessizce atlanır. Kimlik aynı ama içerik
+    farklıysa çakışma kaydedilir ve ``politika`` kazananı belirler: ``'ilk'``
+    ilk görüleni, ``'yeni'`` arşivi daha yeni olanı tutar.
+
+    Numarası aynı ama UUID'si ya da satıcısı farklı faturalar ayrı tutulur:
+
+    >>> from kayit import Fatura
+    >>> dizin = TekrarDizini()
+    >>> a = Fatura('', '', 'GIB2024000000001', '2024-01-05', 'Satıcı A', 'X', 10.0, 'TRY', 10.0, 'uuid-aaaa')
+    >>> dizin.kontrol(2024, a, 0)[0], dizin.kontrol(2024, a._replace(uuid='uuid-bbbb'), 0)[0]
+    (0, 1)
+    >>> b = a._replace(uuid=None)
+    >>> dizin.kontrol(2024, b, 0)[0], dizin.kontrol(2024, b._replace(satici='Satıcı B'), 0)[0]
+    (2, 3)
+    >>> dizin.kontrol(2024, b._replace(toplam=12.0), 0)[0] is None  # aynı satıcı ve numara
+    True
+    """
+
+    def __init__(self, politika='ilk'):
+        if politika not in TEKRAR_POLITIKALARI:
+            raise ValueError(f"Geçersiz tekrar politikası: {politika}")
+        self.politika = politika
+        self.ozetler = set()  # görülen XML içerik özetleri
+        self.anahtarlar = {}  # 'u:<UUID>' / 'n:<Satıcı>\x00<Fatura No>' -> kayıt no
+        # Kayıt no -> [depo tutamağı, arşiv zamanı, kaynak, toplam, yıl]
+        self.kayitlar = []
+        self.cakismalar = {}  # yıl -> [çakışma satırı, ...]
+        self.atlanan = {}  # yıl -> atlanan tekrar sayısı
+
+    @staticmethod
+    def _anahtarlar(veri):
+        if veri.uuid:
+            return ['u:' + veri.uuid]
+        return ['n:' + (veri.satici or '') + '\x00' + veri.fatura_no]
+
+    def _atla(self, yil):
+        self.atlanan[yil] = self.atlanan.get(yil, 0) + 1
+
+    def kontrol(self, yil, veri, zaman):
+        """Faturanın depoya eklenip eklenmeyeceğine karar verir.
+
+        ``(kayit_no, cikarilacak)`` döndürür. ``kayit_no`` None ise fatura
+        tekrardır ve atlanır; değilse depoya eklenip dönen tutamak
+        ``tutamak_ata`` ile kaydedilmelidir. ``cikarilacak`` daha önce eklenmiş
+        ve yerini bu faturaya bırakan kaydın depo tutamağıdır.
+        """
+        ozet = veri.icerik_ozeti
+        if ozet is not None and ozet in self.ozetler:
+            self._atla(yil)
+            return None, None
+
+        anahtarlar = self._anahtarlar(veri)
+        kayit_no = None
+        eslesme = None
+        for anahtar in anahtarlar:
+            kayit_no = self.anahtarlar.get(anahtar)
+            if kayit_no is not None:
+                eslesme = 'UUID' if anahtar.startswith('u:') else 'Fatura No'
+                break
+
+        kaynak = veri.kaynak
+        cikarilacak = None
+        if kayit_no is None:
+            hedef = kayit_no = len(self.kayitlar)
+            self.kayitlar.append([None, zaman, kaynak, veri.toplam, yil])
+        else:
+            hedef = kayit_no
+            kayit = self.kayitlar[kayit_no]
+            yeni_kazanir = self.politika == 'yeni' and zaman > kayit[1]
+            if yeni_kazanir:
+                self.cakismalar.setdefault(yil, []).append(
+                    (veri.fatura_no, veri.uuid, eslesme, kaynak, veri.toplam, kayit[2], kayit[3])
+                )
+                self._atla(kayit[4])
+                cikarilacak = kayit[0]
+                kayit[:] = [None, zaman, kaynak, veri.toplam, yil]
+            else:
+                self.cakismalar.setdefault(kayit[4], []).append(
+                    (veri.fatura_no, veri.uuid, eslesme, kayit[2], kayit[3], kaynak, veri.toplam)
+                )
+                self._atla(yil)
+                kayit_no = None
+
+        # Atlanan sürümün özeti de kaydedilir; aynı kopyası tekrar gelirse
+        # yeniden çakışma yazılmaz
+        if ozet is not None:
+            self.ozetler.add(ozet)
+        for anahtar in anahtarlar:
+            self.anahtarlar.setdefault(anahtar, hedef)
+        return kayit_no, cikarilacak
+
+    def tutamak_ata(self, kayit_no, tutamak):
+        self.kayitlar[kayit_no][0] = tutamak
+
+    def toplam_atlanan(self):
+        return sum(self.atlanan.values())
+
+    def toplam_cakisma(self):
+        return sum(len(satirlar) for satirlar in self.cakismalar.values())
@@ -1,14 +1,24 @@
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                           QPushButton, QLabel, QFileDialog, QProgressBar, QHBoxLayout, QGridLayout, QScrollArea, QFrame, QSizePolicy)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QFont, QColor, QPalette, QIcon
+                           QPushButton, QLabel, QFileDialog, QProgressBar, QHBoxLayout, QFrame,
+                           QListView, QAbstractItemView, QStyledItemDelegate)
+from PyQt6.QtCore import Qt, QThread, QTimer, QAbstractListModel, QModelIndex, QRectF, QSize, pyqtSignal
+from PyQt6.QtGui import QFont, QFontMetrics, QColor, QIcon, QPainter
 import sys
 import asyncio
+import multiprocessing
+import threading
 from pathlib import Path
+import gunluk
 from fatura_isleyici import FaturaIsleyici
 
+# Arayüz en fazla bu aralıkla (10 Hz) güncellenir; arka uç ne kadar hızlı
+# olursa olsun arada gelen olaylar tek güncellemede toplanır
+ILERLEME_ARALIGI_MS = 100
+# Dashboard listesinde tutulan en fazla dosya sayısı; eskiler düşer
+GECMIS_SINIRI = 5000
+
 class IslemThread(QThread):
-    progress = pyqtSignal(str, dict, dict)  # message, stats, file_details
+    progress = pyqtSignal(str, dict, list)  # message, stats, [(filename, fatura_count, year_distribution), ...]
     finished = pyqtSignal()
     error = pyqtSignal(str)
     
@@ -17,13 +27,54 @@ class IslemThread(QThread):
         self.fatura_dizini = fatura_dizini
         self.cikti_dizini = cikti_dizini
         self.is_running = True
+        self.isleyici = None
+        
+        # İşleyici her arşivde geri çağırır; olaylar kilitli bir tamponda
+        # biriktirilir ve arayüz iş parçacığındaki zamanlayıcıyla toplu iletilir
+        self._kilit = threading.Lock()
+        self._yeni_durum = False
+        self._son_mesaj = ""
+        self._son_istatistik = {}
+        self._bekleyen_dosyalar = []
+        self._zamanlayici = QTimer(self)
+        self._zamanlayici.setInterval(ILERLEME_ARALIGI_MS)
+        self._zamanlayici.timeout.connect(self._tamponu_bosalt)
+        self.started.connect(self._zamanlayici.start)
+        self.finished.connect(self._bitti)
+    
+    def _ilerleme_kaydet(self, message, stats, file_details):
+        # İşçi iş parçacığında çalışır; yalnızca tampona yazar
+        with self._kilit:
+            self._yeni_durum = True
+            self._son_mesaj = message
+            self._son_istatistik = stats
+            if file_details:
+                self._bekleyen_dosyalar.append(
+                    (file_details['filename'], file_details['fatura_count'], file_details['year_distribution'])
+                )
+    
+    def _tamponu_bosalt(self):
+        with self._kilit:
+            if not self._yeni_durum:
+                return
+            mesaj, istatistik, dosyalar = self._son_mesaj, self._son_istatistik, self._bekleyen_dosyalar
+            self._yeni_durum = False
+            self._bekleyen_dosyalar = []
+        self.progress.emit(mesaj, istatistik, dosyalar)
+    
+    def _bitti(self):
+        self._zamanlayici.stop()
+        self._tamponu_bosalt()
         
     def run(self):
         try:
             async def run_isleyici():
                 try:
                     isleyici = FaturaIsleyici(self.fatura_dizini, self.cikti_dizini)
-                    isleyici.progress_callback = lambda msg, stats, file_details: self.progress.emit(msg, stats, file_details)
+                    isleyici.progress_callback = self._ilerleme_kaydet
+                    self.isleyici = isleyici
+                    if not self.is_running:  # İşleyici oluşturulurken durdurulduysa
+                        isleyici.iptal()
                     await isleyici.tum_yillari_isle()
                 except Exception as e:
                     self.error.emit(str(e))
@@ -37,7 +88,10 @@ class IslemThread(QThread):
             self.is_running = False
             
     def stop(self):
+        # İşleyici arşivler arasında durur; ayrıştırılanlar önbellekte kalır
         self.is_running = False
+        if self.isleyici is not None:
+            self.isleyici.iptal()
         self.wait()
 
 class MacButton(QPushButton):
@@ -128,69 +182,116 @@ class DashboardWidget(QWidget):
         
         layout.addWidget(header)
         
-        # İşlem listesi
-        self.process_list = QWidget()
+        # İşlem listesi: öğeler model üzerinden sanal olarak çizilir, yalnızca
+        # görünen satırlar boyanır
+        self.process_model = IslemListesiModeli()
+        self.process_list = QListView()
+        self.process_list.setModel(self.process_model)
+        self.process_list.setItemDelegate(IslemOgesiCizici(self.process_list))
+        self.process_list.setUniformItemSizes(True)
+        self.process_list.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.process_list.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.process_list.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.process_list.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.process_list.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.process_list.setFrameShape(QFrame.Shape.NoFrame)
         self.process_list.setStyleSheet("""
-            QWidget {
+            QListView {
                 background-color: #2C2C2E;
                 border-radius: 8px;
+                padding: 16px;
             }
         """)
         
-        process_layout = QVBoxLayout(self.process_list)
-        process_layout.setSpacing(8)
-        process_layout.setContentsMargins(16, 16, 16, 16)
-        
-        scroll = QScrollArea()
-        scroll.setWidget(self.process_list)
-        scroll.setWidgetResizable(True)
-        scroll.setFrameShape(QFrame.Shape.NoFrame)
-        scroll.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        scroll.setStyleSheet("""
-            QScrollArea {
-                border: none;
-                background-color: transparent;
-            }
-        """)
-        
-        layout.addWidget(scroll, 1)  # 1 stretch factor ile tüm alanı kapla
+        layout.addWidget(self.process_list, 1)  # 1 stretch factor ile tüm alanı kapla
 
     def add_process_item(self, filename, fatura_count, year_distribution):
-        item = QWidget()
-        item.setStyleSheet("""
-            QWidget {
-                background-color: #333333;
-                border-radius: 8px;
-                padding: 16px;
-                margin: 4px 0px;
-            }
-            QLabel#filename {
-                color: #FFFFFF;
-                font-weight: 500;
-            }
-            QLabel#details {
-                color: #A0A0A0;
-            }
-        """)
-        
-        layout = QVBoxLayout(item)
-        layout.setSpacing(6)
-        layout.setContentsMargins(16, 16, 16, 16)
-        
-        filename_label = QLabel(filename)
-        filename_label.setObjectName("filename")
-        filename_label.setFont(QFont(".AppleSystemUIFont", 14))
-        
-        details = QLabel(f"{fatura_count} fatura • {year_distribution}")
-        details.setObjectName("details")
-        details.setFont(QFont(".AppleSystemUIFont", 12))
-        details.setWordWrap(True)
-        
-        layout.addWidget(filename_label)
-        layout.addWidget(details)
-        
-        self.process_list.layout().addWidget(item)
+        self.add_process_items([(filename, fatura_count, year_distribution)])
+
+    def add_process_items(self, items):
+        self.process_model.ekle([
+            (filename, f"{fatura_count} fatura • {year_distribution}")
+            for filename, fatura_count, year_distribution in items
+        ])
+
+
+class IslemListesiModeli(QAbstractListModel):
+    """Dashboard'daki işlenen dosyalar; en son ``sinir`` kayıt tutulur."""
+    AYRINTI_ROLU = Qt.ItemDataRole.UserRole + 1
+    
+    def __init__(self, sinir=GECMIS_SINIRI):
+        super().__init__()
+        self.sinir = sinir
+        self.kayitlar = []  # (dosya adı, ayrıntı metni)
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.kayitlar)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        dosya_adi, ayrinti = self.kayitlar[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return dosya_adi
+        if role == self.AYRINTI_ROLU:
+            return ayrinti
+        return None
+    
+    def ekle(self, yeni_kayitlar):
+        yeni_kayitlar = yeni_kayitlar[-self.sinir:]
+        if not yeni_kayitlar:
+            return
+        # Sınır aşılırsa en eski kayıtlar düşer
+        fazla = len(self.kayitlar) + len(yeni_kayitlar) - self.sinir
+        if fazla > 0:
+            self.beginRemoveRows(QModelIndex(), 0, fazla - 1)
+            del self.kayitlar[:fazla]
+            self.endRemoveRows()
+        ilk = len(self.kayitlar)
+        self.beginInsertRows(QModelIndex(), ilk, ilk + len(yeni_kayitlar) - 1)
+        self.kayitlar.extend(yeni_kayitlar)
+        self.endInsertRows()
+
+
+class IslemOgesiCizici(QStyledItemDelegate):
+    """Liste öğelerini kart olarak çizer; öğe başına widget ve stil sayfası oluşturulmaz."""
+    YUKSEKLIK = 76
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.dosya_yazi_tipi = QFont(".AppleSystemUIFont", 14)
+        self.dosya_yazi_tipi.setWeight(QFont.Weight.Medium)
+        self.ayrinti_yazi_tipi = QFont(".AppleSystemUIFont", 12)
+        self.dosya_olcusu = QFontMetrics(self.dosya_yazi_tipi)
+        self.ayrinti_olcusu = QFontMetrics(self.ayrinti_yazi_tipi)
+    
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.YUKSEKLIK)
+    
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#333333"))
+        painter.drawRoundedRect(QRectF(option.rect.adjusted(0, 4, 0, -4)), 8, 8)
+        
+        metin_alani = option.rect.adjusted(16, 16, -16, -16)
+        genislik = metin_alani.width()
+        painter.setFont(self.dosya_yazi_tipi)
+        painter.setPen(QColor("#FFFFFF"))
+        painter.drawText(
+            metin_alani, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop,
+            self.dosya_olcusu.elidedText(index.data(), Qt.TextElideMode.ElideMiddle, genislik)
+        )
+        painter.setFont(self.ayrinti_yazi_tipi)
+        painter.setPen(QColor("#A0A0A0"))
+        painter.drawText(
+            metin_alani, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignBottom,
+            self.ayrinti_olcusu.elidedText(
+                index.data(IslemListesiModeli.AYRINTI_ROLU), Qt.TextElideMode.ElideRight, genislik
+            )
+        )
+        painter.restore()
 
 
 class FormSection(QWidget):
@@ -411,13 +512,9 @@ class FaturaUI(QMainWindow):
                 f"{stats['islenen_dosya']}/{stats['toplam_dosya']} dosya işlendi, {stats['bulunan_fatura']} fatura bulundu"
             )
         
-        # Dosya detayını ekle
+        # Son güncellemeden bu yana işlenen dosyaları tek seferde ekle
         if file_details:
-            self.dashboard.add_process_item(
-                file_details['filename'],
-                file_details['fatura_count'],
-                file_details['year_distribution']
-            )
+            self.dashboard.add_process_items(file_details)
         
         # Durum mesajını güncelle
         self.status_label.setText(message)
@@ -444,10 +541,13 @@ class FaturaUI(QMainWindow):
         event.accept()
 
 def main():
+    gunluk.yapilandir()
     app = QApplication(sys.argv)
     window = FaturaUI()
     window.show()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    # py2app paketinde işçi süreçlerinin uygulamayı yeniden başlatmaması için
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file